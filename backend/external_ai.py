@@ -0,0 +1,343 @@
+"""Line protocol that lets an external program play an AI seat.
+
+The bot is a long-lived subprocess talking over stdin/stdout, one command
+per line, in the spirit of chess engines' UCI:
+
+    engine -> bot                                  bot -> engine
+    gbr                                            id name <name>   (optional)
+                                                   gbrok
+    isready                                        readyok
+    newgame
+    position capacity <C> turn <seat> bags <w>:<v> <w>:<v> items <h>:<w>:<v>:<orig_w> ...
+    go movetime <ms>                               bestmove <handle> <amount>
+                                                   bestmove skip
+    quit
+
+`position` queues a position; `go` asks for one `bestmove` per queued
+position, in order, and clears the queue. Simulations queue many positions
+before a single `go` so a whole batch costs one round-trip. Only items that
+can still be picked are listed, each prefixed with its stable handle;
+`<amount>` is the integer weight to take.
+
+Run `python -m backend.external_ai --bot hard` for a reference bot.
+"""
+import argparse
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+
+from backend.game_engine import GameEngine
+
+
+def format_position(engine):
+    """`position` command describing whose turn it is in `engine`"""
+    bags = " ".join(f"{p.current_weight:g}:{p.total_value:.4f}" for p in engine.players)
+    items = " ".join(f"{it.handle}:{it.weight}:{it.value:.4f}:{it.original_weight}" for it in engine.live_items())
+    return (f"position capacity {engine.bag_capacity:g} turn {engine.current_player_index} "
+            f"bags {bags} items {items}").rstrip()
+
+
+def parse_position(line):
+    """Inverse of format_position, used by bots"""
+    tokens = line.split()
+    position = {"capacity": float(tokens[2]), "turn": int(tokens[4]), "bags": [], "items": []}
+    section = None
+    for token in tokens[5:]:
+        if token in ("bags", "items"):
+            section = token
+        elif section == "bags":
+            weight, value = token.split(":")
+            position["bags"].append((float(weight), float(value)))
+        elif section == "items":
+            handle, weight, value, original_weight = token.split(":")
+            position["items"].append((int(handle), int(weight), float(value), int(original_weight)))
+    return position
+
+
+class ExternalAI:
+    """AI seat backed by an external bot process.
+
+    The process is started on first use and kept alive across moves and games.
+    A bot that misses its time budget (plus `grace` seconds) forfeits the move;
+    its late replies are then drained up to an `isready` round-trip before the
+    next batch, so they are never taken for answers to other positions.
+
+    `pick_moves` blocks until the whole batch is answered; a GUI that must keep
+    drawing instead calls `submit` once per turn and `poll_move` every frame.
+    """
+
+    def __init__(self, command, movetime=500, grace=1.0):
+        self.command = command
+        self.difficulty = "External"
+        self.movetime = movetime
+        self.grace = grace
+        self.name = command
+        self.process = None
+        self.lines = queue.Queue()
+        self.pending_ready = 0
+        self.request = None
+        self.request_sent = False
+        self.deadline = 0.0
+
+    def start(self):
+        args = shlex.split(self.command) if isinstance(self.command, str) else self.command
+        self.process = subprocess.Popen(
+            args, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, bufsize=1,
+        )
+        self.lines = queue.Queue()
+        self.pending_ready = 0
+        self.request = None
+        threading.Thread(target=self._read_lines, args=(self.process.stdout, self.lines), daemon=True).start()
+
+        self.send("gbr")
+        while True:
+            line = self.read_line(timeout=5.0)
+            if line is None:
+                raise RuntimeError(f"External AI did not answer 'gbr': {self.command}")
+            if line.startswith("id name "):
+                self.name = line[len("id name "):]
+            elif line == "gbrok":
+                break
+
+    def _read_lines(self, stream, lines):
+        for line in stream:
+            lines.put(line.strip())
+        lines.put(None)
+
+    def send(self, line):
+        self.process.stdin.write(line + "\n")
+        self.process.stdin.flush()
+
+    def read_line(self, timeout):
+        try:
+            return self.lines.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def ensure_running(self):
+        if self.process is None or self.process.poll() is not None:
+            self.start()
+
+    def new_game(self):
+        self.ensure_running()
+        self.abandon_request()
+        self.send("newgame")
+
+    def pick_move(self, engine):
+        """Ask the bot for a move in `engine`; returns (item, fraction) like the built-in AIs"""
+        return self.pick_moves([engine])[0]
+
+    def pick_moves(self, engines):
+        """Submit one position per engine and collect all answers in one round-trip"""
+        self.ensure_running()
+        self.abandon_request()
+        if not self.drain_late_replies():
+            print(f"External AI is still busy with an earlier batch: {self.name}")
+            return [(None, 0)] * len(engines)
+        for engine in engines:
+            self.send(format_position(engine))
+        self.send(f"go movetime {self.movetime}")
+
+        moves = []
+        deadline = time.monotonic() + self.movetime / 1000 * len(engines) + self.grace
+        for engine in engines:
+            line = self.read_reply(deadline)
+            if line is None:
+                print(f"External AI gave no move in time: {self.name}")
+                moves.extend([(None, 0)] * (len(engines) - len(moves)))
+                self.send("isready")
+                self.pending_ready += 1
+                break
+            moves.append(self._parse_move(engine, line))
+        return moves
+
+    def submit(self, engine):
+        """Send the position in `engine` without waiting for the answer; collect it with poll_move"""
+        self.ensure_running()
+        self.abandon_request()
+        self.request = engine
+        self.request_sent = False
+        self.deadline = time.monotonic() + self.movetime / 1000 + self.grace
+        if not self.pending_ready:
+            self._send_request()
+
+    def _send_request(self):
+        self.send(format_position(self.request))
+        self.send(f"go movetime {self.movetime}")
+        self.request_sent = True
+        self.deadline = time.monotonic() + self.movetime / 1000 + self.grace
+
+    def poll_move(self):
+        """Answer to the submitted position as (item, fraction), a forfeit once its deadline passed, or None while waiting.
+
+        Never blocks: only output that has already arrived is read.
+        """
+        engine = self.request
+        for _ in range(self.lines.qsize()):
+            line = self.lines.get_nowait()
+            if line is None:
+                print(f"External AI exited: {self.name}")
+                self.request = None
+                return None, 0
+            if self.pending_ready:
+                if line == "readyok":
+                    self.pending_ready -= 1
+                    if not self.pending_ready:
+                        self._send_request()
+            elif line.startswith("bestmove"):
+                self.request = None
+                return self._parse_move(engine, line)
+        if time.monotonic() < self.deadline:
+            return None
+        print(f"External AI gave no move in time: {self.name}")
+        self.abandon_request()
+        return None, 0
+
+    def abandon_request(self):
+        """Forget the submitted position; a reply still owed for it is drained like a timed-out batch"""
+        if self.request is not None and self.request_sent:
+            self.send("isready")
+            self.pending_ready += 1
+        self.request = None
+
+    def drain_late_replies(self):
+        """Discard output up to the `readyok` of every `isready` sent after a timeout; False if it is not all in yet"""
+        deadline = time.monotonic() + self.movetime / 1000 + self.grace
+        while self.pending_ready:
+            remaining = deadline - time.monotonic()
+            line = self.read_line(remaining) if remaining > 0 else None
+            if line is None:
+                return False
+            if line == "readyok":
+                self.pending_ready -= 1
+        return True
+
+    def read_reply(self, deadline):
+        """Next `bestmove` line before `deadline` (time.monotonic), skipping any other output; None on timeout"""
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            line = self.read_line(remaining)
+            if line is None or line.startswith("bestmove"):
+                return line
+
+    def _parse_move(self, engine, line):
+        tokens = line.split()
+        if len(tokens) < 3 or tokens[1] == "skip":
+            return None, 0
+        try:
+            handle, amount = int(tokens[1]), int(tokens[2])
+        except ValueError:
+            return None, 0
+        item = engine.get_item(handle)
+        if item is None or amount <= 0:
+            return None, 0
+        return item, min(1.0, amount / item.weight)
+
+    def set_difficulty(self, difficulty):
+        pass
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            try:
+                self.send("quit")
+                self.process.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self.process.kill()
+        self.process = None
+
+
+def simulate(ai, seeds, seat=1, opponent="Hard", bag_capacity=25):
+    """Play one game per seed against a built-in AI, batching the external seat.
+
+    All games advance together; each round the positions where the external
+    seat is to move go to the bot in a single `go`. Returns (seed, scores) pairs.
+    """
+    engines = []
+    for seed in seeds:
+        engine = GameEngine(bag_capacity=bag_capacity)
+        engine.initialize_game(["Seat 1", "Seat 2"], ai_seats={seat: ai, 1 - seat: opponent}, seed=seed)
+        engines.append(engine)
+    ai.new_game()
+
+    while True:
+        live = [engine for engine in engines if not engine.game_over]
+        if not live:
+            break
+        waiting = [engine for engine in live if engine.current_player_index == seat]
+        for engine in live:
+            if engine.current_player_index != seat:
+                engine.ai_make_move()
+        if waiting:
+            for engine, move in zip(waiting, ai.pick_moves(waiting)):
+                engine.ai_make_move(move)
+
+    return [(seed, (e.players[0].total_value, e.players[1].total_value)) for seed, e in zip(seeds, engines)]
+
+
+def run_bot(strategy="hard", stdin=sys.stdin, stdout=sys.stdout):
+    """Reference bot: best value/weight ratio ("hard") or best value ("value")"""
+    key = (lambda it: it[2] / it[1]) if strategy == "hard" else (lambda it: it[2])
+    queued = []
+
+    def reply(line):
+        stdout.write(line + "\n")
+        stdout.flush()
+
+    for line in stdin:
+        command = line.split()
+        if not command:
+            continue
+        if command[0] == "gbr":
+            reply(f"id name reference-{strategy}")
+            reply("gbrok")
+        elif command[0] == "isready":
+            reply("readyok")
+        elif command[0] == "position":
+            queued.append(parse_position(line))
+        elif command[0] == "go":
+            for position in queued:
+                capacity = position["capacity"]
+                space = int(capacity - position["bags"][position["turn"]][0])
+                if space <= 0 or not position["items"]:
+                    reply("bestmove skip")
+                    continue
+                item = max(position["items"], key=key)
+                reply(f"bestmove {item[0]} {min(item[1], space)}")
+            queued = []
+        elif command[0] == "quit":
+            break
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Greedy Bag Race external AI tools")
+    parser.add_argument("--bot", choices=["hard", "value"], help="run the reference bot on stdin/stdout")
+    parser.add_argument("--engine", help="command of a bot to evaluate against the built-in AI")
+    parser.add_argument("--opponent", default="Hard")
+    parser.add_argument("--games", type=int, default=100)
+    args = parser.parse_args()
+
+    if args.bot:
+        run_bot(args.bot)
+        return
+    if not args.engine:
+        parser.error("either --bot or --engine is required")
+
+    ai = ExternalAI(args.engine)
+    try:
+        wins = 0
+        for seat in (0, 1):
+            for _, scores in simulate(ai, range(args.games), seat=seat, opponent=args.opponent):
+                wins += scores[seat] > scores[1 - seat]
+        print(f"{ai.name} won {wins}/{2 * args.games} games against {args.opponent}")
+    finally:
+        ai.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,127 @@
+import json
 import random
+import zlib
 from backend.player import Player
 from backend.ai import AI
 from backend.items import Item
 
+# Built-in difficulty for an "External" seat restored without a bot to bind it to.
+EXTERNAL_FALLBACK = "Hard"
+
 class GameEngine:
-    def __init__(self, bag_capacity=25):
+    def __init__(self, bag_capacity=25, seed=None, item_count=25):
+        self.rng = random.Random(seed)
+        self.item_count = item_count
         self.players = []
-        self.available_items = []
+        self.items = []
+        self.live_item_count = 0
         self.bag_capacity = bag_capacity
         self.current_player_index = 0
         self.game_over = False
         self.ai_players = {}
+        # ExternalAI that "External" seats in restored snapshots are bound to.
+        self.external_ai = None
+        self.move_listeners = []
+    
+    def add_move_listener(self, listener):
+        """Register a callable that receives every accepted move as a dict.
+
+        Moves look like {"op": "pick", "player": 0, "item": <handle>, "amount": 2},
+        {"op": "skip", "player": 1} or {"op": "init"} when a game is dealt or
+        restored from a snapshot.
+        """
+        self.move_listeners.append(listener)
+    
+    def remove_move_listener(self, listener):
+        if listener in self.move_listeners:
+            self.move_listeners.remove(listener)
+    
+    def _notify(self, move):
+        for listener in self.move_listeners:
+            listener(move)
     
-    def initialize_game(self, player_names, is_multiplayer=False, ai_difficulty="Medium"):
-        """Initialize the game with players"""
+    def initialize_game(self, player_names, is_multiplayer=False, ai_difficulty="Medium", ai_seats=None, seed=None):
+        """Initialize the game with players.
+
+        `ai_seats` maps seat index to a difficulty or an AI object (such as an
+        ExternalAI) and overrides the default single-player setup, e.g.
+        {0: "Hard", 1: "Medium"} for AI vs AI.
+        Passing `seed` makes the deal and the Easy AI's choices reproducible.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
         self.players = [Player(name, self.bag_capacity) for name in player_names]
-        self.available_items = self._generate_items()
+        self._set_items(self._generate_items())
         self.current_player_index = 0
         self.game_over = False
         self.ai_players = {}
         
-        if not is_multiplayer and len(player_names) == 2:
+        if ai_seats is not None:
+            self.ai_players = {
+                seat: AI(ai) if isinstance(ai, str) else ai
+                for seat, ai in ai_seats.items()
+            }
+        elif not is_multiplayer and len(player_names) == 2:
             self.ai_players[1] = AI(ai_difficulty)
+        
+        self._notify({"op": "init"})
     
     def _generate_items(self):
-        """Generate random items for the game by selecting 25 random items from the available 50"""
+        """Generate `item_count` random items from the 50 available images.
+
+        Up to 50 items are distinct images; larger sets repeat images at random.
+        """
         all_item_numbers = list(range(1, 51))
-        selected_numbers = random.sample(all_item_numbers, 25)
+        selected_numbers = self.rng.sample(all_item_numbers, min(self.item_count, 50))
+        selected_numbers += [self.rng.randint(1, 50) for _ in range(self.item_count - 50)]
         
         items = []
         for i in selected_numbers:
             name = f"Item {i}"
-            weight = random.randint(1, 10)
-            value = random.randint(5, 25)
+            weight = self.rng.randint(1, 10)
+            value = self.rng.randint(5, 25)
             image_filename = f"i{i}.png"
             items.append(Item(name, weight, value, image_filename))
         
         items.sort(key=lambda x: int(''.join(filter(str.isdigit, x.image_filename))))
         return items
     
+    def _set_items(self, items):
+        """Store items in the slab; an item's handle is its slot and never changes.
+
+        Depleted items stay in place as tombstones (weight 0), so handles held
+        by the GUI, journals or peers stay valid for the whole game.
+        """
+        self.items = items
+        for handle, item in enumerate(items):
+            item.handle = handle
+        self.live_item_count = sum(1 for item in items if not item.is_depleted())
+    
+    def live_items(self):
+        """Iterate over items that can still be picked"""
+        return (item for item in self.items if not item.is_depleted())
+    
+    def get_item(self, handle):
+        """Live item for `handle`, or None for unknown handles and tombstones"""
+        if not isinstance(handle, int) or handle < 0 or handle >= len(self.items):
+            return None
+        item = self.items[handle]
+        return None if item.is_depleted() else item
+    
     def get_current_player(self):
         return self.players[self.current_player_index]
     
     def is_ai_turn(self):
         return self.current_player_index in self.ai_players
     
-    def human_pick_fraction(self, item_index, fraction: float):
-        """Human player picks a fraction of an item."""
+    def human_pick_fraction(self, handle, fraction: float):
+        """Human player picks a fraction of the item with the given handle."""
         if self.game_over or self.is_ai_turn():
             return False, "Not human player's turn"
 
-        if item_index < 0 or item_index >= len(self.available_items):
-            return False, "Invalid item index"
-
-        item = self.available_items[item_index]
-        if item.is_depleted():
-            return False, "Item is already depleted"
+        item = self.get_item(handle)
+        if item is None:
+            return False, "Item is already depleted or does not exist"
 
         current_player = self.get_current_player()
         max_fraction = current_player.get_available_fraction(item)
@@ -66,50 +132,87 @@ class GameEngine:
         if fraction <= 0:
             return False, "Invalid fraction"
 
+        return self._pick(item, fraction)
+    
+    def _pick(self, item, fraction):
+        """Move a fraction of an item into the current player's bag and end the turn."""
+        player_index = self.current_player_index
+        current_player = self.players[player_index]
         success, message = current_player.add_item_fraction(item, fraction)
-        if success:
-            self.available_items = [it for it in self.available_items if not it.is_depleted()]
-            self._next_turn()
-            return True, message
-        else:
+        if not success:
             return False, message
+        
+        amount = current_player.bag[-1]["weight"]
+        if item.is_depleted():
+            self.live_item_count -= 1
+        self._next_turn()
+        self._notify({"op": "pick", "player": player_index, "item": item.handle, "amount": amount})
+        return True, message
     
     def skip_turn(self):
         """Skip current player's turn"""
+        player_index = self.current_player_index
         self._next_turn()
+        self._notify({"op": "skip", "player": player_index})
     
-    def get_max_available_fraction(self, item_index):
-        """Get maximum fraction that can be picked for an item"""
-        if item_index < 0 or item_index >= len(self.available_items):
-            return 0.0
+    def apply_move(self, move):
+        """Re-apply a recorded move dict (as produced for move listeners)"""
+        op = move.get("op")
+        if move.get("player") != self.current_player_index:
+            return False, "Move is out of turn"
         
-        item = self.available_items[item_index]
-        if item.is_depleted():
+        if op == "skip":
+            self.skip_turn()
+            return True, "Skipped"
+        if op != "pick":
+            return False, f"Unknown move: {op}"
+        
+        item = self.get_item(move["item"])
+        if item is None:
+            return False, "Invalid item handle"
+        
+        amount = int(move["amount"])
+        if amount <= 0 or amount > item.weight:
+            return False, "Invalid amount"
+        return self._pick(item, amount / item.weight)
+    
+    def get_max_available_fraction(self, handle):
+        """Get maximum fraction that can be picked for an item"""
+        item = self.get_item(handle)
+        if item is None:
             return 0.0
         
         current_player = self.get_current_player()
         return current_player.get_available_fraction(item)
     
-    def ai_make_move(self):
-        """AI player makes a move based on difficulty"""
+    def ai_make_move(self, move=None):
+        """AI player makes a move based on difficulty.
+
+        `move` is an (item, fraction) pair already chosen for this seat, used
+        when an external AI answered for a batch of positions at once.
+        """
         if not self.is_ai_turn():
             return None, None
         
         current_player = self.get_current_player()
         
         if current_player.current_weight >= current_player.bag_limit:
-            self._next_turn()
+            self.skip_turn()
             return None, None
         
         ai = self.ai_players[self.current_player_index]
         difficulty = ai.difficulty
         
-        valid_items = [item for item in self.available_items if not item.is_depleted()]
+        valid_items = list(self.live_items())
         if not valid_items:
-            self._next_turn()
+            self.skip_turn()
             return None, None
         
-        if difficulty == "Easy":
+        if move is not None:
+            item, fraction = move
+        elif difficulty == "External":
+            item, fraction = ai.pick_move(self)
+        elif difficulty == "Easy":
             item, fraction = self._ai_random_pick(valid_items, current_player)
         elif difficulty == "Medium":
             item, fraction = self._ai_01_knapsack(valid_items, current_player)
@@ -117,13 +220,11 @@ class GameEngine:
             item, fraction = self._ai_fractional_knapsack(valid_items, current_player)
         
         if item and fraction > 0:
-            success, _ = current_player.add_item_fraction(item, fraction)
+            success, _ = self._pick(item, fraction)
             if success:
-                self.available_items = [it for it in self.available_items if not it.is_depleted()]
-                self._next_turn()
                 return item, fraction
         
-        self._next_turn()
+        self.skip_turn()
         return None, None
     
     def _ai_random_pick(self, valid_items, player):
@@ -132,9 +233,9 @@ class GameEngine:
         if not pickable_items:
             return None, 0
 
-        item = random.choice(pickable_items)
+        item = self.rng.choice(pickable_items)
         max_frac = player.get_available_fraction(item)
-        fraction = random.uniform(0.1, max_frac)
+        fraction = self.rng.uniform(0.1, max_frac)
         return item, fraction
     
     def _ai_01_knapsack(self, valid_items, player):
@@ -172,7 +273,7 @@ class GameEngine:
     def _check_game_over(self):
         """Check if game should end"""
         all_bags_full = all(player.current_weight >= player.bag_limit for player in self.players)
-        no_items_left = len(self.available_items) == 0
+        no_items_left = self.live_item_count == 0
         self.game_over = all_bags_full or no_items_left
     
     def get_winner(self):
@@ -194,6 +295,7 @@ class GameEngine:
             "players": [player.get_bag_status() for player in self.players],
             "available_items": [
                 {
+                    "handle": item.handle,
                     "name": item.name,
                     "weight": item.weight,
                     "value": item.value,
@@ -201,13 +303,45 @@ class GameEngine:
                     "original_weight": item.original_weight,
                     "image_filename": item.image_filename
                 }
-                for item in self.available_items
+                for item in self.live_items()
             ],
             "current_player": self.current_player_index,
             "game_over": self.game_over,
             "winner": self.get_winner().name if self.get_winner() else None
         }
     
+    def snapshot(self):
+        """Full serializable copy of the engine state"""
+        return {
+            "bag_capacity": self.bag_capacity,
+            "players": [player.to_dict() for player in self.players],
+            "items": [item.to_dict() for item in self.items],
+            "current_player": self.current_player_index,
+            "game_over": self.game_over,
+            "ai_players": {str(index): ai.difficulty for index, ai in self.ai_players.items()},
+        }
+    
+    def restore(self, snapshot):
+        """Replace the engine state with one produced by snapshot()"""
+        self.bag_capacity = snapshot["bag_capacity"]
+        self.players = [Player.from_dict(data) for data in snapshot["players"]]
+        self._set_items([Item.from_dict(data) for data in snapshot["items"]])
+        self.current_player_index = snapshot["current_player"]
+        self.game_over = snapshot["game_over"]
+        self.ai_players = {int(index): self._restored_ai(difficulty) for index, difficulty in snapshot["ai_players"].items()}
+        self._notify({"op": "init"})
+    
+    def _restored_ai(self, difficulty):
+        if difficulty != "External":
+            return AI(difficulty)
+        return self.external_ai or AI(EXTERNAL_FALLBACK)
+    
+    def state_hash(self):
+        """CRC32 of the gameplay state, identical on every peer that applied the same moves"""
+        state = self.snapshot()
+        del state["ai_players"]
+        return zlib.crc32(json.dumps(state, sort_keys=True).encode("utf-8"))
+    
     def set_ai_difficulty(self, difficulty):
         """Change AI difficulty during game"""
         for ai in self.ai_players.values():
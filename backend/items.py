@@ -8,6 +8,7 @@ class Item:
         self.original_value = float(value)
         self.unit_value = self.value / self.original_weight if self.original_weight > 0 else 0.0
         self.ratio = self.unit_value
+        self.handle = None
 
     def __repr__(self):
         return f"Item({self.name}, w:{self.weight}, v:{self.value:.1f}, ratio:{self.ratio:.2f})"
@@ -15,6 +16,24 @@ class Item:
     def __str__(self):
         return f"{self.name} (W:{self.weight}, V:{self.value:.1f})"
 
+    def to_dict(self):
+        """Serializable form used by engine snapshots."""
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "value": self.value,
+            "image_filename": self.image_filename,
+            "original_weight": self.original_weight,
+            "original_value": self.original_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        item = cls(data["name"], data["original_weight"], data["original_value"], data["image_filename"])
+        item.weight = int(data["weight"])
+        item.value = float(data["value"])
+        return item
+
     def take_fraction(self, fraction: float):
         """Take a fraction (0 < fraction <= 1) of this item.
         Subtracts integer weight and proportional value.
@@ -0,0 +1,295 @@
+"""Deterministic lockstep play between two GameEngines over TCP.
+
+Peers only exchange moves. Each MOVE carries a shared sequence number and
+the CRC32 of the sender's state after applying it; the receiver applies the
+move and compares hashes to detect desyncs. The host (seat 0) is authoritative:
+on (re)connect or desync it sends a full SNAPSHOT that the client restores.
+
+    MOVE      !BIhhI   type, seq, item (-1 = skip), amount, state hash (13 bytes)
+    HELLO     !BIB     type, last seq, seat
+    SNAPSHOT  !BII     type, seq, length, followed by the engine snapshot JSON
+    RESYNC    !BI      type, seq
+
+Two local processes can play a headless game against each other with
+
+    python -m backend.netplay --host 5000 --ai Hard
+    python -m backend.netplay --join 127.0.0.1:5000 --ai Easy
+"""
+import argparse
+import json
+import select
+import socket
+import struct
+import time
+
+from backend.ai import AI
+from backend.game_engine import GameEngine
+from backend.profiling import PROFILE_WINDOW, ProfileCapture
+
+MOVE, HELLO, SNAPSHOT, RESYNC = 1, 2, 3, 4
+
+MOVE_FORMAT = struct.Struct("!BIhhI")
+HELLO_FORMAT = struct.Struct("!BIB")
+SNAPSHOT_FORMAT = struct.Struct("!BII")
+RESYNC_FORMAT = struct.Struct("!BI")
+
+RECONNECT_INTERVAL = 1.0
+
+
+class LockstepSession:
+    """One side of a lockstep game.
+
+    The engine's own move listener sends every move made by `seat`; moves
+    from the peer are applied with engine.apply_move. Call poll() regularly
+    (e.g. once per frame) to receive moves and handle reconnects.
+    """
+
+    def __init__(self, engine, seat, address, is_host, on_snapshot=None):
+        self.engine = engine
+        self.seat = seat
+        self.address = address
+        self.is_host = is_host
+        self.on_snapshot = on_snapshot
+        self.local_ai_players = dict(engine.ai_players)
+
+        self.seq = 0
+        self.sock = None
+        self.listener = None
+        self.buffer = b""
+        self.desyncs = 0
+        self.last_connect_attempt = 0.0
+        self.applying_remote = False
+
+        if is_host:
+            self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.listener.bind(address)
+            self.listener.listen(1)
+
+        engine.add_move_listener(self.on_move)
+
+    @classmethod
+    def host(cls, engine, port, interface="0.0.0.0", **kwargs):
+        return cls(engine, 0, (interface, port), True, **kwargs)
+
+    @classmethod
+    def join(cls, engine, host, port, **kwargs):
+        return cls(engine, 1, (host, port), False, **kwargs)
+
+    @property
+    def connected(self):
+        return self.sock is not None
+
+    def is_local_turn(self):
+        return self.connected and self.engine.current_player_index == self.seat
+
+    def on_move(self, move):
+        if move["op"] == "init":
+            if self.is_host and not self.applying_remote:
+                self.seq = 0
+                self.send_snapshot()
+            return
+
+        self.seq += 1
+        if move["player"] != self.seat or self.applying_remote:
+            return
+
+        item = move.get("item", -1) if move["op"] == "pick" else -1
+        amount = move.get("amount", 0)
+        self._send(MOVE_FORMAT.pack(MOVE, self.seq, item, amount, self.engine.state_hash()))
+
+    def send_snapshot(self):
+        if not self.engine.players:
+            return
+        payload = json.dumps(self.engine.snapshot(), separators=(",", ":")).encode("utf-8")
+        self._send(SNAPSHOT_FORMAT.pack(SNAPSHOT, self.seq, len(payload)) + payload)
+
+    def poll(self):
+        """Accept/reconnect as needed and process every complete incoming message"""
+        if self.sock is None:
+            self._connect()
+            if self.sock is None:
+                return
+
+        while self.sock is not None:
+            try:
+                readable, _, _ = select.select([self.sock], [], [], 0)
+                if not readable:
+                    break
+                data = self.sock.recv(65536)
+            except OSError:
+                data = b""
+            if not data:
+                self._disconnect()
+                return
+            self.buffer += data
+            self._process_buffer()
+
+    def _connect(self):
+        now = time.monotonic()
+        if self.is_host:
+            readable, _, _ = select.select([self.listener], [], [], 0)
+            if not readable:
+                return
+            sock, _ = self.listener.accept()
+        else:
+            if now - self.last_connect_attempt < RECONNECT_INTERVAL:
+                return
+            self.last_connect_attempt = now
+            try:
+                sock = socket.create_connection(self.address, timeout=2)
+            except OSError:
+                return
+
+        sock.settimeout(5)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.buffer = b""
+        self._send(HELLO_FORMAT.pack(HELLO, self.seq, self.seat))
+
+    def _disconnect(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.buffer = b""
+
+    def _send(self, data):
+        if self.sock is None:
+            return
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self._disconnect()
+
+    def _process_buffer(self):
+        while self.buffer and self.sock is not None:
+            kind = self.buffer[0]
+            if kind == MOVE:
+                if len(self.buffer) < MOVE_FORMAT.size:
+                    return
+                _, seq, item, amount, state_hash = MOVE_FORMAT.unpack_from(self.buffer)
+                self.buffer = self.buffer[MOVE_FORMAT.size:]
+                self._receive_move(seq, item, amount, state_hash)
+            elif kind == HELLO:
+                if len(self.buffer) < HELLO_FORMAT.size:
+                    return
+                self.buffer = self.buffer[HELLO_FORMAT.size:]
+                if self.is_host:
+                    self.send_snapshot()
+            elif kind == SNAPSHOT:
+                if len(self.buffer) < SNAPSHOT_FORMAT.size:
+                    return
+                _, seq, length = SNAPSHOT_FORMAT.unpack_from(self.buffer)
+                end = SNAPSHOT_FORMAT.size + length
+                if len(self.buffer) < end:
+                    return
+                payload = self.buffer[SNAPSHOT_FORMAT.size:end]
+                self.buffer = self.buffer[end:]
+                self._receive_snapshot(seq, json.loads(payload.decode("utf-8")))
+            elif kind == RESYNC:
+                if len(self.buffer) < RESYNC_FORMAT.size:
+                    return
+                self.buffer = self.buffer[RESYNC_FORMAT.size:]
+                if self.is_host:
+                    self.send_snapshot()
+            else:
+                print(f"Netplay: unknown message type {kind}, reconnecting")
+                self._disconnect()
+
+    def _receive_move(self, seq, item, amount, state_hash):
+        if seq != self.seq + 1:
+            self._request_resync(f"expected move {self.seq + 1}, got {seq}")
+            return
+
+        move = {"op": "skip", "player": 1 - self.seat}
+        if item >= 0:
+            move = {"op": "pick", "player": 1 - self.seat, "item": item, "amount": amount}
+
+        self.applying_remote = True
+        try:
+            success, message = self.engine.apply_move(move)
+        finally:
+            self.applying_remote = False
+
+        if not success:
+            self._request_resync(f"peer move rejected: {message}")
+        elif self.engine.state_hash() != state_hash:
+            self._request_resync(f"state hash mismatch after move {seq}")
+
+    def _request_resync(self, reason):
+        self.desyncs += 1
+        print(f"Netplay desync: {reason}")
+        if self.is_host:
+            self.send_snapshot()
+        else:
+            self._send(RESYNC_FORMAT.pack(RESYNC, self.seq))
+
+    def _receive_snapshot(self, seq, snapshot):
+        if self.is_host:
+            return
+        self.applying_remote = True
+        try:
+            self.engine.restore(snapshot)
+        finally:
+            self.applying_remote = False
+        self.engine.ai_players = dict(self.local_ai_players)
+        self.seq = seq
+        if self.on_snapshot:
+            self.on_snapshot()
+
+    def close(self):
+        self.engine.remove_move_listener(self.on_move)
+        self._disconnect()
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless lockstep Greedy Bag Race")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument("--host", type=int, metavar="PORT")
+    group.add_argument("--join", metavar="HOST:PORT")
+    parser.add_argument("--ai", default="Hard", help="difficulty playing the local seat")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--profile-window", type=int, default=PROFILE_WINDOW, metavar="MOVES",
+                        help="moves captured per profiling session (started and stopped with SIGUSR1)")
+    args = parser.parse_args()
+
+    engine = GameEngine()
+    capture = ProfileCapture("netplay", window=args.profile_window)
+    capture.install_signal()
+    engine.add_move_listener(lambda move: capture.step())
+    seat = 0 if args.host is not None else 1
+    engine.ai_players = {seat: AI(args.ai)}
+
+    if args.host is not None:
+        session = LockstepSession.host(engine, args.host)
+        while not session.connected:
+            session.poll()
+            time.sleep(0.01)
+        engine.initialize_game(["Player 1", "Player 2"], ai_seats={seat: args.ai}, seed=args.seed)
+    else:
+        host, port = args.join.rsplit(":", 1)
+        session = LockstepSession.join(engine, host, int(port))
+
+    while not engine.players or not engine.game_over:
+        session.poll()
+        if engine.players and session.is_local_turn() and not engine.game_over:
+            engine.ai_make_move()
+        time.sleep(0.001)
+
+    # Let the last move reach the peer before hanging up.
+    session.poll()
+    time.sleep(0.2)
+    print(f"Seat {seat}: scores {[round(p.total_value, 2) for p in engine.players]}, "
+          f"state hash {engine.state_hash():08x}, {session.desyncs} desyncs")
+    session.close()
+    capture.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -64,5 +64,23 @@ class Player:
             "space_left": self.bag_limit - self.current_weight
         }
 
+    def to_dict(self):
+        """Serializable form used by engine snapshots."""
+        return {
+            "name": self.name,
+            "bag_limit": self.bag_limit,
+            "bag": [dict(it) for it in self.bag],
+            "current_weight": self.current_weight,
+            "total_value": self.total_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        player = cls(data["name"], data["bag_limit"])
+        player.bag = [dict(it) for it in data["bag"]]
+        player.current_weight = float(data["current_weight"])
+        player.total_value = float(data["total_value"])
+        return player
+
     def __str__(self):
         return f"{self.name}: {len(self.bag)} items, {self.current_weight:.1f}/{self.bag_limit} weight, {self.total_value:.1f} value"
\ No newline at end of file
@@ -0,0 +1,108 @@
+import cProfile
+import os
+import pstats
+import signal
+import time
+import tracemalloc
+
+PROFILE_DIR = "profiles"
+PROFILE_WINDOW = 600
+TOP_STATS = 40
+
+
+class ProfileCapture:
+    """On-demand cProfile and tracemalloc session over a window of steps.
+
+    The host loop calls step() once per frame (or per move in headless
+    tools). A session starts on toggle(), on request() (safe to call from a
+    signal handler; see install_signal) or on the next step after either,
+    and ends after `window` steps or on the next toggle. It writes a
+    timestamped directory holding the deterministic profile
+    (profile.pstats, readable with pstats or snakeviz), the top functions by
+    cumulative time (profile.txt) and the allocation growth between
+    tracemalloc snapshots taken at the start and end (allocations.txt).
+    Only the thread that calls step() is profiled.
+    """
+
+    def __init__(self, label="session", window=PROFILE_WINDOW, directory=PROFILE_DIR):
+        self.label = label
+        self.window = window
+        self.directory = directory
+        self.profile = None
+        self.start_snapshot = None
+        self.started_tracing = False
+        self.steps = 0
+        self.requested = False
+
+    @property
+    def active(self):
+        return self.profile is not None
+
+    def request(self, *_):
+        """Ask for a start or stop at the next step(); usable as a signal handler"""
+        self.requested = True
+
+    def install_signal(self, signum=getattr(signal, "SIGUSR1", None)):
+        """Toggle sessions when the process receives `signum` (SIGUSR1 by default, where available)"""
+        if signum is not None:
+            signal.signal(signum, self.request)
+
+    def step(self):
+        """Count one frame or move; returns the output directory when a session just ended"""
+        if self.requested:
+            self.requested = False
+            return self.toggle()
+        if self.profile is None:
+            return None
+        self.steps += 1
+        if self.steps >= self.window:
+            return self.stop()
+        return None
+
+    def toggle(self):
+        if self.profile is None:
+            self.start()
+            return None
+        return self.stop()
+
+    def start(self):
+        if self.profile is not None:
+            return
+        self.started_tracing = not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self.start_snapshot = tracemalloc.take_snapshot()
+        self.steps = 0
+        print(f"Profiling {self.label} for {self.window} steps")
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def stop(self):
+        """End the session and write its files; returns the output directory"""
+        if self.profile is None:
+            return None
+        self.profile.disable()
+        profile, self.profile = self.profile, None
+        end_snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if self.started_tracing:
+            tracemalloc.stop()
+
+        path = os.path.join(self.directory, f"{self.label}-{time.strftime('%Y%m%d-%H%M%S')}")
+        os.makedirs(path, exist_ok=True)
+        profile.dump_stats(os.path.join(path, "profile.pstats"))
+        with open(os.path.join(path, "profile.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{self.steps} steps\n\n")
+            pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(TOP_STATS)
+
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        growth = end_snapshot.filter_traces(filters).compare_to(
+            self.start_snapshot.filter_traces(filters), "lineno")
+        with open(os.path.join(path, "allocations.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{self.steps} steps, peak traced {peak / 1024:.1f} KiB\n\n")
+            for stat in growth[:TOP_STATS]:
+                f.write(f"{stat}\n")
+        self.start_snapshot = None
+        print(f"Wrote profile of {self.steps} steps to {path}")
+        return path
@@ -0,0 +1,362 @@
+"""Search seeded deals for puzzles and daily challenges with target properties.
+
+Candidates are seeds for GameEngine's dealer, so a puzzle is reproduced in the
+game with `initialize_game(..., seed=puzzle["seed"])`. Every criterion first
+gets a cheap bound computed from the item list alone; only candidates that
+survive all bounds are played out or solved exactly.
+
+    python -m backend.puzzles --greedy-gap 0.08 --count 30 --out pack.json
+"""
+import argparse
+import datetime
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from backend.game_engine import GameEngine
+
+# Bounds are summed in a different order than the game's own scores.
+BOUND_SLACK = 1e-9
+
+
+def deal_items(seed, bag_capacity=25):
+    """Items GameEngine deals for `seed`, without setting up players"""
+    engine = GameEngine(bag_capacity=bag_capacity, seed=seed)
+    return engine._generate_items()
+
+
+def play_out(seed, difficulties, bag_capacity=25):
+    """Play an AI-vs-AI game on the deal for `seed` and return both scores"""
+    engine = GameEngine(bag_capacity=bag_capacity)
+    engine.initialize_game(["Seat 1", "Seat 2"], ai_seats=dict(enumerate(difficulties)), seed=seed)
+    while not engine.game_over:
+        engine.ai_make_move()
+    return engine.players[0].total_value, engine.players[1].total_value
+
+
+def greedy_whole_items(items, capacity):
+    """Value of taking whole items in value/weight ratio order while they fit"""
+    total_value = 0.0
+    space = capacity
+    for item in sorted(items, key=lambda x: x.ratio, reverse=True):
+        if item.weight <= space:
+            space -= item.weight
+            total_value += item.value
+    return total_value
+
+
+def fractional_bound(items, capacity):
+    """Fractional-knapsack optimum, an upper bound on any 0/1 packing"""
+    total_value = 0.0
+    space = capacity
+    for item in sorted(items, key=lambda x: x.ratio, reverse=True):
+        if space <= 0:
+            break
+        taken = min(space, item.weight)
+        total_value += taken * item.unit_value
+        space -= taken
+    return total_value
+
+
+def cheapest_fill(items, capacity):
+    """Value of the `capacity` lowest-value weight units, a lower bound on anything filling `capacity`"""
+    total_value = 0.0
+    space = capacity
+    for item in sorted(items, key=lambda x: x.ratio):
+        if space <= 0:
+            break
+        taken = min(space, item.weight)
+        total_value += taken * item.unit_value
+        space -= taken
+    return total_value
+
+
+def shared_greedy_prefix(items, bag_capacity):
+    """Opening both seats play identically when each takes the best-ratio item whole while it fits.
+
+    Medium and Hard both make exactly these moves, so their games cannot
+    differ before the first position where the best remaining item does not
+    fit the mover whole. Returns (scores, spaces left, remaining items) at
+    that position; `remaining` is empty if the game ended within the prefix.
+    """
+    remaining = sorted(items, key=lambda x: x.ratio, reverse=True)
+    scores = [0.0, 0.0]
+    spaces = [bag_capacity, bag_capacity]
+    mover = 0
+    while remaining and any(space > 0 for space in spaces):
+        if spaces[mover] > 0:
+            if remaining[0].weight > spaces[mover]:
+                break
+            item = remaining.pop(0)
+            scores[mover] += item.value
+            spaces[mover] -= item.weight
+        mover = 1 - mover
+    else:
+        remaining = []
+    return scores, spaces, remaining
+
+
+def score_ranges(items, bag_capacity):
+    """[(low, high)] per seat for any game between whole-item-first greedy AIs (Medium or Hard).
+
+    After the shared prefix a seat gains at most the fractional optimum of
+    what is left in its space, and at least the cheapest units of the weight
+    it must still get: both AIs keep picking until their bag is full or the
+    items run out, so a seat ends up with all of its space or everything the
+    other seat leaves.
+    """
+    scores, spaces, remaining = shared_greedy_prefix(items, bag_capacity)
+    left = sum(item.weight for item in remaining)
+    ranges = []
+    for seat in (0, 1):
+        least = max(0, min(spaces[seat], left - spaces[1 - seat]))
+        ranges.append((scores[seat] + cheapest_fill(remaining, least),
+                       scores[seat] + fractional_bound(remaining, spaces[seat])))
+    return ranges
+
+
+def share_advantage(mine, theirs):
+    return (mine - theirs) / max(mine + theirs, 1e-9)
+
+
+def knapsack_optimum(items, capacity):
+    """Exact 0/1 knapsack optimum by dynamic programming over integer weights"""
+    best = [0.0] * (int(capacity) + 1)
+    for item in items:
+        for space in range(int(capacity), item.weight - 1, -1):
+            candidate = best[space - item.weight] + item.value
+            if candidate > best[space]:
+                best[space] = candidate
+    return best[int(capacity)]
+
+
+class GreedyGap:
+    """Ratio-greedy restricted to whole items loses to the 0/1 optimum by >= min_gap.
+
+    The bound uses the fractional optimum: gap <= 1 - greedy / fractional.
+    """
+    name = "greedy_gap"
+
+    def __init__(self, min_gap):
+        self.min_gap = min_gap
+
+    def bound(self, seed, items, bag_capacity):
+        greedy = greedy_whole_items(items, bag_capacity)
+        upper = fractional_bound(items, bag_capacity)
+        return upper > 0 and 1 - greedy / upper >= self.min_gap
+
+    def measure(self, seed, items, bag_capacity):
+        optimum = knapsack_optimum(items, bag_capacity)
+        if optimum <= 0:
+            return None
+        gap = 1 - greedy_whole_items(items, bag_capacity) / optimum
+        return gap if gap >= self.min_gap else None
+
+
+class MediumBeatsHard:
+    """Medium outscores Hard by >= min_margin of the pooled score from `seat`.
+
+    The bound pairs Medium's best possible score with Hard's worst from
+    score_ranges(), which share the opening the two AIs play identically.
+    Medium moving first wins most deals, so the default seat is the second.
+    """
+    name = "medium_beats_hard"
+
+    def __init__(self, min_margin=0.0, seat=1):
+        self.min_margin = min_margin
+        self.seat = seat
+
+    def bound(self, seed, items, bag_capacity):
+        ranges = score_ranges(items, bag_capacity)
+        medium = ranges[self.seat][1]
+        hard = ranges[1 - self.seat][0]
+        return medium > hard and share_advantage(medium, hard) >= self.min_margin - BOUND_SLACK
+
+    def measure(self, seed, items, bag_capacity):
+        seats = ("Hard", "Medium") if self.seat == 1 else ("Medium", "Hard")
+        scores = play_out(seed, seats, bag_capacity)
+        medium = scores[self.seat]
+        hard = scores[1 - self.seat]
+        margin = share_advantage(medium, hard)
+        return margin if medium > hard and margin >= self.min_margin else None
+
+
+class FirstMoverBand:
+    """First mover's share advantage in a mirror match falls inside [low, high]
+
+    For Medium and Hard the advantage is bracketed by score_ranges(); Easy
+    picks at random, so its mirror matches are always played out.
+    """
+    name = "first_mover_advantage"
+
+    def __init__(self, low, high, difficulty="Hard"):
+        self.low = low
+        self.high = high
+        self.difficulty = difficulty
+
+    def bound(self, seed, items, bag_capacity):
+        if self.difficulty not in ("Medium", "Hard"):
+            return True
+        (first_low, first_high), (second_low, second_high) = score_ranges(items, bag_capacity)
+        return (share_advantage(first_high, second_low) >= self.low - BOUND_SLACK
+                and share_advantage(first_low, second_high) <= self.high + BOUND_SLACK)
+
+    def measure(self, seed, items, bag_capacity):
+        first, second = play_out(seed, (self.difficulty, self.difficulty), bag_capacity)
+        advantage = share_advantage(first, second)
+        return advantage if self.low <= advantage <= self.high else None
+
+
+def evaluate_seeds(seeds, criteria, bag_capacity):
+    """Worker: return (puzzles, candidates pruned by bounds) for a seed chunk"""
+    found = []
+    pruned = 0
+    for seed in seeds:
+        items = deal_items(seed, bag_capacity)
+        if not all(criterion.bound(seed, items, bag_capacity) for criterion in criteria):
+            pruned += 1
+            continue
+
+        metrics = {}
+        for criterion in criteria:
+            value = criterion.measure(seed, items, bag_capacity)
+            if value is None:
+                break
+            metrics[criterion.name] = round(value, 4)
+        else:
+            found.append({
+                "seed": seed,
+                "metrics": metrics,
+                "items": [item.to_dict() for item in items],
+            })
+    return found, pruned
+
+
+def generate(criteria, count, start_seed=0, max_seeds=1_000_000, bag_capacity=25,
+             workers=None, chunk_size=500):
+    """The first `count` matching seeds from `start_seed`, searched in chunks across a process pool.
+
+    Chunks finish out of order, so once `count` puzzles are in hand the
+    search keeps waiting on every chunk below the highest seed it would
+    keep; only chunks above it are dropped. The result does not depend on
+    timing or the number of workers.
+    """
+    puzzles = []
+    stats = {"searched": 0, "pruned": 0}
+    next_seed = start_seed
+    end_seed = start_seed + max_seeds
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}
+
+        def submit():
+            nonlocal next_seed
+            if next_seed >= end_seed:
+                return
+            seeds = range(next_seed, min(next_seed + chunk_size, end_seed))
+            next_seed = seeds.stop
+            running[pool.submit(evaluate_seeds, seeds, criteria, bag_capacity)] = seeds
+
+        for _ in range(workers * 2):
+            submit()
+
+        while running:
+            pending = running
+            if len(puzzles) >= count:
+                puzzles.sort(key=lambda p: p["seed"])
+                last_kept = puzzles[count - 1]["seed"]
+                pending = [future for future, seeds in running.items() if seeds.start < last_kept]
+                if not pending:
+                    break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                seeds = running.pop(future)
+                found, pruned = future.result()
+                puzzles.extend(found)
+                stats["searched"] += len(seeds)
+                stats["pruned"] += pruned
+                if len(puzzles) < count:
+                    submit()
+
+        for future in running:
+            future.cancel()
+
+    puzzles.sort(key=lambda p: p["seed"])
+    return puzzles[:count], stats
+
+
+def build_pack(puzzles, criteria, bag_capacity=25, start_date=None):
+    """Assemble puzzles into a pack indexed by metric rank and by day"""
+    start_date = start_date or datetime.date.today()
+    for number, puzzle in enumerate(puzzles):
+        puzzle["id"] = number
+
+    by_metric = {}
+    for criterion in criteria:
+        ranked = sorted(puzzles, key=lambda p: p["metrics"][criterion.name], reverse=True)
+        by_metric[criterion.name] = [p["id"] for p in ranked]
+
+    daily = {
+        (start_date + datetime.timedelta(days=p["id"])).isoformat(): p["id"]
+        for p in puzzles
+    }
+
+    return {
+        "version": 1,
+        "bag_capacity": bag_capacity,
+        "criteria": [criterion.__doc__.splitlines()[0] for criterion in criteria],
+        "index": {"by_metric": by_metric, "daily": daily},
+        "puzzles": puzzles,
+    }
+
+
+def load_pack(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def puzzle_for_day(pack, date=None):
+    """Puzzle scheduled for `date` (default today), or None"""
+    date = date or datetime.date.today()
+    puzzle_id = pack["index"]["daily"].get(date.isoformat())
+    return None if puzzle_id is None else pack["puzzles"][puzzle_id]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a Greedy Bag Race puzzle pack")
+    parser.add_argument("--greedy-gap", type=float, help="minimum whole-item greedy gap to the 0/1 optimum")
+    parser.add_argument("--medium-beats-hard", type=float, metavar="MARGIN",
+                        help="Medium moving second must beat Hard by this share")
+    parser.add_argument("--first-mover", type=float, nargs=2, metavar=("LOW", "HIGH"),
+                        help="band for the first mover's share advantage in Hard vs Hard")
+    parser.add_argument("--count", type=int, default=30)
+    parser.add_argument("--start-seed", type=int, default=0)
+    parser.add_argument("--max-seeds", type=int, default=1_000_000)
+    parser.add_argument("--capacity", type=int, default=25)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--out", default="puzzles.json")
+    args = parser.parse_args()
+
+    criteria = []
+    if args.greedy_gap is not None:
+        criteria.append(GreedyGap(args.greedy_gap))
+    if args.medium_beats_hard is not None:
+        criteria.append(MediumBeatsHard(args.medium_beats_hard))
+    if args.first_mover is not None:
+        criteria.append(FirstMoverBand(*args.first_mover))
+    if not criteria:
+        parser.error("at least one criterion is required")
+
+    puzzles, stats = generate(criteria, args.count, args.start_seed, args.max_seeds,
+                              args.capacity, args.workers)
+    pack = build_pack(puzzles, criteria, args.capacity)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(pack, f, indent=1)
+
+    print(f"Searched {stats['searched']} seeds ({stats['pruned']} pruned by bounds), "
+          f"wrote {len(puzzles)} puzzles to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Recorded games: the engine snapshot a game was dealt from plus its moves.
+
+A recording is a JSON-lines file. The first line holds the snapshot taken
+when the game was dealt (or restored); every following line is one move as
+passed to move listeners. Moves carry no randomness, so restoring the
+snapshot and applying the moves reproduces the game exactly.
+
+A headless AI-vs-AI game can be recorded with
+
+    python -m backend.replay game.jsonl --ai Hard:Easy --seed 7
+"""
+import argparse
+import json
+import os
+import time
+
+from backend.game_engine import GameEngine
+
+RECORDING_DIR = "recordings"
+KEYFRAME_INTERVAL = 16
+
+
+class GameRecorder:
+    """Writes every game played on an engine to its own recording file.
+
+    Files are named after the time and number of the game within `directory`;
+    `path`, when given, is used for the first game instead.
+    """
+
+    def __init__(self, directory=RECORDING_DIR, path=None):
+        self.directory = directory
+        self.engine = None
+        self.file = None
+        self.path = None
+        self.next_path = path
+        self.games = 0
+
+    def attach(self, engine):
+        self.engine = engine
+        engine.add_move_listener(self.on_move)
+
+    def detach(self):
+        if self.engine:
+            self.engine.remove_move_listener(self.on_move)
+            self.engine = None
+        self.close()
+
+    def on_move(self, move):
+        if move["op"] == "init":
+            self.close()
+            if not self.engine.players:
+                return
+            self.games += 1
+            self.path = self.next_path or os.path.join(
+                self.directory, f"game-{time.strftime('%Y%m%d-%H%M%S')}-{self.games}.jsonl")
+            self.next_path = None
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.file = open(self.path, "w", encoding="utf-8")
+            self.file.write(json.dumps({"snapshot": self.engine.snapshot()}, separators=(",", ":")) + "\n")
+            return
+
+        if self.file is None:
+            return
+        self.file.write(json.dumps(move, separators=(",", ":")) + "\n")
+        if self.engine.game_over:
+            self.close()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class Recording:
+    """A loaded recording; engine_at(n) rebuilds the game after its first n moves"""
+
+    def __init__(self, snapshot, moves):
+        self.snapshot = snapshot
+        self.moves = moves
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            lines = [line for line in f if line.strip()]
+        if not lines:
+            raise ValueError(f"{path} is not a recording")
+        header = json.loads(lines[0])
+        if "snapshot" not in header:
+            raise ValueError(f"{path} is not a recording")
+        return cls(header["snapshot"], [json.loads(line) for line in lines[1:]])
+
+    def new_engine(self):
+        """Engine restored to the start of the recorded game"""
+        engine = GameEngine(bag_capacity=self.snapshot["bag_capacity"], item_count=len(self.snapshot["items"]))
+        engine.restore(self.snapshot)
+        return engine
+
+    def apply(self, engine, start, stop):
+        """Apply moves [start, stop) to an engine that has played the first `start` moves"""
+        for index in range(start, stop):
+            success, message = engine.apply_move(self.moves[index])
+            if not success:
+                raise ValueError(f"Recorded move {index} was rejected: {message}")
+
+    def engine_at(self, count):
+        engine = self.new_engine()
+        self.apply(engine, 0, count)
+        return engine
+
+
+class ReplayCursor:
+    """Random access to every position of a recording, on its own engine.
+
+    Keyframes (engine snapshots) are taken every `interval` moves in one pass
+    when the cursor is created. seek(n) plays forward when n is fewer than
+    `interval` moves ahead and otherwise restores the last keyframe at or
+    before n and re-applies at most `interval` - 1 moves, so every seek
+    costs at most one restore and `interval` - 1 moves, however long the
+    game.
+    """
+
+    def __init__(self, recording, interval=KEYFRAME_INTERVAL):
+        self.recording = recording
+        self.interval = interval
+        self.engine = recording.new_engine()
+        self.keyframes = []
+        for start in range(0, self.length + 1, interval):
+            self.keyframes.append(self.engine.snapshot())
+            recording.apply(self.engine, start, min(start + interval, self.length))
+        self.position = self.length
+
+    @property
+    def length(self):
+        return len(self.recording.moves)
+
+    def seek(self, position):
+        """Bring the engine to the state after the first `position` moves (clamped to the game)"""
+        position = max(0, min(position, self.length))
+        if 0 <= position - self.position < self.interval:
+            self.recording.apply(self.engine, self.position, position)
+        else:
+            keyframe = position // self.interval
+            self.engine.restore(self.keyframes[keyframe])
+            self.recording.apply(self.engine, keyframe * self.interval, position)
+        self.position = position
+
+    def step(self, moves=1):
+        self.seek(self.position + moves)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record a headless AI-vs-AI Greedy Bag Race game")
+    parser.add_argument("output", help="recording file to write")
+    parser.add_argument("--ai", default="Hard:Medium", metavar="A:B", help="difficulties of the two seats")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--items", type=int, default=25, help="number of items dealt")
+    args = parser.parse_args()
+
+    first, second = args.ai.split(":")
+    engine = GameEngine(item_count=args.items)
+    recorder = GameRecorder(path=args.output)
+    recorder.attach(engine)
+    engine.initialize_game([f"AI 1 ({first})", f"AI 2 ({second})"], ai_seats={0: first, 1: second}, seed=args.seed)
+    while not engine.game_over:
+        engine.ai_make_move()
+    recorder.detach()
+    print(f"Recorded {len(Recording.load(args.output).moves)} moves to {args.output}, "
+          f"scores {[round(player.total_value, 2) for player in engine.players]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,87 +1,192 @@
 import pygame
 import math
 import random
+from collections import OrderedDict, defaultdict
+from gui.text_rendering import PIXEL_FONT, render_text
+from gui.memory import memory, surface_bytes, SHARED
+
+try:
+    from gui.particles import ParticlePool
+except ImportError:  # NumPy is optional; fall back to one ParticleEffect per burst
+    ParticlePool = None
+
+FRAME_MS = 1000 / 60
+FRAME_BUDGET_MS = FRAME_MS
+MAX_ANIMATIONS = 24
+MIN_QUALITY = 0.25
+TEXT_KEYFRAMES = 32
+KEYFRAME_CACHE_SIZE = 64
+OUTLINE_OFFSETS = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+
+_keyframe_cache = OrderedDict()
+
+
+def outlined_text(text, font_size, color, alpha, outline_alpha):
+    """Text with a 1px black outline baked in, at the given text and outline alpha"""
+    text_surf = render_text(text, PIXEL_FONT, font_size, color)
+    outline_surf = render_text(text, PIXEL_FONT, font_size, (0, 0, 0)).copy()
+    width, height = text_surf.get_size()
+    frame = pygame.Surface((width + 2, height + 2), pygame.SRCALPHA)
+
+    if outline_alpha < alpha and alpha > 0:
+        outline_surf.set_alpha(255 * outline_alpha // alpha)
+    for dx, dy in OUTLINE_OFFSETS:
+        frame.blit(outline_surf, (1 + dx, 1 + dy))
+    frame.blit(text_surf, (1, 1))
+    frame.set_alpha(alpha)
+    return frame
+
+
+def text_keyframes(key, text, color, keyframe):
+    """Pre-rendered frames of an animated text, shared by every animation with the same look.
+
+    `keyframe(progress)` gives (font_size, alpha, outline_alpha) at a progress
+    in [0, 1]; TEXT_KEYFRAMES evenly spaced samples are rendered once.
+    """
+    cache_key = (key, text, color)
+    frames = _keyframe_cache.get(cache_key)
+    if frames is not None:
+        _keyframe_cache.move_to_end(cache_key)
+        return frames
+
+    frames = []
+    for index in range(TEXT_KEYFRAMES):
+        font_size, alpha, outline_alpha = keyframe(index / (TEXT_KEYFRAMES - 1))
+        frames.append(outlined_text(text, font_size, color, alpha, outline_alpha) if font_size >= 1 else None)
+    _keyframe_cache[cache_key] = frames
+    if len(_keyframe_cache) > KEYFRAME_CACHE_SIZE:
+        _keyframe_cache.popitem(last=False)
+    return frames
+
+
+def keyframe_bytes(frames):
+    return sum(surface_bytes(frame) for frame in frames if frame is not None)
+
+
+def keyframe_cache_usage():
+    return {SHARED: sum(keyframe_bytes(frames) for frames in _keyframe_cache.values())}
+
+
+def shrink_keyframe_cache(target_bytes):
+    """Drop least recently used keyframe sets until at most `target_bytes` remain; returns bytes freed"""
+    used = before = keyframe_cache_usage()[SHARED]
+    while used > target_bytes and _keyframe_cache:
+        _, frames = _keyframe_cache.popitem(last=False)
+        used -= keyframe_bytes(frames)
+    return before - used
+
+
+memory.register("text keyframes", keyframe_cache_usage, shrink=shrink_keyframe_cache, priority=1)
+
 
 class Animation:
+    """Base for time-driven animations; update(dt) advances by `dt` milliseconds.
+
+    Animations are pooled by AnimationManager, so subclasses set up their
+    state in reset() rather than __init__. Only animations the manager
+    spawned itself are pooled; one handed to or from a caller is never
+    reused. Subclasses whose look is a pure function of elapsed time
+    compute it in pose(elapsed), which lets the renderer draw them between
+    two simulation steps.
+    """
+    pooled = False
+
     def __init__(self, duration=1000):
-        self.start_time = pygame.time.get_ticks()
+        Animation.reset(self, duration)
+
+    def reset(self, duration=1000):
+        self.elapsed = 0
+        self.step = 0
         self.duration = duration
         self.completed = False
-    
-    def update(self):
-        current_time = pygame.time.get_ticks()
-        progress = (current_time - self.start_time) / self.duration
-        
+
+    def update(self, dt=FRAME_MS):
+        self.elapsed += dt
+        self.step = dt
+        progress = self.elapsed / self.duration
+
         if progress >= 1:
             self.completed = True
             progress = 1
-        
+
         return progress
 
+    def progress_at(self, elapsed):
+        return min(1, elapsed / self.duration)
+
+    def pose(self, elapsed):
+        """Set the drawn state to the one at `elapsed` milliseconds"""
+
+    def interpolate(self, alpha):
+        """Draw the state `alpha` of the way from the previous update to the latest one"""
+        self.pose(max(0, self.elapsed - (1 - alpha) * self.step))
+
+    def get_bounds(self):
+        """Screen area the next draw() touches, or None if it draws nothing"""
+        return None
+
+def score_keyframe(progress):
+    if progress < 0.2:
+        scale = 1.0 + 1.5 * (progress / 0.2)
+    else:
+        scale = 2.5 - 1.5 * ((progress - 0.2) / 0.8)
+
+    alpha = 255
+    if progress > 0.6:
+        alpha = int(255 * (1 - (progress - 0.6) / 0.4))
+    return int(12 * scale), alpha, alpha
+
 class ScoreAnimation(Animation):
     def __init__(self, score, start_pos, end_pos, color=(255, 255, 0)):
-        super().__init__(duration=1200)
+        self.reset(score, start_pos, end_pos, color)
+
+    def reset(self, score, start_pos, end_pos, color=(255, 255, 0)):
+        super().reset(duration=1200)
         self.score = score
         self.start_pos = start_pos
         self.end_pos = end_pos
         self.current_pos = start_pos
         self.color = color
-        self.alpha = 255
-        self.scale = 1.0
-    
-    def update(self):
-        progress = super().update()
-        
+        self.frames = text_keyframes("score", f"+{score:.0f}", color, score_keyframe)
+        self.frame = self.frames[0]
+
+    def update(self, dt=FRAME_MS):
+        super().update(dt)
+        self.pose(self.elapsed)
+        return self.completed
+
+    def pose(self, elapsed):
+        progress = self.progress_at(elapsed)
         eased_progress = 1 - (1 - progress) ** 4
-        
+
         dx = self.end_pos[0] - self.start_pos[0]
         dy = self.end_pos[1] - self.start_pos[1]
         self.current_pos = (
             self.start_pos[0] + dx * eased_progress,
             self.start_pos[1] + dy * eased_progress
         )
-        
-        if progress < 0.2:
-            self.scale = 1.0 + 1.5 * (progress / 0.2)
-        else:
-            self.scale = 2.5 - 1.5 * ((progress - 0.2) / 0.8)
-
-        if progress > 0.6:
-            self.alpha = int(255 * (1 - (progress - 0.6) / 0.4))
-        
-        return self.completed
-    
-    def draw(self, surface):
-        font_size = int(12 * self.scale)
-        if font_size < 1: return
-
-        try:
-            font = pygame.font.Font("assets/fonts/pixel_font.ttf", font_size)
-        except:
-            font = pygame.font.SysFont('Courier New', font_size, bold=True)
+        self.frame = self.frames[min(int(progress * TEXT_KEYFRAMES), TEXT_KEYFRAMES - 1)]
 
-        text_surf = font.render(f"+{self.score:.0f}", True, self.color)
-        text_surf.set_alpha(self.alpha)
-        
-        outline_surf = font.render(f"+{self.score:.0f}", True, (0,0,0))
-        outline_surf.set_alpha(self.alpha)
+    def get_bounds(self):
+        if self.frame is None: return None
+        return self.frame.get_rect(center=self.current_pos)
 
-        text_rect = text_surf.get_rect(center=self.current_pos)
-
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-             surface.blit(outline_surf, text_rect.move(dx, dy))
-
-        surface.blit(text_surf, text_rect)
+    def draw(self, surface):
+        if self.frame is None: return
+        surface.blit(self.frame, self.frame.get_rect(center=self.current_pos))
 
 
 class ParticleEffect(Animation):
     def __init__(self, position, color=(255, 215, 0), particle_count=25):
-        super().__init__(duration=800)
+        self.reset(position, color, particle_count)
+
+    def reset(self, position, color=(255, 215, 0), particle_count=25):
+        super().reset(duration=800)
         self.position = position
         self.color = color
         self.particles = []
         self.pixel_size = 4
-        
+
         for _ in range(particle_count):
             angle = random.uniform(0, 2 * math.pi)
             speed = random.uniform(1, 4)
@@ -91,19 +196,30 @@ class ParticleEffect(Animation):
                 'size': random.randint(2, 5),
                 'life': 1.0
             })
-    
-    def update(self):
-        progress = super().update()
-        
+
+    def update(self, dt=FRAME_MS):
+        progress = super().update(dt)
+        steps = dt / FRAME_MS
+
         for particle in self.particles:
-            particle['position'][0] += particle['velocity'][0]
-            particle['position'][1] += particle['velocity'][1]
-            particle['velocity'][1] += 0.15
+            particle['position'][0] += particle['velocity'][0] * steps
+            particle['position'][1] += particle['velocity'][1] * steps
+            particle['velocity'][1] += 0.15 * steps
             particle['life'] = 1.0 - progress
-            particle['size'] *= 0.96
-        
+            particle['size'] *= 0.96 ** steps
+
         return self.completed
-    
+
+    def get_bounds(self):
+        rects = []
+        for particle in self.particles:
+            size = int(particle['size'])
+            if particle['life'] > 0 and size > 0:
+                px = int(particle['position'][0] / self.pixel_size) * self.pixel_size
+                py = int(particle['position'][1] / self.pixel_size) * self.pixel_size
+                rects.append(pygame.Rect(px, py, size * self.pixel_size, size * self.pixel_size))
+        return rects[0].unionall(rects[1:]) if rects else None
+
     def draw(self, surface):
         for particle in self.particles:
             if particle['life'] > 0:
@@ -113,104 +229,221 @@ class ParticleEffect(Animation):
 
                 px = int(particle['position'][0] / self.pixel_size) * self.pixel_size
                 py = int(particle['position'][1] / self.pixel_size) * self.pixel_size
-                
+
                 particle_color = (*self.color, alpha)
-                
-                pygame.draw.rect(surface, particle_color, 
+
+                pygame.draw.rect(surface, particle_color,
                                 (px, py, size * self.pixel_size, size * self.pixel_size))
 
 
 class TextFlashAnimation(Animation):
     def __init__(self, text, position, font_size=24, color=(255, 255, 255), flash_count=3):
-        super().__init__(duration=1000)
+        self.reset(text, position, font_size, color, flash_count)
+
+    def reset(self, text, position, font_size=24, color=(255, 255, 255), flash_count=3):
+        super().reset(duration=1000)
         self.text = text
         self.position = position
         self.font_size = font_size
         self.color = color
         self.flash_count = flash_count
-        self.alpha = 255
-    
-    def update(self):
-        progress = super().update()
-        
-        flash_progress = progress * self.flash_count
-        flash_phase = flash_progress % 1.0
-        
-        self.alpha = 255 if flash_phase < 0.5 else 128
-        
-        if progress > 0.7:
-            self.alpha = int(255 * (1 - (progress - 0.7) / 0.3))
-        
+
+        def keyframe(progress):
+            flash_phase = (progress * flash_count) % 1.0
+            alpha = 255 if flash_phase < 0.5 else 128
+            if progress > 0.7:
+                alpha = int(255 * (1 - (progress - 0.7) / 0.3))
+            return font_size, alpha, alpha // 2
+
+        self.frames = text_keyframes(("flash", font_size, flash_count), text, color, keyframe)
+        self.frame = self.frames[0]
+
+    def update(self, dt=FRAME_MS):
+        super().update(dt)
+        self.pose(self.elapsed)
         return self.completed
-    
+
+    def pose(self, elapsed):
+        self.frame = self.frames[min(int(self.progress_at(elapsed) * TEXT_KEYFRAMES), TEXT_KEYFRAMES - 1)]
+
+    def get_bounds(self):
+        return self.frame.get_rect(center=self.position)
+
     def draw(self, surface):
-        try:
-            font = pygame.font.Font("assets/fonts/pixel_font.ttf", self.font_size)
-        except:
-            font = pygame.font.SysFont('Courier New', self.font_size, bold=True)
-
-        text_surf = font.render(self.text, True, self.color)
-        text_surf.set_alpha(self.alpha)
-        
-        outline_surf = font.render(self.text, True, (0, 0, 0))
-        outline_surf.set_alpha(self.alpha // 2)
-        
-        text_rect = text_surf.get_rect(center=self.position)
-        
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            surface.blit(outline_surf, text_rect.move(dx, dy))
-        
-        surface.blit(text_surf, text_rect)
+        surface.blit(self.frame, self.frame.get_rect(center=self.position))
 
 class ProgressBarAnimation(Animation):
     def __init__(self, target_value, duration=500):
-        super().__init__(duration=duration)
+        self.reset(target_value, duration)
+
+    def reset(self, target_value, duration=500):
+        super().reset(duration=duration)
         self.target_value = target_value
         self.current_value = 0
         self.start_value = 0
-    
+
     def set_start_value(self, start_value):
         self.start_value = start_value
         self.current_value = start_value
-    
-    def update(self):
-        progress = super().update()
-        self.current_value = self.start_value + (self.target_value - self.start_value) * progress
+
+    def update(self, dt=FRAME_MS):
+        super().update(dt)
+        self.pose(self.elapsed)
         return self.completed
 
+    def pose(self, elapsed):
+        self.current_value = self.start_value + (self.target_value - self.start_value) * self.progress_at(elapsed)
+
 class AnimationManager:
+    """Runs pooled, time-driven animations under a concurrency cap.
+
+    update(dt) advances everything by one simulation step of `dt`
+    milliseconds; interpolate(alpha) then poses animations and particles
+    between the last two steps for drawing. When the work of a frame
+    (reported through frame_finished) runs over FRAME_BUDGET_MS, `quality`
+    drops: fewer particles are emitted, fewer animations may run at once
+    and particles are stepped every other update.
+    It recovers gradually once frames are back within budget. Time the main
+    loop spends asleep between frames does not count against the budget.
+    """
     def __init__(self):
         self.animations = []
-    
+        self.last_bounds = []
+        self.pool = defaultdict(list)
+        self.particles = ParticlePool() if ParticlePool else None
+        self.quality = 1.0
+        self.frame_count = 0
+        self.particle_dt = 0
+        self.particle_step = 0
+        self.step = 0
+        self.last_update = None
+
+    def seed(self, seed):
+        """Make the random look of the effects added next reproducible"""
+        random.seed(seed)
+        if self.particles:
+            self.particles.seed(seed)
+
+    def spawn(self, cls, *args):
+        """Run an animation of `cls` reset with `args`, reused from the pool when possible"""
+        free = self.pool[cls]
+        if free:
+            animation = free.pop()
+            animation.reset(*args)
+        else:
+            animation = cls(*args)
+            animation.pooled = True
+        self.add_animation(animation)
+
     def add_animation(self, animation):
+        limit = max(4, int(MAX_ANIMATIONS * self.quality))
+        while len(self.animations) >= limit:
+            self.recycle(self.animations.pop(0))
         self.animations.append(animation)
-    
+
+    def recycle(self, animation):
+        if animation.pooled:
+            self.pool[type(animation)].append(animation)
+
     def add_score_animation(self, score, start_pos, end_pos, color=(255, 255, 0)):
-        self.animations.append(ScoreAnimation(score, start_pos, end_pos, color))
-    
+        self.spawn(ScoreAnimation, score, start_pos, end_pos, color)
+
     def add_particle_effect(self, position, color=(255, 215, 0), particle_count=25):
-        self.animations.append(ParticleEffect(position, color, particle_count))
-    
+        particle_count = max(1, int(particle_count * self.quality))
+        if self.particles:
+            self.particles.emit(position, color, particle_count)
+        else:
+            self.spawn(ParticleEffect, position, color, min(particle_count, 100))
+
+    def add_celebration(self, area, colors=((255, 215, 0), (255, 80, 80), (80, 200, 255), (120, 255, 120)),
+                        bursts=8, particle_count=200):
+        """Fireworks over `area`: several long, fast bursts at random points"""
+        particle_count = max(1, int(particle_count * self.quality))
+        for burst in range(bursts):
+            position = (random.randint(area.left, area.right), random.randint(area.top, area.centery))
+            color = colors[burst % len(colors)]
+            if self.particles:
+                self.particles.emit(position, color, particle_count, speed=(2, 9), duration=1600, spread=8)
+            else:
+                self.spawn(ParticleEffect, position, color, 25)
+
     def add_text_flash(self, text, position, font_size=24, color=(255, 255, 255), flash_count=3):
-        self.animations.append(TextFlashAnimation(text, position, font_size, color, flash_count))
-    
+        self.spawn(TextFlashAnimation, text, position, font_size, color, flash_count)
+
     def add_progress_animation(self, target_value, duration=500):
+        """Start a progress bar animation and return it; the caller reads it, so it is not pooled"""
         animation = ProgressBarAnimation(target_value, duration)
-        self.animations.append(animation)
+        self.add_animation(animation)
         return animation
-    
-    def update(self):
-        self.animations = [anim for anim in self.animations if not anim.completed]
+
+    def update(self, dt=None):
+        """Advance by `dt` ms (default: the time since the previous update)"""
+        now = pygame.time.get_ticks()
+        if dt is None:
+            dt = FRAME_MS if self.last_update is None else now - self.last_update
+        self.last_update = now
+        self.frame_count += 1
+
+        live = 0
+        for animation in self.animations:
+            if animation.completed:
+                self.recycle(animation)
+                continue
+            animation.update(dt)
+            self.animations[live] = animation
+            live += 1
+        del self.animations[live:]
+
+        self.step = dt
+        if self.particles:
+            self.particle_dt += dt
+            if self.quality >= 0.5 or self.frame_count % 2 == 0:
+                self.particles.update(self.particle_dt)
+                self.particle_step = self.particle_dt
+                self.particle_dt = 0
+
+    def interpolate(self, alpha):
+        """Pose everything `alpha` (0-1) of the way from the previous update to the latest"""
         for animation in self.animations:
-            animation.update()
-    
+            animation.interpolate(alpha)
+        if self.particles:
+            if self.particle_step:
+                # Particles may lag the animations by skipped updates and step
+                # several updates at once; pose them at the same moment, as a
+                # fraction of their own last step (a little past it while skipped).
+                alpha = (self.particle_step - (1 - alpha) * self.step + self.particle_dt) / self.particle_step
+            self.particles.interpolate(alpha)
+
+    def frame_finished(self, work_ms):
+        """Adapt `quality` to the time the last frame took to update and render"""
+        if work_ms > FRAME_BUDGET_MS:
+            self.quality = max(MIN_QUALITY, self.quality * 0.8)
+        else:
+            self.quality = min(1.0, self.quality + 0.02)
+
     def draw(self, surface):
+        if self.particles:
+            self.particles.draw(surface)
         for animation in self.animations:
             if hasattr(animation, 'draw'):
                 animation.draw(surface)
-    
+
+    def get_dirty_rects(self):
+        """Areas drawn by animations last frame (to erase) and this frame (to draw)"""
+        bounds = [animation.get_bounds() for animation in self.animations]
+        if self.particles:
+            bounds.append(self.particles.get_bounds())
+        bounds = [rect for rect in bounds if rect]
+        dirty = self.last_bounds + bounds
+        self.last_bounds = bounds
+        return dirty
+
     def clear_all(self):
+        for animation in self.animations:
+            self.recycle(animation)
         self.animations = []
-    
+        if self.particles:
+            self.particles.clear()
+
     def has_animations(self):
-        return len(self.animations) > 0
+        return len(self.animations) > 0 or bool(self.particles and self.particles.live_count())
@@ -0,0 +1,219 @@
+import math
+import time
+
+import pygame
+
+from backend.game_engine import GameEngine
+from gui.memory import memory, surface_bytes, SHARED
+from gui.sprites import sprite_cache
+from gui.text_rendering import render_text
+
+ARENA_MIN_GAMES = 4
+ARENA_MAX_GAMES = 64
+ARENA_MOVE_MS = 500
+# Moves a tile may fall behind by when the frame budget runs out; older ones are dropped.
+MAX_BACKLOG_MOVES = 4
+TILE_GAP = 6
+TILE_COLOR = (35, 35, 50)
+TILE_BORDER_COLOR = (70, 70, 90)
+BAR_BACKGROUND = (20, 20, 20)
+EMPTY_ITEM_COLOR = (100, 100, 100)
+TURN_COLOR = (255, 215, 0)
+SEAT_COLORS = ((65, 105, 225), (220, 60, 60))
+TEXT_COLOR = (240, 240, 240)
+
+
+def grid_layout(count, width, height, gap):
+    """(columns, cell size) of the square-cell grid holding `count` cells that best fills width x height"""
+    best = (1, 0)
+    for columns in range(1, count + 1):
+        rows = -(-count // columns)
+        cell = min((width - (columns - 1) * gap) // columns, (height - (rows - 1) * gap) // rows)
+        if cell > best[1]:
+            best = (columns, cell)
+    return best
+
+
+class ArenaTile:
+    """One AI-vs-AI game drawn as a miniature of its item grid and both bags.
+
+    The miniature is a cached layer rebuilt only after the tile's engine
+    reports a move, so an unchanged tile costs a single blit. Items stay in
+    their dealt slots (an item's handle is its slot) and use the shared
+    sprite and text caches; all tiles have the same size, so they share
+    sprites too.
+    """
+
+    def __init__(self, rect, seats, bag_capacity, item_count, seed=None):
+        self.rect = pygame.Rect(rect)
+        self.seats = seats
+        self.engine = GameEngine(bag_capacity=bag_capacity, item_count=item_count, seed=seed)
+        self.engine.add_move_listener(self.on_move)
+        self.layer = None
+        self.dirty = True
+        self.move_timer = 0
+        self.tally = [0, 0, 0]
+
+        self.padding = max(2, self.rect.height // 40)
+        self.bar_height = max(8, self.rect.height // 10)
+        self.grid_top = 2 * self.padding + self.bar_height
+        self.columns, self.cell = grid_layout(
+            item_count, self.rect.width - 2 * self.padding,
+            self.rect.height - self.grid_top - self.padding, max(1, self.padding // 2))
+        self.deal()
+
+    def on_move(self, move):
+        self.dirty = True
+
+    def deal(self):
+        first, second = self.seats
+        self.engine.initialize_game([f"AI 1 ({first})", f"AI 2 ({second})"], ai_seats={0: first, 1: second})
+
+    def play_move(self):
+        """Play one move (or skip a full bag's turn), dealing the next game when this one ends"""
+        self.engine.ai_make_move()
+        if self.engine.game_over:
+            winner = self.engine.get_winner()
+            self.tally[2 if winner is None else self.engine.players.index(winner)] += 1
+            self.deal()
+
+    def slot_rect(self, slot):
+        gap = max(1, self.padding // 2)
+        row, column = divmod(slot, self.columns)
+        return pygame.Rect(self.padding + column * (self.cell + gap),
+                           self.grid_top + row * (self.cell + gap), self.cell, self.cell)
+
+    def build_layer(self):
+        if self.layer is None:
+            self.layer = pygame.Surface(self.rect.size)
+            if pygame.display.get_surface() is not None:
+                self.layer = self.layer.convert()
+        layer = self.layer
+        layer.fill(TILE_COLOR)
+        pygame.draw.rect(layer, TILE_BORDER_COLOR, layer.get_rect(), 1)
+
+        bar_width = (self.rect.width - 3 * self.padding) // 2
+        font_size = max(8, self.bar_height - 2)
+        for seat, player in enumerate(self.engine.players):
+            bar = pygame.Rect(self.padding + seat * (bar_width + self.padding), self.padding,
+                              bar_width, self.bar_height)
+            pygame.draw.rect(layer, BAR_BACKGROUND, bar)
+            fill = int(bar.width * min(1.0, player.current_weight / player.bag_limit))
+            pygame.draw.rect(layer, SEAT_COLORS[seat], (bar.x, bar.y, fill, bar.height))
+            if seat == self.engine.current_player_index:
+                pygame.draw.rect(layer, TURN_COLOR, bar, 1)
+            score = render_text(f"{player.total_value:.0f}", "arial", font_size, TEXT_COLOR)
+            layer.blit(score, score.get_rect(center=bar.center))
+
+        size = (self.cell, self.cell)
+        for item in self.engine.items:
+            if item.is_depleted():
+                continue
+            slot = self.slot_rect(item.handle)
+            if item.image_filename:
+                layer.blit(sprite_cache.get_sprite(item.image_filename, 0, size), slot)
+            else:
+                pygame.draw.rect(layer, EMPTY_ITEM_COLOR, slot)
+        self.dirty = False
+
+
+class Arena:
+    """Many concurrent AI-vs-AI games tiled on one screen.
+
+    Each tile keeps its own move timer, phased so the tiles' moves are
+    spread evenly over the move delay instead of landing on the same frame.
+    advance() runs the timers on the fixed simulation step and play() makes
+    the moves that fell due, round-robin, within a wall-time budget; moves
+    over budget wait for the next frame. update() redraws only the tiles that
+    changed, each into its own layer, and returns their rects as dirty.
+    """
+
+    def __init__(self, rect, count, seats, bag_capacity, item_count, seed=None, move_ms=ARENA_MOVE_MS):
+        rect = pygame.Rect(rect)
+        count = max(ARENA_MIN_GAMES, min(ARENA_MAX_GAMES, count))
+        columns = math.ceil(math.sqrt(count))
+        rows = -(-count // columns)
+        width = (rect.width - (columns - 1) * TILE_GAP) // columns
+        height = (rect.height - (rows - 1) * TILE_GAP) // rows
+        self.seats = seats
+        self.move_ms = move_ms
+        self.tiles = []
+        for index in range(count):
+            row, column = divmod(index, columns)
+            tile_rect = (rect.x + column * (width + TILE_GAP), rect.y + row * (height + TILE_GAP), width, height)
+            tile = ArenaTile(tile_rect, seats, bag_capacity, item_count,
+                             seed=None if seed is None else seed + index)
+            tile.move_timer = move_ms * index / count
+            self.tiles.append(tile)
+        self.next_tile = 0
+        memory.register("arena tiles", self.memory_usage, shrink=self.shrink, priority=1)
+
+    def advance(self, ms):
+        """Run every tile's move timer forward by `ms` of game time"""
+        backlog = self.move_ms * MAX_BACKLOG_MOVES
+        for tile in self.tiles:
+            tile.move_timer = min(tile.move_timer + ms, backlog)
+
+    def play(self, budget_ms, every_tile=False):
+        """Make due moves round-robin for up to `budget_ms` of wall time; returns the moves made.
+
+        With `every_tile` the timers are ignored and tiles take turns moving
+        until the budget is spent.
+        """
+        deadline = time.perf_counter() + budget_ms / 1000
+        moves = 0
+        idle = 0
+        while idle < len(self.tiles) and time.perf_counter() < deadline:
+            tile = self.tiles[self.next_tile]
+            self.next_tile = (self.next_tile + 1) % len(self.tiles)
+            if every_tile or tile.move_timer >= self.move_ms:
+                if not every_tile:
+                    tile.move_timer -= self.move_ms
+                tile.play_move()
+                moves += 1
+                idle = 0
+            else:
+                idle += 1
+        return moves
+
+    def time_to_next_move(self):
+        return max(0, self.move_ms - max(tile.move_timer for tile in self.tiles))
+
+    def tally(self):
+        """[first seat wins, second seat wins, ties] over every finished game"""
+        return [sum(tile.tally[i] for tile in self.tiles) for i in range(3)]
+
+    def invalidate(self):
+        """Redraw every tile, e.g. once streamed sprites replace their placeholders"""
+        for tile in self.tiles:
+            tile.dirty = True
+
+    def update(self):
+        """Rebuild the layers of changed tiles; returns their screen rects"""
+        rects = []
+        for tile in self.tiles:
+            if tile.dirty:
+                tile.build_layer()
+                rects.append(tile.rect)
+        return rects
+
+    def draw(self, surface):
+        for tile in self.tiles:
+            if tile.layer is not None:
+                surface.blit(tile.layer, tile.rect)
+
+    def memory_usage(self):
+        return {SHARED: sum(surface_bytes(tile.layer) for tile in self.tiles if tile.layer is not None)}
+
+    def shrink(self, target_bytes):
+        """Drop every tile layer if over `target_bytes` (each is rebuilt on the next update); returns bytes freed"""
+        used = self.memory_usage()[SHARED]
+        if used <= target_bytes:
+            return 0
+        for tile in self.tiles:
+            tile.layer = None
+            tile.dirty = True
+        return used
+
+    def close(self):
+        memory.unregister("arena tiles")
@@ -0,0 +1,197 @@
+import itertools
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import pygame
+
+from gui.bundle import bundle_key
+from gui.memory import memory, sound_bytes, surface_bytes, SHARED
+
+# Request priorities, most urgent first.
+URGENT = 0
+GAME = 1
+LATER = 2
+
+ASSET_WORKERS = 2
+PUMP_BUDGET_MS = 4
+# Decoded images are mostly full-size item sources, only needed to (re)build sprites.
+IMAGE_CACHE_BUDGET = 64 * 1024 * 1024
+
+
+class AssetManager:
+    """Decodes images and sounds on worker threads, most urgent request first.
+
+    image() and sound() return the asset if it is ready and otherwise queue it
+    and return None, so callers draw a placeholder instead of stalling the
+    frame. Decoded images are handed back to the main thread, where pump()
+    converts them for the display within a small time budget per frame.
+    With `streaming` off every request loads synchronously (for headless
+    tools that need finished frames). When a prebaked `bundle` is set,
+    baked() serves pre-scaled surfaces from it.
+    Loaded assets are kept in least recently used order so shrink() can drop
+    the coldest; a dropped asset is simply loaded again when next asked for.
+    """
+
+    def __init__(self, workers=ASSET_WORKERS, streaming=True):
+        self.workers = workers
+        self.streaming = streaming
+        self.requests = queue.PriorityQueue()
+        self.finished = queue.Queue()
+        self.assets = OrderedDict()
+        self.kinds = {}
+        self.pending = set()
+        self.failed = set()
+        self.order = itertools.count()
+        self.threads = []
+        self.lock = threading.Lock()
+        self.totals = [0, 0, 0]
+        self.done = [0, 0, 0]
+        self.bundle = None
+
+    def _start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"asset-loader-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _work(self):
+        while True:
+            priority, _, future, fn, args = self.requests.get()
+            if future is None:
+                break
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            with self.lock:
+                self.done[priority] += 1
+
+    def submit(self, fn, *args, priority=GAME):
+        """Run fn(*args) on a worker thread; returns a concurrent.futures.Future"""
+        if not self.threads:
+            self._start()
+        future = Future()
+        with self.lock:
+            self.totals[priority] += 1
+        self.requests.put((priority, next(self.order), future, fn, args))
+        return future
+
+    def request(self, path, kind="image", priority=GAME, convert=True):
+        """Queue `path` for loading unless it is loaded, loading or failed.
+
+        Pass convert=False for images only ever scaled down before drawing;
+        converting the small result is much cheaper than the full image.
+        """
+        if path in self.assets or path in self.pending or path in self.failed:
+            return
+        if not self.streaming:
+            self._finish(path, kind, convert, self._decode(path, kind))
+            return
+        self.pending.add(path)
+        future = self.submit(self._decode, path, kind, priority=priority)
+        future.add_done_callback(lambda f: self.finished.put((path, kind, convert, f)))
+
+    def _decode(self, path, kind):
+        try:
+            return pygame.mixer.Sound(path) if kind == "sound" else pygame.image.load(path)
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            return None
+
+    def _finish(self, path, kind, convert, asset):
+        self.pending.discard(path)
+        if asset is None:
+            self.failed.add(path)
+            return
+        if kind == "image" and convert and pygame.display.get_surface() is not None:
+            asset = asset.convert_alpha()
+        self.assets[path] = asset
+        self.kinds[path] = kind
+
+    def image(self, path, priority=GAME, convert=True):
+        image = self.assets.get(path)
+        if image is None:
+            self.request(path, "image", priority, convert)
+            image = self.assets.get(path)
+        else:
+            self.assets.move_to_end(path)
+        return image
+
+    def sound(self, path, priority=GAME):
+        sound = self.assets.get(path)
+        if sound is None:
+            self.request(path, "sound", priority)
+            sound = self.assets.get(path)
+        else:
+            self.assets.move_to_end(path)
+        return sound
+
+    def asset_bytes(self, path):
+        asset = self.assets[path]
+        return sound_bytes(asset) if self.kinds[path] == "sound" else surface_bytes(asset)
+
+    def memory_usage(self, kind):
+        return {SHARED: sum(self.asset_bytes(path) for path in self.assets if self.kinds[path] == kind)}
+
+    def shrink(self, kind, target_bytes):
+        """Drop least recently used assets of `kind` down to `target_bytes`; returns bytes freed"""
+        used = before = self.memory_usage(kind)[SHARED]
+        for path in [path for path in self.assets if self.kinds[path] == kind]:
+            if used <= target_bytes:
+                break
+            used -= self.asset_bytes(path)
+            del self.assets[path]
+            del self.kinds[path]
+        return before - used
+
+    def baked(self, path, size, kind="image"):
+        """Surface of `path` prebaked at `size` in the bundle, or None"""
+        if self.bundle is None:
+            return None
+        return self.bundle.surface(bundle_key(path, size, kind))
+
+    def has_failed(self, path):
+        return path in self.failed
+
+    def pump(self, budget_ms=PUMP_BUDGET_MS):
+        """Finish decoded assets on the main thread; returns how many became ready"""
+        deadline = time.perf_counter() + budget_ms / 1000
+        count = 0
+        while True:
+            try:
+                path, kind, convert, future = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            self._finish(path, kind, convert, None if future.cancelled() else future.result())
+            count += 1
+            if time.perf_counter() >= deadline:
+                break
+        return count
+
+    def progress(self, priority=URGENT):
+        """(finished, requested) counts over requests at `priority` or more urgent"""
+        with self.lock:
+            return sum(self.done[:priority + 1]), sum(self.totals[:priority + 1])
+
+    def is_loaded(self, priority=URGENT):
+        done, total = self.progress(priority)
+        return done >= total
+
+    def close(self):
+        if self.bundle is not None:
+            self.bundle.close()
+            self.bundle = None
+        for _ in self.threads:
+            self.requests.put((-1, next(self.order), None, None, None))
+        self.threads = []
+
+
+assets = AssetManager()
+memory.register("images", lambda: assets.memory_usage("image"), IMAGE_CACHE_BUDGET,
+                shrink=lambda target_bytes: assets.shrink("image", target_bytes), priority=0)
+memory.register("sounds", lambda: assets.memory_usage("sound"),
+                shrink=lambda target_bytes: assets.shrink("sound", target_bytes), priority=2)
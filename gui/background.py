@@ -1,102 +1,197 @@
 import pygame
-import time
 import os
+from collections import OrderedDict
+
+from gui.assets import assets, LATER
+from gui.memory import surface_bytes, SHARED
 
 class AnimatedBackground:
-    def __init__(self, frames, fps=2):
+    def __init__(self, frames, fps=2, paths=()):
         self.frames = frames
+        self.paths = list(paths)
         self.fps = fps
         self.frame_delay = 1.0 / fps
         self.current_frame = 0
-        self.last_frame_time = time.time()
+        self.elapsed = 0
     
-    def update(self):
-        current_time = time.time()
-        if current_time - self.last_frame_time >= self.frame_delay:
+    def update(self, dt):
+        """Advance the animation by `dt` milliseconds; returns True when the visible frame changed"""
+        self.elapsed += dt
+        if self.elapsed >= self.frame_delay * 1000:
+            self.elapsed %= self.frame_delay * 1000
             self.current_frame = (self.current_frame + 1) % len(self.frames)
-            self.last_frame_time = current_time
+            return len(self.frames) > 1
+        return False
+    
+    def time_to_next_frame(self):
+        """Seconds of animation time until update() will change the visible frame"""
+        if len(self.frames) < 2:
+            return None
+        return max(0.0, self.frame_delay - self.elapsed / 1000)
     
     def get_current_frame(self):
         return self.frames[self.current_frame]
     
-    def draw(self, surface):
-        surface.blit(self.get_current_frame(), (0, 0))
+    def draw(self, surface, area=None):
+        """Draw the whole frame, or only the screen region `area`"""
+        if area is None:
+            surface.blit(self.get_current_frame(), (0, 0))
+        else:
+            surface.blit(self.get_current_frame(), area, area)
     
     def set_fps(self, fps):
         self.fps = fps
         self.frame_delay = 1.0 / fps
 
+
+BACKGROUND_CONFIG = {
+    "MENU": ("assets/images/ui/bg1.png", "assets/images/ui/bg2.png"),
+    "MODE_SELECT": ("assets/images/ui/mode1.png", "assets/images/ui/mode2.png"),
+    "DIFFICULTY_SELECT": ("assets/images/ui/diff1.png", "assets/images/ui/diff2.png"),
+    "IN_GAME_SINGLE": ("assets/images/ui/game1.png", "assets/images/ui/game2.png"),
+    "IN_GAME_MULTI": ("assets/images/ui/game1.png", "assets/images/ui/game2.png"),
+    "IN_GAME_SPECTATE": ("assets/images/ui/game1.png", "assets/images/ui/game2.png"),
+    "REPLAY": ("assets/images/ui/game1.png", "assets/images/ui/game2.png"),
+    "YOU_WIN": ("assets/images/ui/uwin1.png", "assets/images/ui/uwin2.png"),
+    "AI_WIN": ("assets/images/ui/aiw1.png", "assets/images/ui/aiw2.png"),
+    "PLAYER1_WIN": ("assets/images/ui/p11.png", "assets/images/ui/p12.png"),
+    "PLAYER2_WIN": ("assets/images/ui/p21.png", "assets/images/ui/p22.png"),
+}
+
+# States reachable from each state, whose frames are prefetched while it is shown.
+NEXT_STATES = {
+    "MENU": ("MODE_SELECT",),
+    "MODE_SELECT": ("DIFFICULTY_SELECT", "IN_GAME_MULTI", "IN_GAME_SPECTATE"),
+    "DIFFICULTY_SELECT": ("IN_GAME_SINGLE",),
+    "IN_GAME_SINGLE": ("YOU_WIN", "AI_WIN"),
+    "IN_GAME_MULTI": ("PLAYER1_WIN", "PLAYER2_WIN"),
+    "IN_GAME_SPECTATE": ("MENU",),
+    "REPLAY": ("MENU",),
+    "YOU_WIN": ("MENU",),
+    "AI_WIN": ("MENU",),
+    "PLAYER1_WIN": ("MENU",),
+    "PLAYER2_WIN": ("MENU",),
+}
+
+BACKGROUND_CACHE_BUDGET = 64 * 1024 * 1024
+
+
 class BackgroundManager:
-    def __init__(self, screen_width, screen_height, fps=2):
+    """Background animations for each game state, loaded on first use.
+
+    Frames are shared by path (both in-game states use the same images),
+    converted to the display format, and kept in an LRU bounded by
+    `budget_bytes`; the frames of the state being shown are never evicted.
+    While a state is shown, the frames of the states that can follow it are
+    decoded and scaled on the shared asset loader; update() converts each on
+    the main thread as it finishes and files it in the LRU, so frames for
+    states that are never shown count against the budget and get evicted.
+    """
+
+    def __init__(self, screen_width, screen_height, fps=2, budget_bytes=BACKGROUND_CACHE_BUDGET):
         self.screen_width = screen_width
         self.screen_height = screen_height
         self.fps = fps
+        self.budget_bytes = budget_bytes
         self.backgrounds = {}
-        self.load_all_backgrounds()
-    
+        self.frames = OrderedDict()
+        self.bytes_used = 0
+        self.pending = {}
+        self.current_state = None
+
     def load_all_backgrounds(self):
-        background_config = {
-            "MENU": {
-                "frame1": "assets/images/ui/bg1.png",
-                "frame2": "assets/images/ui/bg2.png"
-            },
-            "MODE_SELECT": {
-                "frame1": "assets/images/ui/mode1.png",
-                "frame2": "assets/images/ui/mode2.png"
-            },
-            "DIFFICULTY_SELECT": {
-                "frame1": "assets/images/ui/diff1.png",
-                "frame2": "assets/images/ui/diff2.png"
-            },
-            "IN_GAME_SINGLE": {
-                "frame1": "assets/images/ui/game1.png",
-                "frame2": "assets/images/ui/game2.png"
-            },
-            "IN_GAME_MULTI": {
-                "frame1": "assets/images/ui/game1.png",
-                "frame2": "assets/images/ui/game2.png"
-            },
-            "YOU_WIN": {
-                "frame1": "assets/images/ui/uwin1.png",
-                "frame2": "assets/images/ui/uwin2.png"
-            },
-            "AI_WIN": {
-                "frame1": "assets/images/ui/aiw1.png",
-                "frame2": "assets/images/ui/aiw2.png"
-            },
-            "PLAYER1_WIN": {
-                "frame1": "assets/images/ui/p11.png",
-                "frame2": "assets/images/ui/p12.png"
-            },
-            "PLAYER2_WIN": {
-                "frame1": "assets/images/ui/p21.png",
-                "frame2": "assets/images/ui/p22.png"
-            }
-        }
-        
-        for state, config in background_config.items():
-            try:
-                if os.path.exists(config["frame1"]):
-                    frame1 = pygame.image.load(config["frame1"])
-                    frame1 = pygame.transform.scale(frame1, (self.screen_width, self.screen_height))
-                else:
-                    frame1 = self.create_fallback_background(state)
-                
-                if os.path.exists(config["frame2"]):
-                    frame2 = pygame.image.load(config["frame2"])
-                    frame2 = pygame.transform.scale(frame2, (self.screen_width, self.screen_height))
-                else:
-                    frame2 = self.create_variant_background(state, frame1)
-                
-                self.backgrounds[state] = AnimatedBackground([frame1, frame2], fps=self.fps)
-                print(f"Loaded background for {state} at {self.fps} FPS")
-                
-            except Exception as e:
-                print(f"Error loading background for {state}: {e}")
+        """Load every state's background now (e.g. for benchmarking)"""
+        for state in BACKGROUND_CONFIG:
+            self.get_background(state)
+
+    def decode_frame(self, path):
+        """Load and scale one frame; safe to run off the main thread"""
+        image = pygame.image.load(path)
+        return pygame.transform.scale(image, (self.screen_width, self.screen_height))
+
+    def get_frame(self, path):
+        frame = self.frames.get(path)
+        if frame is not None:
+            self.frames.move_to_end(path)
+            return frame
+
+        baked = assets.baked(path, (self.screen_width, self.screen_height))
+        future = self.pending.pop(path, None)
+        if baked is not None:
+            if future is not None:
+                future.cancel()
+            frame = baked
+        elif future is not None and (future.done() or not future.cancel()):
+            frame = future.result()
+        else:
+            # Not started yet: decoding here beats waiting behind the queue.
+            frame = self.decode_frame(path)
+        return self.store_frame(path, frame)
+
+    def store_frame(self, path, frame):
+        if pygame.display.get_surface() is not None:
+            frame = frame.convert()
+        self.frames[path] = frame
+        self.bytes_used += surface_bytes(frame)
+        return frame
+
+    def collect_prefetched(self):
+        """File finished prefetches in the LRU; failed ones are retried by get_frame() if needed"""
+        finished = [path for path, future in self.pending.items() if future.done()]
+        for path in finished:
+            future = self.pending.pop(path)
+            if not future.cancelled() and future.exception() is None:
+                self.store_frame(path, future.result())
+        if finished:
+            self.evict(self.current_state)
+
+    def build_background(self, state):
+        frame1_path, frame2_path = BACKGROUND_CONFIG.get(state, (None, None))
+        try:
+            if frame1_path and os.path.exists(frame1_path):
+                frame1 = self.get_frame(frame1_path)
+            else:
                 frame1 = self.create_fallback_background(state)
+            
+            if frame2_path and os.path.exists(frame2_path):
+                frame2 = self.get_frame(frame2_path)
+            else:
                 frame2 = self.create_variant_background(state, frame1)
-                self.backgrounds[state] = AnimatedBackground([frame1, frame2], fps=self.fps)
-    
+            
+            paths = [path for path in (frame1_path, frame2_path) if path in self.frames]
+            background = AnimatedBackground([frame1, frame2], fps=self.fps, paths=paths)
+            print(f"Loaded background for {state} at {self.fps} FPS")
+            
+        except Exception as e:
+            print(f"Error loading background for {state}: {e}")
+            frame1 = self.create_fallback_background(state)
+            frame2 = self.create_variant_background(state, frame1)
+            background = AnimatedBackground([frame1, frame2], fps=self.fps)
+        
+        return background
+
+    def evict(self, keep_state):
+        """Drop least recently used frames (and the states using them) until within budget"""
+        keep = set(BACKGROUND_CONFIG.get(keep_state, ()))
+        for path in list(self.frames):
+            if self.bytes_used <= self.budget_bytes:
+                break
+            if path in keep:
+                continue
+            self.bytes_used -= surface_bytes(self.frames.pop(path))
+            for state in [s for s, bg in self.backgrounds.items() if path in bg.paths]:
+                del self.backgrounds[state]
+
+    def prefetch(self, states, priority=LATER):
+        """Decode the frames of `states` on the asset loader unless already loaded"""
+        for state in states:
+            for path in BACKGROUND_CONFIG.get(state, ()):
+                if path in self.frames or path in self.pending or not os.path.exists(path):
+                    continue
+                if assets.baked(path, (self.screen_width, self.screen_height)) is not None:
+                    continue
+                self.pending[path] = assets.submit(self.decode_frame, path, priority=priority)
+
     def create_fallback_background(self, state):
         """Create a colored fallback background based on game state"""
         surface = pygame.Surface((self.screen_width, self.screen_height))
@@ -107,6 +202,8 @@ class BackgroundManager:
             "DIFFICULTY_SELECT": (30, 50, 70),
             "IN_GAME_SINGLE": (20, 40, 30),
             "IN_GAME_MULTI": (40, 20, 30),
+            "IN_GAME_SPECTATE": (30, 30, 40),
+            "REPLAY": (30, 30, 40),
             "YOU_WIN": (30, 60, 30),
             "AI_WIN": (60, 30, 30),
             "PLAYER1_WIN": (30, 30, 80),
@@ -147,13 +244,62 @@ class BackgroundManager:
         return variant
     
     def get_background(self, state):
-        return self.backgrounds.get(state)
+        if state not in BACKGROUND_CONFIG:
+            return None
+        background = self.backgrounds.get(state)
+        if background is None:
+            background = self.build_background(state)
+            self.backgrounds[state] = background
+            self.evict(state)
+        else:
+            for path in background.paths:
+                self.frames.move_to_end(path)
+        return background
     
-    def update(self, state):
+    def update(self, state, dt):
+        """Advance the background of `state` by `dt` ms; returns True when it changed frame"""
+        if state != self.current_state:
+            self.current_state = state
+            self.prefetch(NEXT_STATES.get(state, ()))
+        if self.pending:
+            self.collect_prefetched()
         if state in self.backgrounds:
-            self.backgrounds[state].update()
+            return self.backgrounds[state].update(dt)
+        return False
+    
+    def time_to_next_frame(self, state):
+        """Seconds until the background of `state` changes frame, or None if it is static"""
+        background = self.backgrounds.get(state)
+        return background.time_to_next_frame() if background else None
     
+    def memory_usage(self):
+        """Bytes of background frames by the state showing them; prefetched frames are SHARED"""
+        usage = {}
+        counted = set()
+        for state, background in self.backgrounds.items():
+            for frame in background.frames:
+                if id(frame) not in counted:
+                    counted.add(id(frame))
+                    usage[state] = usage.get(state, 0) + surface_bytes(frame)
+        for frame in self.frames.values():
+            if id(frame) not in counted:
+                usage[SHARED] = usage.get(SHARED, 0) + surface_bytes(frame)
+        return usage
+
+    def shrink(self, target_bytes):
+        """Evict frames not on screen until at most `target_bytes` are cached; returns bytes freed"""
+        before = self.bytes_used
+        budget_bytes, self.budget_bytes = self.budget_bytes, target_bytes
+        self.evict(self.current_state)
+        self.budget_bytes = budget_bytes
+        return before - self.bytes_used
+
     def set_fps(self, fps):
         self.fps = fps
         for background in self.backgrounds.values():
-            background.set_fps(fps)
\ No newline at end of file
+            background.set_fps(fps)
+
+    def close(self):
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
\ No newline at end of file
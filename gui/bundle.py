@@ -0,0 +1,194 @@
+"""Prebaked, memory-mapped asset bundle for one display resolution.
+
+An offline step decodes every item frame, avatar and background once,
+scales them to the sizes the game draws at (finished item sprites per slot
+size, avatars at icon size, backgrounds at screen size) and writes the
+pixels as raw BGRA buffers into a single file, with a JSON index:
+
+    python -m gui.bundle --resolution 1920x1080
+
+At startup the game memory-maps the file and wraps the buffers in surfaces
+without decoding or scaling anything. A bundle is ignored (and the loose
+files used) when it is missing, was built for another resolution, byte
+order or bundle version, or any source file changed since it was baked.
+"""
+import argparse
+import json
+import mmap
+import os
+import sys
+
+import pygame
+
+BUNDLE_DIR = os.path.join("assets", "bundle")
+BUNDLE_VERSION = 1
+ALIGNMENT = 64
+# Pixel layout matching 32-bit little-endian ARGB8888 display surfaces.
+PIXEL_FORMAT = "BGRA"
+DISPLAY_MASKS = (0xff0000, 0xff00, 0xff)
+
+
+def bundle_key(path, size, kind="image"):
+    """Index key of `path` baked at `size` ("sprite" entries are finished item sprites)"""
+    return f"{kind}:{path}@{size[0]}x{size[1]}"
+
+
+def bundle_paths(resolution, directory=BUNDLE_DIR):
+    name = f"{resolution[0]}x{resolution[1]}"
+    return os.path.join(directory, name + ".bin"), os.path.join(directory, name + ".json")
+
+
+def source_stamp(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class AssetBundle:
+    """Read side of a bundle: surfaces over a memory-mapped pixel file"""
+
+    def __init__(self, data_path, index):
+        self.index = index
+        self.entries = index["entries"]
+        self.file = open(data_path, "rb")
+        # Copy-on-write, so an accidental draw onto a baked surface never touches the file.
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_COPY)
+        self.view = memoryview(self.data)
+        self.surfaces = {}
+        display = pygame.display.get_surface()
+        self.native = display is None or display.get_masks()[:3] == DISPLAY_MASKS
+
+    @classmethod
+    def load(cls, resolution, directory=BUNDLE_DIR):
+        """The bundle for `resolution`, or None (with the reason printed) if unusable"""
+        data_path, index_path = bundle_paths(resolution, directory)
+        if not os.path.exists(index_path) or not os.path.exists(data_path):
+            return None
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring asset bundle {index_path}: {e}")
+            return None
+
+        expected = (BUNDLE_VERSION, list(resolution), sys.byteorder)
+        if (index.get("version"), index.get("resolution"), index.get("byteorder")) != expected:
+            print(f"Ignoring asset bundle {index_path}: built for another version or display")
+            return None
+        for path, stamp in index["sources"].items():
+            if not os.path.exists(path) or source_stamp(path) != stamp:
+                print(f"Ignoring stale asset bundle {index_path}: {path} changed")
+                return None
+
+        print(f"Using asset bundle {data_path} ({len(index['entries'])} entries)")
+        return cls(data_path, index)
+
+    def surface(self, key):
+        """Baked surface for `key`, or None if the bundle does not have it"""
+        surface = self.surfaces.get(key)
+        if surface is None:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            offset, width, height = entry
+            buffer = self.view[offset:offset + width * height * 4]
+            surface = pygame.image.frombuffer(buffer, (width, height), PIXEL_FORMAT)
+            if not self.native:
+                surface = surface.convert_alpha()
+            self.surfaces[key] = surface
+        return surface
+
+    def close(self):
+        """Drop the bundle's references; the mapping is unmapped once no surface uses it"""
+        self.surfaces.clear()
+        self.file.close()
+        try:
+            self.view.release()
+            self.data.close()
+        except BufferError:
+            # Backgrounds, icons and cached sprites still wrap the mapping;
+            # it goes away with the last of them.
+            pass
+
+
+def default_slot_sizes(resolution):
+    """Item slot size for `resolution`, using the item panel geometry of GreedyBagRace.init_gui"""
+    from gui.panels import ItemPanel
+    width, height = resolution
+    return [ItemPanel(0, 0, width // 3, height - 200).grid_metrics()[2]]
+
+
+def build_bundle(resolution, slot_sizes, directory=BUNDLE_DIR):
+    """Bake every item frame, avatar and background for `resolution` into a bundle"""
+    from gui.background import BACKGROUND_CONFIG
+    from gui.panels import AVATAR_PATHS, AVATAR_SIZE
+    from gui.sprites import ITEM_IMAGE_DIR, SpriteCache
+
+    os.makedirs(directory, exist_ok=True)
+    data_path, index_path = bundle_paths(resolution, directory)
+    sprites = SpriteCache()
+    entries = {}
+    sources = {}
+
+    with open(data_path + ".tmp", "wb") as out:
+        def write(key, surface, source):
+            offset = out.tell()
+            out.write(pygame.image.tobytes(surface, PIXEL_FORMAT))
+            out.write(bytes(-out.tell() % ALIGNMENT))
+            entries[key] = [offset, surface.get_width(), surface.get_height()]
+            sources[source] = source_stamp(source)
+
+        for filename in sorted(os.listdir(ITEM_IMAGE_DIR)):
+            if not filename.endswith(".png"):
+                continue
+            path = os.path.join(ITEM_IMAGE_DIR, filename)
+            image = pygame.image.load(path)
+            for slot_size in slot_sizes:
+                size = (slot_size, slot_size)
+                write(bundle_key(path, size, "sprite"), sprites.build_sprite(image, size), path)
+
+        for paths in AVATAR_PATHS.values():
+            for path in paths:
+                icon = pygame.transform.scale(pygame.image.load(path), AVATAR_SIZE)
+                write(bundle_key(path, AVATAR_SIZE), icon, path)
+
+        for path in sorted({path for frames in BACKGROUND_CONFIG.values() for path in frames}):
+            if os.path.exists(path):
+                frame = pygame.transform.scale(pygame.image.load(path), resolution)
+                write(bundle_key(path, resolution), frame, path)
+
+    index = {
+        "version": BUNDLE_VERSION,
+        "resolution": list(resolution),
+        "byteorder": sys.byteorder,
+        "slot_sizes": list(slot_sizes),
+        "sources": sources,
+        "entries": entries,
+    }
+    with open(index_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(data_path + ".tmp", data_path)
+    os.replace(index_path + ".tmp", index_path)
+    return data_path, len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bake the Greedy Bag Race asset bundle")
+    parser.add_argument("--resolution", metavar="WxH", help="render size: the game's --render-size, or the desktop size (default)")
+    parser.add_argument("--slot", type=int, action="append", help="item slot size to bake (repeatable)")
+    parser.add_argument("--out", default=BUNDLE_DIR)
+    args = parser.parse_args()
+
+    pygame.init()
+    if args.resolution:
+        resolution = tuple(int(n) for n in args.resolution.lower().split("x"))
+    else:
+        resolution = pygame.display.get_desktop_sizes()[0]
+    slot_sizes = args.slot or default_slot_sizes(resolution)
+
+    data_path, count = build_bundle(resolution, slot_sizes, args.out)
+    print(f"Wrote {count} entries for {resolution[0]}x{resolution[1]} "
+          f"(slots {slot_sizes}) to {data_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,288 @@
+"""Headless export of a recorded game (see backend.replay) as video frames.
+
+    python -m gui.export game.jsonl --out clip --fps 30
+    ffmpeg -framerate 30 -i clip/frame_%06d.png clip.mp4
+
+Frames are drawn on the SDL dummy video driver with the game's own panels
+and effects, laid out as in GreedyBagRace.init_gui. --format raw writes a
+single RGB24 stream (clip/frames.rgb) instead, for
+
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 1920x1080 -r 30 -i clip/frames.rgb clip.mp4
+
+The timeline is a pure function of the recording: move i plays at
+INTRO_MS + i * move_ms, and the random look of each move's effects is
+seeded by its index. That lets the frame range be split into chunks
+rendered by a process pool. A worker re-simulates from the first frame up
+to its chunk, applying moves and advancing timers without drawing, and
+only adds effects from EFFECT_MS before the chunk, which is longer than
+any effect lives. Chunks therefore come out as a serial render would, as
+long as a move's particles die before the next move (move_ms >= 800).
+"""
+import argparse
+import math
+import os
+import shutil
+import struct
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import pygame
+
+from backend.replay import Recording
+from gui.animations import AnimationManager
+from gui.assets import assets
+from gui.background import AnimatedBackground, BackgroundManager
+from gui.bundle import AssetBundle
+from gui.panels import BagPanel, ItemPanel, StatusPanel
+
+EXPORT_SIZE = (1920, 1080)
+EXPORT_FPS = 30
+MOVE_MS = 1000
+INTRO_MS = 1000
+OUTRO_MS = 3000
+# Longer than the longest effect (the 1.6 s celebration).
+EFFECT_MS = 2000
+BIG_PICK_VALUE = 20
+BIG_PICK_PARTICLES = 150
+# zlib level for PNG frames; pygame's own encoder compresses hard and costs ~10x the drawing.
+PNG_COMPRESSION = 1
+CHUNKS_PER_WORKER = 4
+MIN_CHUNK_FRAMES = 30
+BG_COLOR = (45, 45, 65)
+STATE = "IN_GAME_SINGLE"
+
+_recordings = {}
+_backgrounds = {}
+
+
+def total_frames(move_count, fps=EXPORT_FPS, move_ms=MOVE_MS):
+    return math.ceil((INTRO_MS + move_count * move_ms + OUTRO_MS) * fps / 1000)
+
+
+def write_png(path, surface, level=PNG_COMPRESSION):
+    """Save `surface` as an 8-bit RGB PNG compressed at zlib `level`"""
+    width, height = surface.get_size()
+    pixels = pygame.image.tobytes(surface, "RGB")
+    stride = width * 3
+    rows = b"".join(b"\x00" + pixels[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack("!I", len(data)) + kind + data + struct.pack("!I", zlib.crc32(kind + data))
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack("!IIBBBBB", width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(rows, level)))
+        f.write(chunk(b"IEND", b""))
+
+
+class ReplayRenderer:
+    """Draws the frames of a recorded game; advance(frame) must be called for every frame in order.
+
+    Effects are only added for moves from `effects_from_ms` on.
+    """
+
+    def __init__(self, recording, size=EXPORT_SIZE, fps=EXPORT_FPS, move_ms=MOVE_MS, effects_from_ms=0):
+        self.recording = recording
+        self.engine = recording.new_engine()
+        self.engine.add_move_listener(self.on_move)
+        self.fps = fps
+        self.frame_ms = 1000 / fps
+        self.move_ms = move_ms
+        self.effects_from_ms = effects_from_ms
+        self.next_move = 0
+        self.celebrated = False
+        self.changed = True
+
+        self.screen = pygame.display.get_surface()
+        width, height = size
+        panel_width = width // 4
+        panel_height = height - 200
+        item_panel_width = width // 3
+        seats = self.engine.ai_players
+        self.player_panels = [
+            BagPanel(50, 150, panel_width, panel_height, "Player 1",
+                     player_type="ai" if 0 in seats else "human", player_index=0),
+            BagPanel(width - 150, 150, panel_width, panel_height, "Player 2",
+                     player_type="ai" if 1 in seats else "human", player_index=1),
+        ]
+        self.item_panel = ItemPanel((width - item_panel_width) // 2, 150, item_panel_width, height - 200)
+        self.status_panel = StatusPanel(50, 50, width - 100, 80)
+        self.animation_manager = AnimationManager()
+
+        backgrounds = _backgrounds.get(size)
+        if backgrounds is None:
+            backgrounds = _backgrounds[size] = BackgroundManager(width, height)
+        shared = backgrounds.get_background(STATE)
+        self.background = AnimatedBackground(list(shared.frames), fps=shared.fps) if shared else None
+
+    def on_move(self, move):
+        self.changed = True
+
+    def move_time(self, index):
+        return INTRO_MS + index * self.move_ms
+
+    def advance(self, frame):
+        """Bring the game, timers and effects to frame `frame` (the one after the last call)"""
+        now = frame * self.frame_ms
+        if frame > 0:
+            self.animation_manager.update(self.frame_ms)
+            for panel in self.player_panels + [self.item_panel]:
+                panel.tick(self.frame_ms)
+            if self.background:
+                self.background.update(self.frame_ms)
+
+        moves = self.recording.moves
+        while self.next_move < len(moves) and self.move_time(self.next_move) <= now:
+            self.play_move(self.next_move, self.move_time(self.next_move) >= self.effects_from_ms)
+            self.next_move += 1
+
+        if self.engine.game_over and not self.celebrated:
+            self.celebrated = True
+            if self.move_time(max(0, len(moves) - 1)) >= self.effects_from_ms:
+                self.animation_manager.seed(len(moves))
+                self.animation_manager.add_celebration(self.screen.get_rect())
+
+    def play_move(self, index, effects):
+        move = self.recording.moves[index]
+        if not effects or move["op"] != "pick":
+            self.recording.apply(self.engine, index, index + 1)
+            return
+
+        self.refresh()
+        player = self.engine.players[move["player"]]
+        score_before = player.total_value
+        start_pos = self.item_panel.get_item_position(move["item"])
+        self.recording.apply(self.engine, index, index + 1)
+        score_diff = player.total_value - score_before
+        if start_pos:
+            self.animation_manager.seed(index)
+            count = BIG_PICK_PARTICLES if score_diff >= BIG_PICK_VALUE else 25
+            self.animation_manager.add_particle_effect(start_pos, particle_count=count)
+            if score_diff > 0:
+                end_pos = self.player_panels[move["player"]].layout()["score_rect"].center
+                self.animation_manager.add_score_animation(score_diff, start_pos, end_pos)
+
+    def refresh(self):
+        """Copy the engine state into the panels if it changed"""
+        if not self.changed:
+            return
+        self.changed = False
+        game_state = self.engine.get_game_state()
+        for panel, player in zip(self.player_panels, game_state["players"]):
+            panel.update_player_data(player["bag"], player["weight"], self.engine.bag_capacity, player["value"])
+        self.item_panel.update_items(game_state["available_items"])
+        if self.engine.game_over:
+            self.status_panel.update_turn(f"Winner: {game_state['winner']}" if game_state["winner"] else "Tie!")
+        else:
+            self.status_panel.update_turn(f"Current Turn: {game_state['players'][game_state['current_player']]['name']}")
+
+    def draw(self):
+        self.refresh()
+        if self.background:
+            self.background.draw(self.screen)
+        else:
+            self.screen.fill(BG_COLOR)
+        for panel in self.player_panels + [self.item_panel, self.status_panel]:
+            panel.draw(self.screen)
+        self.animation_manager.interpolate(1.0)
+        self.animation_manager.draw(self.screen)
+        return self.screen
+
+
+def init_worker(size):
+    """Set up headless pygame in this process: dummy drivers, a `size` display and blocking asset loads"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    pygame.display.set_mode(size)
+    assets.streaming = False
+    assets.bundle = AssetBundle.load(size)
+
+
+def render_chunk(path, start, stop, out, frame_format, size, fps, move_ms):
+    """Render frames [start, stop) of the recording at `path`; returns how many were written"""
+    recording = _recordings.get(path)
+    if recording is None:
+        recording = _recordings[path] = Recording.load(path)
+    renderer = ReplayRenderer(recording, size, fps, move_ms, effects_from_ms=start * 1000 / fps - EFFECT_MS)
+
+    stream = open(os.path.join(out, f"part-{start:06d}.rgb"), "wb") if frame_format == "raw" else None
+    try:
+        for frame in range(stop):
+            renderer.advance(frame)
+            if frame < start:
+                continue
+            screen = renderer.draw()
+            if stream:
+                stream.write(pygame.image.tobytes(screen, "RGB"))
+            else:
+                write_png(os.path.join(out, f"frame_{frame:06d}.png"), screen)
+    finally:
+        if stream:
+            stream.close()
+    return stop - start
+
+
+def export(path, out, frame_format="png", size=EXPORT_SIZE, fps=EXPORT_FPS, move_ms=MOVE_MS, workers=None):
+    """Render every frame of the recording at `path` into `out`; returns the frame count"""
+    os.makedirs(out, exist_ok=True)
+    frames = total_frames(len(Recording.load(path).moves), fps, move_ms)
+    workers = workers or os.cpu_count() or 1
+    chunk = max(MIN_CHUNK_FRAMES, math.ceil(frames / (workers * CHUNKS_PER_WORKER)))
+    chunks = [(start, min(frames, start + chunk)) for start in range(0, frames, chunk)]
+
+    done = 0
+    if workers == 1:
+        init_worker(size)
+        for start, stop in chunks:
+            done += render_chunk(path, start, stop, out, frame_format, size, fps, move_ms)
+            print(f"Rendered {done}/{frames} frames")
+    else:
+        # Spawned rather than forked workers: each starts with its own SDL state.
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn"),
+                                 initializer=init_worker, initargs=(size,)) as pool:
+            futures = [pool.submit(render_chunk, path, start, stop, out, frame_format, size, fps, move_ms)
+                       for start, stop in chunks]
+            for future in as_completed(futures):
+                done += future.result()
+                print(f"Rendered {done}/{frames} frames")
+
+    if frame_format == "raw":
+        with open(os.path.join(out, "frames.rgb"), "wb") as stream:
+            for start, _ in chunks:
+                part = os.path.join(out, f"part-{start:06d}.rgb")
+                with open(part, "rb") as f:
+                    shutil.copyfileobj(f, stream)
+                os.remove(part)
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a recorded Greedy Bag Race game to video frames")
+    parser.add_argument("recording", help="recording file (see python -m backend.replay)")
+    parser.add_argument("--out", default="export", help="directory for the frames")
+    parser.add_argument("--format", choices=("png", "raw"), default="png",
+                        help="numbered PNG files, or one raw RGB24 stream (frames.rgb)")
+    parser.add_argument("--size", default=f"{EXPORT_SIZE[0]}x{EXPORT_SIZE[1]}", metavar="WxH")
+    parser.add_argument("--fps", type=int, default=EXPORT_FPS)
+    parser.add_argument("--move-ms", type=int, default=MOVE_MS, help="time between moves")
+    parser.add_argument("--workers", type=int, help="rendering processes (default: one per CPU)")
+    args = parser.parse_args()
+
+    size = tuple(int(n) for n in args.size.lower().split("x"))
+    started = time.perf_counter()
+    frames = export(args.recording, args.out, args.format, size, args.fps, args.move_ms, args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {frames} frames ({frames / args.fps:.1f} s of video) to {args.out} in {elapsed:.1f} s")
+    if args.format == "raw":
+        print(f"Encode with: ffmpeg -f rawvideo -pix_fmt rgb24 -s {size[0]}x{size[1]} -r {args.fps} "
+              f"-i {os.path.join(args.out, 'frames.rgb')} out.mp4")
+    else:
+        print(f"Encode with: ffmpeg -framerate {args.fps} -i {os.path.join(args.out, 'frame_%06d.png')} out.mp4")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import pygame
+
+OVERLAY_WIDTH = 360
+SHARED = "shared"
+
+
+def surface_bytes(surface):
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+def sound_bytes(sound):
+    """Size of a decoded sound's sample buffer in the mixer's format"""
+    mixer = pygame.mixer.get_init()
+    if mixer is None:
+        return 0
+    frequency, sample_format, channels = mixer
+    return int(sound.get_length() * frequency) * channels * (abs(sample_format) // 8)
+
+
+def megabytes(count):
+    return f"{count / (1024 * 1024):.1f} MB"
+
+
+class MemoryTracker:
+    """Pixel and sample memory held by the game's caches, by owner and by state.
+
+    Every cache registers a report function returning {state: bytes} (caches
+    not tied to a game state report under SHARED), an optional byte budget
+    and an optional shrink(target_bytes) hook that frees memory until the
+    cache is at or below the target and returns the bytes freed. enforce()
+    shrinks caches over their own budget and then, while the total is over
+    `budget_bytes`, shrinks caches by ascending `priority` (cheapest to
+    rebuild first). report() is the API; the F6 overlay draws it.
+    """
+
+    def __init__(self, budget_bytes=None):
+        self.budget_bytes = budget_bytes
+        self.owners = {}
+        self.visible = False
+        self.overlay = None
+        self.position = (10, 10)
+
+    def register(self, owner, report, budget_bytes=None, shrink=None, priority=0):
+        self.owners[owner] = (report, budget_bytes, shrink, priority)
+
+    def unregister(self, owner):
+        self.owners.pop(owner, None)
+
+    def usage(self, owner):
+        return sum(self.owners[owner][0]().values())
+
+    def report(self):
+        """{"total", "budget", "owners": {owner: {"bytes", "budget", "states"}}, "states": {state: bytes}}"""
+        owners = {}
+        states = {}
+        for owner, (report, budget_bytes, _, _) in self.owners.items():
+            by_state = report()
+            owners[owner] = {"bytes": sum(by_state.values()), "budget": budget_bytes, "states": by_state}
+            for state, count in by_state.items():
+                states[state] = states.get(state, 0) + count
+        return {
+            "total": sum(entry["bytes"] for entry in owners.values()),
+            "budget": self.budget_bytes,
+            "owners": owners,
+            "states": states,
+        }
+
+    def shrink(self, owner, target_bytes):
+        """Ask `owner` to free memory down to `target_bytes`; returns the bytes freed"""
+        shrink = self.owners[owner][2]
+        return shrink(max(0, target_bytes)) if shrink else 0
+
+    def enforce(self):
+        """Shrink caches over their budgets and then toward the overall budget; returns bytes freed"""
+        freed = 0
+        for owner, (_, budget_bytes, shrink, _) in list(self.owners.items()):
+            if shrink and budget_bytes is not None and self.usage(owner) > budget_bytes:
+                freed += self.shrink(owner, budget_bytes)
+
+        if self.budget_bytes is not None:
+            excess = self.report()["total"] - self.budget_bytes
+            for owner in sorted(self.owners, key=lambda owner: self.owners[owner][3]):
+                if excess <= 0:
+                    break
+                released = self.shrink(owner, self.usage(owner) - excess)
+                excess -= released
+                freed += released
+        return freed
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.overlay = None
+        return self.visible
+
+    def get_bounds(self):
+        if not self.visible or self.overlay is None:
+            return None
+        return pygame.Rect(self.position, self.overlay.get_size())
+
+    def build_overlay(self):
+        from gui.text_rendering import render_text
+        font_size = 14
+        line_height = font_size + 2
+        report = self.report()
+        rows = [("owner", "used", "budget", (255, 215, 0))]
+        for owner, entry in report["owners"].items():
+            budget = megabytes(entry["budget"]) if entry["budget"] is not None else "-"
+            over = entry["budget"] is not None and entry["bytes"] > entry["budget"]
+            rows.append((owner, megabytes(entry["bytes"]), budget, (240, 80, 80) if over else (240, 240, 240)))
+        budget = megabytes(report["budget"]) if report["budget"] is not None else "-"
+        rows.append(("total", megabytes(report["total"]), budget, (180, 180, 255)))
+        rows.append(("state", "used", "", (255, 215, 0)))
+        for state, count in sorted(report["states"].items(), key=lambda item: -item[1]):
+            rows.append((state, megabytes(count), "", (240, 240, 240)))
+
+        overlay = pygame.Surface((OVERLAY_WIDTH, len(rows) * line_height + 8), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 190))
+        for index, (label, used, budget, color) in enumerate(rows):
+            y = 4 + index * line_height
+            overlay.blit(render_text(label, "arial", font_size, color), (6, y))
+            for x, cell in ((260, used), (350, budget)):
+                if cell:
+                    text = render_text(cell, "arial", font_size, color)
+                    overlay.blit(text, text.get_rect(topright=(x, y)))
+        return overlay
+
+    def update(self):
+        """Rebuild the overlay; returns the screen area to redraw, or None"""
+        if not self.visible:
+            return None
+        old_bounds = self.get_bounds()
+        self.overlay = self.build_overlay()
+        new_bounds = self.get_bounds()
+        return old_bounds.union(new_bounds) if old_bounds else new_bounds
+
+    def draw(self, surface):
+        if self.visible and self.overlay is not None:
+            surface.blit(self.overlay, self.position)
+
+
+memory = MemoryTracker()
@@ -1,6 +1,24 @@
 import pygame
 import os
 from config import *
+from gui.text_rendering import render_text
+from gui.assets import assets, GAME
+from gui.sprites import sprite_cache
+from gui.skins import chrome_cache
+from gui.memory import surface_bytes, SHARED
+
+AVATAR_PATHS = {
+    "human": [
+        os.path.join("assets", "images", "ui", "avatar11.png"),
+        os.path.join("assets", "images", "ui", "avatar12.png")
+    ],
+    "ai": [
+        os.path.join("assets", "images", "ui", "avatar21.png"),
+        os.path.join("assets", "images", "ui", "avatar22.png")
+    ]
+}
+AVATAR_SIZE = (32, 32)
+SPRITE_FRAME_MS = 10 * 1000 / 60
 
 class BagPanel:
     def __init__(self, x, y, width, height, player_name, player_type="human", player_index=0):
@@ -13,25 +31,15 @@ class BagPanel:
         self.capacity = 25
         self.score = 0
         self.score_rect = None
-        self.item_images = {}
+        self.slot_layout_size = None
         self.animation_frame = 0
         self.animation_timer = 0
+        self.dirty = True
+        self.scaled_icons = {}
         
-        self.icons = {
-            "human": [
-                pygame.image.load(os.path.join("assets", "images", "ui", "avatar11.png")).convert_alpha(),
-                pygame.image.load(os.path.join("assets", "images", "ui", "avatar12.png")).convert_alpha()
-            ],
-            "ai": [
-                pygame.image.load(os.path.join("assets", "images", "ui", "avatar21.png")).convert_alpha(),
-                pygame.image.load(os.path.join("assets", "images", "ui", "avatar22.png")).convert_alpha()
-            ]
-        }
-        
-        icon_size = (32, 32)
-        for player_type in self.icons:
-            for i in range(len(self.icons[player_type])):
-                self.icons[player_type][i] = pygame.transform.scale(self.icons[player_type][i], icon_size)
+        self.icons = {}
+        for path in AVATAR_PATHS[self.player_type]:
+            assets.request(path, "image", GAME, convert=False)
         
         self.player_colors = [
             (0, 150, 255),
@@ -50,102 +58,129 @@ class BagPanel:
         self.slot_size = int(min(width, height) * 0.08)
         self.text_color = (255, 255, 255)
     
-    def draw(self, surface):
-        self.animation_timer += 1
-        if self.animation_timer >= 10:
-            self.animation_timer = 0
+    def set_player_type(self, player_type):
+        """Switch the avatar between the "human" and "ai" sprites"""
+        if player_type == self.player_type:
+            return
+        self.player_type = player_type
+        for path in AVATAR_PATHS[player_type]:
+            assets.request(path, "image", GAME, convert=False)
+        self.dirty = True
+    
+    def tick(self, dt=1000 / 60):
+        """Advance the avatar and item sprite animation by `dt` milliseconds"""
+        self.animation_timer += dt
+        if self.animation_timer >= SPRITE_FRAME_MS:
+            self.animation_timer %= SPRITE_FRAME_MS
             self.animation_frame = 1 - self.animation_frame
-        
-        self.draw_pixel_art_panel(surface, self.rect)
-        
+            self.dirty = True
+    
+    def time_to_next_frame(self):
+        return SPRITE_FRAME_MS - self.animation_timer
+    
+    def layout(self):
+        """Positions and text surfaces for everything draw() puts on screen"""
         font_size = int(self.rect.height * 0.03)
-        font = pygame.font.SysFont('Arial', font_size, bold=False)
+        small_font_size = int(font_size * 0.5)
         
         bar_width = 70
         bar_height = 620
-        progress_y = self.rect.y + 20
         progress_x = self.rect.x + 20
-        self.draw_pixel_art_progress_bar(surface, progress_x, progress_y, font)
+        progress_y = self.rect.y + 20
         
         icon_size = int(bar_width * 1.2)
-        icon_x = progress_x + (bar_width - icon_size) // 2
-        icon_y = progress_y - icon_size - 5
+        icon_rect = pygame.Rect(progress_x + (bar_width - icon_size) // 2,
+                                progress_y - icon_size - 5, icon_size, icon_size)
         
-        current_icon = self.icons[self.player_type][self.animation_frame]
-        scaled_icon = pygame.transform.scale(current_icon, (icon_size, icon_size))
-        surface.blit(scaled_icon, (icon_x, icon_y))
-        
-        name_font_size = int(icon_size * 0.1)
-        name_font = pygame.font.SysFont('Arial', name_font_size, bold=True)
-        
-        text_surf = font.render(self.player_name, True, self.text_color)
-        text_rect = text_surf.get_rect(
-            midtop=(progress_x + bar_width // 2, 
-                   icon_y + icon_size + 5)
-        )
-        surface.blit(text_surf, text_rect)
+        name_surf = render_text(self.player_name, 'Arial', font_size, self.text_color)
+        name_rect = name_surf.get_rect(midtop=(progress_x + bar_width // 2, icon_rect.bottom + 5))
         
         score_text = f"Score: {self.score:.2f}"
         capacity_text = f"Bag: {(int)(self.total_weight)}/{self.capacity} kg"
+        info_start_y = progress_y + bar_height + 15
         
-        small_font_size = int(font_size * 0.5)
-        small_font = pygame.font.SysFont('Arial', small_font_size)
+        score_surf = render_text(score_text, 'Arial', small_font_size, self.text_color)
+        score_rect = score_surf.get_rect(midtop=(progress_x + bar_width // 2, info_start_y))
+        capacity_surf = render_text(capacity_text, 'Arial', small_font_size, self.text_color)
+        capacity_rect = capacity_surf.get_rect(midtop=(progress_x + bar_width // 2, score_rect.bottom + 5))
         
-        info_start_y = progress_y + bar_height + 15
+        return {
+            "bar_rect": pygame.Rect(progress_x, progress_y, bar_width, bar_height),
+            "icon_rect": icon_rect,
+            "texts": [(name_surf, name_rect), (score_surf, score_rect), (capacity_surf, capacity_rect)],
+            "score_rect": score_rect,
+        }
+    
+    def get_bounds(self):
+        """Screen area draw() can touch with the current data"""
+        layout = self.layout()
+        return layout["bar_rect"].union(layout["icon_rect"]).unionall([rect for _, rect in layout["texts"]])
+    
+    def get_source_icon(self, player_type, frame):
+        """Avatar frame at AVATAR_SIZE, or None while it is still loading"""
+        key = (player_type, frame)
+        icon = self.icons.get(key)
+        if icon is None:
+            path = AVATAR_PATHS[player_type][frame]
+            icon = assets.baked(path, AVATAR_SIZE)
+            if icon is None:
+                image = assets.image(path, GAME, convert=False)
+                if image is None:
+                    return None
+                icon = pygame.transform.scale(image, AVATAR_SIZE)
+            self.icons[key] = icon
+        return icon
+    
+    def memory_usage(self):
+        icons = list(self.icons.values()) + list(self.scaled_icons.values())
+        return {SHARED: sum(surface_bytes(icon) for icon in icons)}
+    
+    def shrink(self, target_bytes):
+        """Drop the avatar icons if over `target_bytes`; they are rebuilt on the next draw"""
+        used = self.memory_usage()[SHARED]
+        if used <= target_bytes:
+            return 0
+        self.icons.clear()
+        self.scaled_icons.clear()
+        self.dirty = True
+        return used
+    
+    def get_icon(self, size):
+        key = (self.player_type, self.animation_frame, size)
+        icon = self.scaled_icons.get(key)
+        if icon is None:
+            source = self.get_source_icon(self.player_type, self.animation_frame)
+            if source is None:
+                return sprite_cache.get_placeholder((size, size))
+            icon = pygame.transform.scale(source, (size, size)).convert_alpha()
+            self.scaled_icons[key] = icon
+        return icon
+    
+    def draw(self, surface):
+        self.draw_pixel_art_panel(surface, self.rect)
         
-        score_surf = small_font.render(score_text, True, self.text_color)
-        score_rect = score_surf.get_rect(
-            midtop=(self.rect.x + 20 + bar_width // 2, info_start_y)
-        )
-        self.score_rect = score_rect
-        surface.blit(score_surf, score_rect)
+        layout = self.layout()
+        bar_rect = layout["bar_rect"]
+        self.draw_pixel_art_progress_bar(surface, bar_rect.x, bar_rect.y)
         
-        capacity_surf = small_font.render(capacity_text, True, self.text_color)
-        capacity_rect = capacity_surf.get_rect(
-            midtop=(self.rect.x + 20 + bar_width // 2, score_rect.bottom + 5)
-        )
-        surface.blit(capacity_surf, capacity_rect)
+        icon_rect = layout["icon_rect"]
+        surface.blit(self.get_icon(icon_rect.width), icon_rect)
         
+        for text_surf, text_rect in layout["texts"]:
+            surface.blit(text_surf, text_rect)
+        self.score_rect = layout["score_rect"]
 
     def draw_pixel_art_panel(self, surface, rect):
-        pixel_size = 4
-        width_pixels = rect.width // pixel_size
-        height_pixels = rect.height // pixel_size
-        
-        for py in range(height_pixels):
-            for px in range(width_pixels):
-                pixel_x = rect.x + px * pixel_size
-                pixel_y = rect.y + py * pixel_size
-                
-                if px == 0 or px == width_pixels - 1 or py == 0 or py == height_pixels - 1:
-                    color = (255, 255, 255)
-                else:
-                    color = (200, 200, 200)
-                
+        """The panel has no chrome of its own; the background art frames it."""
 
-    def draw_pixel_art_progress_bar(self, surface, x_pos, y_pos, font):
+    def draw_pixel_art_progress_bar(self, surface, x_pos, y_pos):
         bar_width = 70
         bar_height = 620
         pixel_size = 4
         
-        width_pixels = bar_width // pixel_size
         height_pixels = bar_height // pixel_size
-        
-        for py in range(height_pixels):
-            for px in range(width_pixels):
-                pixel_x = x_pos + px * pixel_size
-                pixel_y = y_pos + py * pixel_size
-                
-                if px == 0 or px == width_pixels - 1 or py == 0 or py == height_pixels - 1:
-                    color = self.progress_dark
-                elif px == 1 or px == width_pixels - 2 or py == 1 or py == height_pixels - 2:
-                    color = self.progress_medium
-                elif px == 2 or px == width_pixels - 3 or py == 2 or py == height_pixels - 3:
-                    color = self.progress_light
-                else:
-                    color = self.progress_bg
-                
-                pygame.draw.rect(surface, color, (pixel_x, pixel_y, pixel_size, pixel_size))
+        frame, corners, fill = self.get_progress_layers(bar_width, bar_height, pixel_size)
+        surface.blit(frame, (x_pos, y_pos))
         
         if self.capacity > 0 and self.total_weight > 0:
             fill_ratio = min(1.0, self.total_weight / self.capacity)
@@ -153,12 +188,40 @@ class BagPanel:
             
             fill_start_x = x_pos + 3 * pixel_size
             fill_start_y = y_pos + bar_height - (fill_height_pixels * pixel_size)
-            
-            for py in range(fill_height_pixels):
-                for px in range(width_pixels - 6):
-                    pixel_x = fill_start_x + px * pixel_size
-                    pixel_y = fill_start_y + py * pixel_size
+            surface.blit(fill, (fill_start_x, fill_start_y),
+                         (0, 0, fill.get_width(), fill_height_pixels * pixel_size))
+        
+        surface.blit(corners, (x_pos, y_pos))
+
+    def get_progress_layers(self, bar_width, bar_height, pixel_size):
+        """Cached frame, corner and full-height fill layers of the progress bar.
+
+        The fill pattern is anchored at the top of the filled part, so any fill
+        level is the top slice of the full-height layer.
+        """
+        width_pixels = bar_width // pixel_size
+        height_pixels = bar_height // pixel_size
+        colors = (self.progress_dark, self.progress_medium, self.progress_light, self.progress_bg,
+                  self.progress_fill_dark, self.progress_fill_light)
+        key = (bar_width, bar_height, pixel_size, colors)
+        
+        def build_frame(layer):
+            for py in range(height_pixels):
+                for px in range(width_pixels):
+                    if px == 0 or px == width_pixels - 1 or py == 0 or py == height_pixels - 1:
+                        color = self.progress_dark
+                    elif px == 1 or px == width_pixels - 2 or py == 1 or py == height_pixels - 2:
+                        color = self.progress_medium
+                    elif px == 2 or px == width_pixels - 3 or py == 2 or py == height_pixels - 3:
+                        color = self.progress_light
+                    else:
+                        color = self.progress_bg
                     
+                    pygame.draw.rect(layer, color, (px * pixel_size, py * pixel_size, pixel_size, pixel_size))
+        
+        def build_fill(layer):
+            for py in range(height_pixels):
+                for px in range(width_pixels - 6):
                     if (px + py) % 4 == 0:
                         color = self.progress_fill_light
                     else:
@@ -167,18 +230,22 @@ class BagPanel:
                     if (px * py) % 7 == 0:
                         color = (min(255, color[0] + 10), min(255, color[1] + 10), min(255, color[2] + 10))
                     
-                    pygame.draw.rect(surface, color, (pixel_x, pixel_y, pixel_size, pixel_size))
+                    pygame.draw.rect(layer, color, (px * pixel_size, py * pixel_size, pixel_size, pixel_size))
             
-            top_cap_y = fill_start_y
+            cap_color = (min(255, self.progress_fill_light[0] + 20), 
+                       min(255, self.progress_fill_light[1] + 20), 
+                       min(255, self.progress_fill_light[2] + 20))
             for px in range(width_pixels - 6):
-                pixel_x = fill_start_x + px * pixel_size
-                cap_color = (min(255, self.progress_fill_light[0] + 20), 
-                           min(255, self.progress_fill_light[1] + 20), 
-                           min(255, self.progress_fill_light[2] + 20))
-                pygame.draw.rect(surface, cap_color, (pixel_x, top_cap_y, pixel_size, pixel_size))
+                pygame.draw.rect(layer, cap_color, (px * pixel_size, 0, pixel_size, pixel_size))
         
+        def build_corners(layer):
+            self.draw_pixel_corners(layer, 0, 0, bar_width, bar_height, pixel_size)
         
-        self.draw_pixel_corners(surface, x_pos, y_pos, bar_width, bar_height, pixel_size)
+        frame = chrome_cache.get(("progress_frame",) + key, build_frame, (bar_width, bar_height))
+        corners = chrome_cache.get(("progress_corners",) + key, build_corners, (bar_width, bar_height))
+        fill = chrome_cache.get(("progress_fill",) + key, build_fill,
+                                ((width_pixels - 6) * pixel_size, height_pixels * pixel_size))
+        return frame, corners, fill
 
     def draw_pixel_corners(self, surface, x, y, width, height, pixel_size):
         corner_size = 3
@@ -202,20 +269,32 @@ class BagPanel:
         available_width = self.rect.width - (start_x - self.rect.x) - padding
         available_height = self.rect.bottom - start_y - padding
         slot_size = min(self.slot_size, available_width // slots_per_row, available_height // rows - padding)
+        if slot_size != self.slot_layout_size:
+            if self.slot_layout_size is not None:
+                sprite_cache.invalidate((self.slot_layout_size, self.slot_layout_size))
+            self.slot_layout_size = slot_size
+        
+        filled = min(len(self.items), 25)
+        
+        def build_outlines(layer):
+            for i in range(filled, 25):
+                row = i // slots_per_row
+                col = i % slots_per_row
+                slot_rect = (col * (slot_size + padding), row * (slot_size + padding), slot_size, slot_size)
+                pygame.draw.rect(layer, (50, 50, 50), slot_rect, 1)
         
-        for i in range(25):
+        grid_size = (slots_per_row * (slot_size + padding), rows * (slot_size + padding))
+        outlines = chrome_cache.get(("bag_slots", slot_size, padding, filled), build_outlines, grid_size)
+        surface.blit(outlines, (start_x, start_y))
+        
+        for i in range(filled):
             row = i // slots_per_row
             col = i % slots_per_row
             
             x = start_x + col * (slot_size + padding)
             y = start_y + row * (slot_size + padding)
             
-            slot_rect = pygame.Rect(x, y, slot_size, slot_size)
-            
-            if i < len(self.items):
-                self.draw_item(surface, slot_rect, self.items[i])
-            else:
-                pygame.draw.rect(surface, (50, 50, 50), slot_rect, 1)
+            self.draw_item(surface, pygame.Rect(x, y, slot_size, slot_size), self.items[i])
 
     def draw_item(self, surface, slot_rect, item):
         if not item:
@@ -226,75 +305,19 @@ class BagPanel:
             pygame.draw.rect(surface, (100, 100, 100), slot_rect, border_radius=8)
             return
 
-        try:
-            base_num = ''.join(filter(str.isdigit, image_filename))
-            if not base_num:
-                base_num = '1'
-                
-            frame_prefix = 'i' if self.animation_frame == 0 else 'j'
-            frame_filename = f"{frame_prefix}{base_num}.png"
-            
-            if frame_filename not in self.item_images:
-                try:
-                    image_path = os.path.join('assets','images', 'items', frame_filename)
-                    if not os.path.exists(image_path):
-                        image_path = os.path.join('assets', 'images', 'items', image_filename)
-                    
-                    item_image = pygame.image.load(image_path).convert_alpha()
-                    self.item_images[frame_filename] = item_image
-                except Exception as e:
-                    print(f"Error loading {frame_filename}: {e}")
-                    item_image = pygame.Surface((32, 32), pygame.SRCALPHA)
-                    color = (100 + int(base_num) * 5, 100 + int(base_num) * 3, 200, 200)
-                    pygame.draw.rect(item_image, color, (0, 0, 32, 32))
-                    self.item_images[frame_filename] = item_image
-
-            item_surface = pygame.Surface((slot_rect.width, slot_rect.height), pygame.SRCALPHA)
-            
-            if frame_filename in self.item_images:
-                base_surface = pygame.Surface((slot_rect.width, slot_rect.height), pygame.SRCALPHA)
-                
-                scaled_img = pygame.transform.scale(
-                    self.item_images[frame_filename],
-                    (slot_rect.width, slot_rect.height)
-                )
-                
-                mask = pygame.Surface((slot_rect.width, slot_rect.height), pygame.SRCALPHA)
-                pygame.draw.rect(mask, (255, 255, 255, 255), 
-                              (0, 0, slot_rect.width, slot_rect.height), 
-                              border_radius=8)
-                
-                scaled_img.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-                base_surface.blit(scaled_img, (0, 0))
-                
-                border_rect = pygame.Rect(0, 0, slot_rect.width, slot_rect.height)
-                pygame.draw.rect(base_surface, (255, 215, 0, 255), 
-                              border_rect, 2, border_radius=8)
-                
-                surface.blit(base_surface, slot_rect)
-            
-        except Exception as e:
-            print(f"Error in draw_item: {e}")
-            item_surface = pygame.Surface((slot_rect.width, slot_rect.height), pygame.SRCALPHA)
-            pygame.draw.rect(item_surface, (200, 200, 200, 200), 
-                          (0, 0, slot_rect.width, slot_rect.height), 
-                          border_radius=8)
-            pygame.draw.rect(item_surface, (255, 215, 0, 255), 
-                          (0, 0, slot_rect.width, slot_rect.height), 
-                          2, border_radius=8)
-            surface.blit(item_surface, slot_rect)
-        
-        thin_font = pygame.font.SysFont('arial', max(8, slot_rect.height // 8))
+        surface.blit(sprite_cache.get_sprite(image_filename, self.animation_frame, slot_rect.size), slot_rect)
+        
+        label_size = max(8, slot_rect.height // 8)
         weight = int(item.weight if hasattr(item, 'weight') else item.get('weight', 0))
         value = int(item.value if hasattr(item, 'value') else item.get('value', 0))
         
         weight_text = f"W:{weight}"
-        weight_surf = thin_font.render(weight_text, True, (0, 0, 0))
+        weight_surf = render_text(weight_text, 'arial', label_size, (0, 0, 0))
         weight_rect = weight_surf.get_rect(topleft=(slot_rect.left + 1, slot_rect.top + 1))
         surface.blit(weight_surf, weight_rect)
         
         value_text = f"V:{value}"
-        value_surf = thin_font.render(value_text, True, (0, 0, 0))
+        value_surf = render_text(value_text, 'arial', label_size, (0, 0, 0))
         value_rect = value_surf.get_rect(bottomright=(slot_rect.right - 1, slot_rect.bottom - 1))
         surface.blit(value_surf, value_rect)
 
@@ -304,55 +327,119 @@ class BagPanel:
         return (self.rect.centerx, self.rect.y + 50)
     
     def update_player_data(self, items, total_weight, capacity, score):
+        if (len(items), total_weight, capacity, score) != (len(self.items), self.total_weight, self.capacity, self.score):
+            self.dirty = True
         self.items = items
         self.total_weight = total_weight
         self.capacity = capacity
         self.score = score
 
 class ItemPanel:
+    """Scrollable 5-column grid of the available items.
+
+    Only the visible rows are drawn and hit-testing is grid arithmetic, so
+    both cost the same for 25 items or thousands. By default an item sits in
+    the slot given by its handle, so slots never shift as items are taken;
+    set_view() switches to a sorted and/or filtered order instead.
+    """
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         self.items = []
-        self.item_rects = []
-        self.item_images = {}
+        self.items_by_handle = {}
+        self.order = None
+        self.slot_of = {}
+        self.total_slots = 0
+        self.scroll_row = 0
+        self.sort_key = None
+        self.max_weight = None
+        self.slot_layout_size = None
+        self.layout_cache = {}
         self.text_color = (255, 255, 255)
         self.slot_size = int(min(width, height) * 0.18)
+        self.slots_per_row = 5
+        self.visible_rows = 5
         self.animation_frame = 0
         self.animation_timer = 0
+        self.dirty = True
     
-    def draw(self, surface):
-        self.animation_timer += 1
-        if self.animation_timer >= 10:
-            self.animation_timer = 0
+    def tick(self, dt=1000 / 60):
+        """Advance the item sprite animation by `dt` milliseconds"""
+        self.animation_timer += dt
+        if self.animation_timer >= SPRITE_FRAME_MS:
+            self.animation_timer %= SPRITE_FRAME_MS
             self.animation_frame = 1 - self.animation_frame
-            
+            self.dirty = True
+    
+    def time_to_next_frame(self):
+        return SPRITE_FRAME_MS - self.animation_timer
+    
+    def grid_metrics(self):
+        """(padding, top of the grid, slot size) of the item grid, computed once per panel size"""
+        metrics = self.layout_cache.get(self.rect.size)
+        if metrics is None:
+            padding = int(self.rect.width * 0.02)
+            start_y = int(self.rect.height * 0.1)
+            available_width = self.rect.width - (self.slots_per_row - 1) * padding
+            slot_size = min(int(self.slot_size * 1.2), available_width // self.slots_per_row)
+            metrics = self.layout_cache[self.rect.size] = (padding, start_y, slot_size)
+        padding, start_y, slot_size = metrics
+        return padding, self.rect.y + start_y, slot_size
+    
+    def grid_rect(self):
+        padding, start_y, slot_size = self.grid_metrics()
+        pitch = slot_size + padding
+        return pygame.Rect(self.rect.x, start_y, self.slots_per_row * pitch, self.visible_rows * pitch)
+    
+    def scrollbar_rect(self):
+        grid_rect = self.grid_rect()
+        return pygame.Rect(self.rect.right + 4, grid_rect.y, 6, grid_rect.height)
+    
+    def get_title(self):
+        return "Available Items" if self.sort_key is None else f"Available Items (by {self.sort_key})"
+    
+    def get_bounds(self):
+        """Screen area draw() can touch: the title, the visible grid and the scrollbar"""
+        title_font_size = int(self.rect.height * 0.06)
+        title_surf = render_text(self.get_title(), 'arial', title_font_size, self.text_color, bold=True)
+        title_rect = title_surf.get_rect(center=(self.rect.centerx, self.rect.y + title_font_size))
+        return title_rect.union(self.grid_rect()).union(self.scrollbar_rect())
+    
+    def draw(self, surface):
         title_font_size = int(self.rect.height * 0.06)
-        title_font = pygame.font.SysFont('arial', title_font_size, bold=True)
         
-        text_surf = title_font.render("Available Items", True, self.text_color)
+        text_surf = render_text(self.get_title(), 'arial', title_font_size, self.text_color, bold=True)
         text_rect = text_surf.get_rect(center=(self.rect.centerx, self.rect.y + title_font_size))
         surface.blit(text_surf, text_rect)
         
         self.draw_items(surface)
+        self.draw_scrollbar(surface)
     
     def draw_items(self, surface):
-        self.item_rects = []
-        padding = int(self.rect.width * 0.02)
-        slots_per_row = 5
-        start_y = self.rect.y + int(self.rect.height * 0.1)
-        
-        available_width = self.rect.width - (slots_per_row - 1) * padding
-        slot_size = min(int(self.slot_size * 1.2), available_width // slots_per_row)
-        
-        for i, item in enumerate(self.items):
-            if i >= 25: break
-            row = i // slots_per_row
-            col = i % slots_per_row
-            x = self.rect.x + col * (slot_size + padding)
-            y = start_y + row * (slot_size + padding)
-            item_rect = pygame.Rect(x, y, slot_size, slot_size)
-            self.item_rects.append(item_rect)
-            self.draw_item(surface, item_rect, item)
+        """Draw the items in the visible rows of the grid"""
+        padding, start_y, slot_size = self.grid_metrics()
+        if slot_size != self.slot_layout_size:
+            if self.slot_layout_size is not None:
+                sprite_cache.invalidate((self.slot_layout_size, self.slot_layout_size))
+            self.slot_layout_size = slot_size
+        
+        first_slot = self.scroll_row * self.slots_per_row
+        last_slot = min(first_slot + self.visible_rows * self.slots_per_row, self.total_slots)
+        for slot in range(first_slot, last_slot):
+            handle = slot if self.order is None else self.order[slot]
+            item = self.items_by_handle.get(handle)
+            if item is None:
+                continue
+            self.draw_item(surface, self.slot_rect(slot), item)
+    
+    def draw_scrollbar(self, surface):
+        total_rows = self.total_rows()
+        if total_rows <= self.visible_rows:
+            return
+        track = self.scrollbar_rect()
+        pygame.draw.rect(surface, (40, 40, 40), track, border_radius=3)
+        thumb_height = max(12, track.height * self.visible_rows // total_rows)
+        thumb_y = track.y + (track.height - thumb_height) * self.scroll_row // (total_rows - self.visible_rows)
+        pygame.draw.rect(surface, (200, 200, 200), (track.x, thumb_y, track.width, thumb_height), border_radius=3)
     
     def draw_item(self, surface, item_rect, item):
         image_filename = item.get('image_filename')
@@ -360,121 +447,181 @@ class ItemPanel:
             pygame.draw.rect(surface, (100,100,100), item_rect, border_radius=8)
             return
 
-        try:
-            base_num = ''.join(filter(str.isdigit, image_filename))
-            if not base_num:
-                base_num = '1'
-                
-            frame_prefix = 'i' if self.animation_frame == 0 else 'j'
-            frame_filename = f"{frame_prefix}{base_num}.png"
-            
-            if frame_filename not in self.item_images:
-                try:
-                    image_path = os.path.join('assets', 'images','items', frame_filename)
-                    if not os.path.exists(image_path):
-                        image_path = os.path.join('assets', 'images','items', image_filename)
-                    
-                    item_image = pygame.image.load(image_path).convert_alpha()
-                    self.item_images[frame_filename] = item_image
-                except Exception as e:
-                    print(f"Error loading {frame_filename}: {e}")
-                    item_image = pygame.Surface((32, 32), pygame.SRCALPHA)
-                    color = (100 + int(base_num) * 5, 100 + int(base_num) * 3, 200, 200)
-                    pygame.draw.rect(item_image, color, (0, 0, 32, 32))
-                    self.item_images[frame_filename] = item_image
-
-            item_surface = pygame.Surface((item_rect.width, item_rect.height), pygame.SRCALPHA)
-            
-            if frame_filename in self.item_images:
-                scaled_img = pygame.transform.scale(
-                    self.item_images[frame_filename],
-                    (item_rect.width, item_rect.height)
-                )
-                mask = pygame.Surface((item_rect.width, item_rect.height), pygame.SRCALPHA)
-                pygame.draw.rect(mask, (255, 255, 255, 255), (0, 0, item_rect.width, item_rect.height), 
-                               border_radius=8)
-                
-                scaled_img.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
-                item_surface.blit(scaled_img, (0, 0))
-                
-                border_rect = pygame.Rect(0, 0, item_rect.width, item_rect.height)
-                pygame.draw.rect(item_surface, (255, 215, 0, 255), border_rect, 2, border_radius=8)
-                
-                surface.blit(item_surface, item_rect)
-            
-        except Exception as e:
-            print(f"Error in draw_item: {e}")
-            item_surface = pygame.Surface((item_rect.width, item_rect.height), pygame.SRCALPHA)
-            pygame.draw.rect(item_surface, (200, 200, 200, 200), 
-                          (0, 0, item_rect.width, item_rect.height), 
-                          border_radius=8)
-            pygame.draw.rect(item_surface, (255, 215, 0, 255), 
-                          (0, 0, item_rect.width, item_rect.height), 
-                          2, border_radius=8)
-            surface.blit(item_surface, item_rect)
-        
-        thin_font = pygame.font.SysFont('arial', max(8, item_rect.height // 8))
+        surface.blit(sprite_cache.get_sprite(image_filename, self.animation_frame, item_rect.size), item_rect)
+        
+        label_size = max(8, item_rect.height // 8)
         weight = int(item.get('weight', 0))
         value = int(item.get('value', 0))
         
         weight_text = f"W:{weight}"
-        weight_surf = thin_font.render(weight_text, True, (0, 0, 0))
+        weight_surf = render_text(weight_text, 'arial', label_size, (0, 0, 0))
         weight_rect = weight_surf.get_rect(topleft=(item_rect.left + 1, item_rect.top + 1))
         surface.blit(weight_surf, weight_rect)
         
         value_text = f"V:{value}"
-        value_surf = thin_font.render(value_text, True, (0, 0, 0))
+        value_surf = render_text(value_text, 'arial', label_size, (0, 0, 0))
         value_rect = value_surf.get_rect(bottomright=(item_rect.right - 1, item_rect.bottom - 1))
         surface.blit(value_surf, value_rect)
 
+    def slot_rect(self, slot):
+        """Screen rect of grid slot `slot` at the current scroll position"""
+        padding, start_y, slot_size = self.grid_metrics()
+        row, col = divmod(slot, self.slots_per_row)
+        return pygame.Rect(self.rect.x + col * (slot_size + padding),
+                           start_y + (row - self.scroll_row) * (slot_size + padding),
+                           slot_size, slot_size)
+    
+    def total_rows(self):
+        return -(-self.total_slots // self.slots_per_row)
+    
     def update_items(self, items):
-        self.items = items
+        if items != self.items:
+            self.dirty = True
+            self.items = items
+            self.items_by_handle = {item['handle']: item for item in items}
+            self.rebuild_order()
+    
+    def set_view(self, sort_key=None, max_weight=None):
+        """Order items by `sort_key` ("ratio", "value" or "weight", best first) and
+        hide those heavier than `max_weight`; with neither, slots follow handles"""
+        if (sort_key, max_weight) != (self.sort_key, self.max_weight):
+            self.sort_key = sort_key
+            self.max_weight = max_weight
+            self.scroll_row = 0
+            self.rebuild_order()
+            self.dirty = True
+    
+    def rebuild_order(self):
+        """Slot assignment for the current items and view; runs only when either changes"""
+        if self.sort_key is None and self.max_weight is None:
+            self.order = None
+            self.slot_of = {}
+            self.total_slots = max(self.items_by_handle, default=-1) + 1
+        else:
+            items = self.items
+            if self.max_weight is not None:
+                items = [item for item in items if item['weight'] <= self.max_weight]
+            if self.sort_key is not None:
+                items = sorted(items, key=lambda item: item[self.sort_key], reverse=self.sort_key != "weight")
+            self.order = [item['handle'] for item in items]
+            self.slot_of = {handle: slot for slot, handle in enumerate(self.order)}
+            self.total_slots = len(self.order)
+        self.scroll(0)
+    
+    def scroll(self, rows):
+        max_row = max(0, self.total_rows() - self.visible_rows)
+        scroll_row = min(max(self.scroll_row + rows, 0), max_row)
+        if scroll_row != self.scroll_row:
+            self.scroll_row = scroll_row
+            self.dirty = True
     
     def get_clicked_item(self, mouse_pos):
-        for i, rect in enumerate(self.item_rects):
-            if rect.collidepoint(mouse_pos):
-                return i
-        return None
-    
-    def get_item_position(self, item_index):
-        if 0 <= item_index < len(self.item_rects):
-            rect = self.item_rects[item_index]
-            return (rect.centerx, rect.centery)
-        return None
+        """Handle of the item under the mouse, or None"""
+        padding, start_y, slot_size = self.grid_metrics()
+        pitch = slot_size + padding
+        col, x_offset = divmod(mouse_pos[0] - self.rect.x, pitch)
+        row, y_offset = divmod(mouse_pos[1] - start_y, pitch)
+        if not (0 <= col < self.slots_per_row and 0 <= row < self.visible_rows):
+            return None
+        if x_offset >= slot_size or y_offset >= slot_size:
+            return None
+        slot = (self.scroll_row + row) * self.slots_per_row + col
+        if slot >= self.total_slots:
+            return None
+        handle = slot if self.order is None else self.order[slot]
+        return handle if handle in self.items_by_handle else None
+    
+    def get_item_position(self, handle):
+        """Screen centre of the item's slot, or None if it is not shown"""
+        slot = handle if self.order is None else self.slot_of.get(handle)
+        if slot is None or handle not in self.items_by_handle:
+            return None
+        row = slot // self.slots_per_row
+        if not self.scroll_row <= row < self.scroll_row + self.visible_rows:
+            return None
+        return self.slot_rect(slot).center
 
 class StatusPanel:
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         self.turn_text = "Greedy Bag Race"
         self.text_color = (255, 255, 255)
+        self.dirty = True
+    
+    def get_bounds(self):
+        turn_font_size = int(self.rect.height * 0.4)
+        turn_surf = render_text(self.turn_text, 'arial', turn_font_size, self.text_color)
+        return self.rect.union(turn_surf.get_rect(center=self.rect.center))
     
     def draw(self, surface):
-        title_font_size = int(self.rect.height * 0.5)
         turn_font_size = int(self.rect.height * 0.4)
         
-        title_font = pygame.font.SysFont('arial', title_font_size, bold=True)
-        turn_font = pygame.font.SysFont('arial', turn_font_size)
-        
-        
-        turn_surf = turn_font.render(self.turn_text, True, self.text_color)
+        turn_surf = render_text(self.turn_text, 'arial', turn_font_size, self.text_color)
         turn_rect = turn_surf.get_rect(center=(self.rect.centerx, self.rect.centery))
         surface.blit(turn_surf, turn_rect)
     
     def update_turn(self, turn_text):
+        if turn_text != self.turn_text:
+            self.dirty = True
         self.turn_text = turn_text
 
+class TimelinePanel:
+    """Replay timeline: a track filled up to the current move, with a knob to drag"""
+    def __init__(self, x, y, width, height):
+        self.rect = pygame.Rect(x, y, width, height)
+        self.position = 0
+        self.length = 0
+        self.track_color = (30, 30, 30)
+        self.fill_color = (255, 215, 0)
+        self.knob_color = (255, 255, 255)
+        self.dirty = True
+
+    def knob_radius(self):
+        return self.rect.height // 2 + 4
+
+    def get_bounds(self):
+        radius = self.knob_radius()
+        return self.rect.inflate(2 * radius, 2 * radius - self.rect.height + 2)
+
+    def knob_x(self):
+        if not self.length:
+            return self.rect.x
+        return self.rect.x + round(self.rect.width * self.position / self.length)
+
+    def draw(self, surface):
+        pygame.draw.rect(surface, self.track_color, self.rect)
+        knob_x = self.knob_x()
+        pygame.draw.rect(surface, self.fill_color, (self.rect.x, self.rect.y, knob_x - self.rect.x, self.rect.height))
+        pygame.draw.circle(surface, self.knob_color, (knob_x, self.rect.centery), self.knob_radius())
+
+    def set_position(self, position, length):
+        if (position, length) != (self.position, self.length):
+            self.dirty = True
+        self.position = position
+        self.length = length
+
+    def position_at(self, x):
+        """Move number under screen column `x`"""
+        fraction = (x - self.rect.x) / self.rect.width
+        return round(max(0.0, min(1.0, fraction)) * self.length)
+
 class AmountSelector:
     def __init__(self, x, y, width, height):
         self.rect = pygame.Rect(x, y, width, height)
         self.visible = False
-        self.current_item_index = None
+        self.current_item_handle = None
         self.current_item_weight = 0
         self.max_amount = 0
         self.amount_buttons = []
+        self.dirty = False
+    
+    def get_bounds(self):
+        return self.rect
         
-    def show(self, item_index, item_weight, max_amount):
+    def show(self, item_handle, item_weight, max_amount):
         self.visible = True
-        self.current_item_index = item_index
+        self.dirty = True
+        self.current_item_handle = item_handle
         self.current_item_weight = item_weight
         self.max_amount = min(int(item_weight), max_amount)
         self.amount_buttons = []
@@ -499,8 +646,9 @@ class AmountSelector:
             self.amount_buttons.append((button_rect, amount))
         
     def hide(self):
+        self.dirty = self.dirty or self.visible
         self.visible = False
-        self.current_item_index = None
+        self.current_item_handle = None
         self.amount_buttons = []
         
     def handle_event(self, event):
@@ -520,11 +668,8 @@ class AmountSelector:
         pygame.draw.rect(surface, PANEL_COLOR, self.rect, border_radius=10)
         pygame.draw.rect(surface, TEXT_COLOR, self.rect, 2, border_radius=10)
         
-        font = pygame.font.SysFont('arial', 24)
-        small_font = pygame.font.SysFont('arial', 18)
-        
         title_text = f"Pick Amount (Weight: {self.current_item_weight})"
-        title_surf = font.render(title_text, True, TEXT_COLOR)
+        title_surf = render_text(title_text, 'arial', 24, TEXT_COLOR)
         title_rect = title_surf.get_rect(center=(self.rect.centerx, self.rect.y + 25))
         surface.blit(title_surf, title_rect)
         
@@ -532,7 +677,7 @@ class AmountSelector:
             pygame.draw.rect(surface, BUTTON_COLOR, button_rect, border_radius=5)
             pygame.draw.rect(surface, TEXT_COLOR, button_rect, 2, border_radius=5)
             
-            amount_surf = small_font.render(str(amount), True, BUTTON_TEXT_COLOR)
+            amount_surf = render_text(str(amount), 'arial', 18, BUTTON_TEXT_COLOR)
             amount_rect = amount_surf.get_rect(center=button_rect.center)
             surface.blit(amount_surf, amount_rect)
         
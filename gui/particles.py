@@ -0,0 +1,155 @@
+import math
+
+import numpy as np
+import pygame
+
+PARTICLE_POOL_SIZE = 4096
+ALPHA_LEVELS = 16
+GRAVITY = 0.15
+FRAME_MS = 1000 / 60
+
+
+class ParticlePool:
+    """Fixed pool of particles stored column-wise in NumPy arrays.
+
+    Position, velocity, size and life live in preallocated arrays and are
+    updated with one vectorized step per update(dt), scaled so motion is the
+    same at any frame rate (velocities are per 60 Hz frame). Each particle
+    shrinks at the rate that brings it down to one pixel as its duration
+    runs out, so a burst lasts as long as asked at any size; interpolate()
+    places them between the last two steps for drawing. Emitting reuses
+    dead slots (or the oldest live ones when the pool is full) instead of
+    allocating.
+    Particles are drawn with a single blits() call from sprites cached per
+    (size, alpha level, color), so alpha fading actually shows on the
+    opaque screen.
+    """
+
+    def __init__(self, capacity=PARTICLE_POOL_SIZE, pixel_size=4, seed=None):
+        self.capacity = capacity
+        self.pixel_size = pixel_size
+        self.rng = np.random.default_rng(seed)
+
+        self.position = np.zeros((capacity, 2), np.float32)
+        self.previous_position = np.zeros((capacity, 2), np.float32)
+        self.alpha = 1.0
+        self.velocity = np.zeros((capacity, 2), np.float32)
+        self.size = np.zeros(capacity, np.float32)
+        self.shrink = np.ones(capacity, np.float32)
+        self.life = np.zeros(capacity, np.float32)
+        self.start_time = np.zeros(capacity, np.float64)
+        self.duration = np.ones(capacity, np.float32)
+        self.color = np.zeros(capacity, np.int16)
+        self.alive = np.zeros(capacity, bool)
+        self.clock = 0.0
+
+        self.palette = []
+        self.palette_index = {}
+        self.sprites = {}
+
+    def seed(self, seed):
+        self.rng = np.random.default_rng(seed)
+
+    def emit(self, position, color=(255, 215, 0), count=25, speed=(1, 4), duration=800, spread=0):
+        """Burst `count` particles from `position` (jittered by up to `spread` pixels)"""
+        count = min(count, self.capacity)
+        if count <= 0:
+            return
+
+        slots = np.flatnonzero(~self.alive)
+        if len(slots) < count:
+            live = np.flatnonzero(self.alive)
+            oldest = live[np.argsort(self.life[live])[:count - len(slots)]]
+            slots = np.concatenate([slots, oldest])
+        slots = slots[:count]
+
+        angle = self.rng.uniform(0, 2 * math.pi, count)
+        velocity = self.rng.uniform(speed[0], speed[1], count)
+        self.position[slots] = position
+        if spread:
+            self.position[slots] += self.rng.uniform(-spread, spread, (count, 2))
+        self.previous_position[slots] = self.position[slots]
+        self.velocity[slots, 0] = np.cos(angle) * velocity
+        self.velocity[slots, 1] = np.sin(angle) * velocity - 2
+        self.size[slots] = self.rng.integers(2, 6, count)
+        self.shrink[slots] = (1.0 / self.size[slots]) ** (FRAME_MS / duration)
+        self.life[slots] = 1.0
+        self.start_time[slots] = self.clock
+        self.duration[slots] = duration
+        self.color[slots] = self.color_index(color)
+        self.alive[slots] = True
+
+    def color_index(self, color):
+        color = tuple(color[:3])
+        index = self.palette_index.get(color)
+        if index is None:
+            index = len(self.palette)
+            self.palette.append(color)
+            self.palette_index[color] = index
+        return index
+
+    def update(self, dt=FRAME_MS):
+        """Advance all particles by `dt` milliseconds"""
+        self.clock += dt
+        if not self.alive.any():
+            return
+        steps = dt / FRAME_MS
+        # Dead slots are stepped too: cheaper than masking, and emit() overwrites them.
+        self.previous_position[:] = self.position
+        self.position += self.velocity * steps
+        self.velocity[:, 1] += GRAVITY * steps
+        self.size *= self.shrink ** steps
+        self.life = 1.0 - (self.clock - self.start_time) / self.duration
+        self.alive &= (self.life > 0) & (self.size >= 1)
+
+    def interpolate(self, alpha):
+        """Draw particles `alpha` (0-1) of the way from the previous update to the latest"""
+        self.alpha = alpha
+
+    def live_count(self):
+        return int(np.count_nonzero(self.alive))
+
+    def _visible(self):
+        """Integer screen columns (x, y, side, alpha level, color) of live particles"""
+        slots = np.flatnonzero(self.alive)
+        ps = self.pixel_size
+        previous = self.previous_position[slots]
+        position = previous + (self.position[slots] - previous) * self.alpha
+        x = (position[:, 0] / ps).astype(np.int32) * ps
+        y = (position[:, 1] / ps).astype(np.int32) * ps
+        side = self.size[slots].astype(np.int32) * ps
+        level = np.ceil(self.life[slots] * (ALPHA_LEVELS - 1)).astype(np.int32)
+        return x, y, side, level, self.color[slots]
+
+    def get_sprite(self, side, level, color):
+        key = (side, level, color)
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            sprite = pygame.Surface((side, side))
+            if pygame.display.get_surface() is not None:
+                sprite = sprite.convert()
+            sprite.fill(self.palette[color])
+            sprite.set_alpha(level * 255 // (ALPHA_LEVELS - 1))
+            self.sprites[key] = sprite
+        return sprite
+
+    def get_bounds(self):
+        if not self.alive.any():
+            return None
+        x, y, side, _, _ = self._visible()
+        left, top = int(x.min()), int(y.min())
+        return pygame.Rect(left, top, int((x + side).max()) - left, int((y + side).max()) - top)
+
+    def draw(self, surface):
+        if not self.alive.any():
+            return
+        x, y, side, level, color = self._visible()
+        get_sprite = self.get_sprite
+        surface.blits(
+            [(get_sprite(s, l, c), (px, py))
+             for px, py, s, l, c in zip(x.tolist(), y.tolist(), side.tolist(), level.tolist(), color.tolist())],
+            doreturn=False,
+        )
+
+    def clear(self):
+        self.alive[:] = False
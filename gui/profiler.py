@@ -0,0 +1,200 @@
+import csv
+import os
+import time
+
+import pygame
+
+from gui.text_rendering import render_text
+
+PROFILE_HISTORY = 600
+OVERLAY_REFRESH_MS = 250
+OVERLAY_WIDTH = 400
+GRAPH_HEIGHT = 80
+FRAME_MS = 1000 / 60
+PERCENTILES = (50, 95, 99)
+
+
+class Section:
+    """Times one `with` block into the current frame's column of `name`"""
+
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class NoSection:
+    """Stand-in returned while the profiler is off, so sections cost one call"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_SECTION = NoSection()
+
+
+class FrameProfiler:
+    """Per-frame phase timings in a ring buffer of the last `capacity` frames.
+
+    Each phase is a column of milliseconds, created the first time a section
+    of that name runs; sections of the same name within one frame add up
+    (compose() runs once per dirty rectangle). Dotted names ("update.ai")
+    are sub-phases of their prefix. The overlay shows rolling percentiles
+    per phase and a graph of frame work times against the 60 FPS budget,
+    rebuilt a few times per second by update(); dump_csv() writes the buffer
+    oldest frame first.
+    Nothing is recorded while `enabled` is off, nor for the rest of the
+    frame it is switched on in, which has no row yet.
+    """
+
+    def __init__(self, capacity=PROFILE_HISTORY):
+        self.capacity = capacity
+        self.enabled = False
+        self.recording = False
+        self.visible = False
+        self.columns = {}
+        self.slot = -1
+        self.frames = 0
+        self.position = (10, 10)
+        self.overlay = None
+        self.overlay_time = 0
+
+    def section(self, name):
+        if not self.recording:
+            return NO_SECTION
+        return Section(self, name)
+
+    def add(self, name, ms):
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = [0.0] * self.capacity
+        column[self.slot] += ms
+
+    def begin_frame(self, interval_ms):
+        """Start a new row; `interval_ms` is the wall time since the previous frame"""
+        if not self.enabled:
+            return
+        self.recording = True
+        self.slot = (self.slot + 1) % self.capacity
+        self.frames += 1
+        for column in self.columns.values():
+            column[self.slot] = 0.0
+        self.add("interval", interval_ms)
+
+    def end_frame(self, work_ms):
+        if self.recording:
+            self.add("work", work_ms)
+
+    def toggle(self):
+        """Switch recording and the overlay on or off together; returns the new state"""
+        self.enabled = self.visible = not self.enabled
+        self.recording = False
+        self.overlay = None
+        return self.enabled
+
+    def names(self):
+        """Column names with every sub-phase listed right after its phase"""
+        tops = list(dict.fromkeys(name.split(".", 1)[0] for name in self.columns))
+        return sorted(self.columns, key=lambda name: (tops.index(name.split(".", 1)[0]), "." in name))
+
+    def history(self, name):
+        """Values of column `name`, oldest frame first"""
+        column = self.columns.get(name)
+        if column is None:
+            return []
+        count = min(self.frames, self.capacity)
+        start = (self.slot + 1) % self.capacity if self.frames >= self.capacity else 0
+        return [column[(start + i) % self.capacity] for i in range(count)]
+
+    def percentiles(self, name, percentiles=PERCENTILES):
+        values = sorted(self.history(name))
+        if not values:
+            return [0.0] * len(percentiles)
+        return [values[min(len(values) - 1, len(values) * p // 100)] for p in percentiles]
+
+    def dump_csv(self, directory):
+        """Write the buffer to a timestamped CSV file in `directory`; returns its path"""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"frames-{time.strftime('%Y%m%d-%H%M%S')}.csv")
+        names = self.names()
+        columns = [self.history(name) for name in names]
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + names)
+            first = self.frames - len(columns[0]) if columns else 0
+            for row, values in enumerate(zip(*columns)):
+                writer.writerow([first + row] + [f"{value:.3f}" for value in values])
+        return path
+
+    def get_bounds(self):
+        if not self.visible:
+            return None
+        height = self.overlay.get_height() if self.overlay else GRAPH_HEIGHT
+        return pygame.Rect(self.position, (OVERLAY_WIDTH, height))
+
+    def build_overlay(self):
+        font_size = 14
+        line_height = font_size + 2
+        names = [name for name in self.names() if name != "interval"]
+        height = (len(names) + 2) * line_height + GRAPH_HEIGHT + 12
+        overlay = pygame.Surface((OVERLAY_WIDTH, height), pygame.SRCALPHA)
+        overlay.fill((0, 0, 0, 190))
+
+        def row(y, cells, color):
+            overlay.blit(render_text(cells[0], "arial", font_size, color), (6, y))
+            for column, cell in enumerate(cells[1:]):
+                text = render_text(cell, "arial", font_size, color)
+                overlay.blit(text, text.get_rect(topright=(230 + column * 70, y)))
+
+        y = 4
+        row(y, ["phase (ms)"] + [f"p{p}" for p in PERCENTILES], (255, 215, 0))
+        y += line_height
+        for name in names:
+            label = "    " * name.count(".") + name.rsplit(".", 1)[-1]
+            row(y, [label] + [f"{value:.2f}" for value in self.percentiles(name)], (240, 240, 240))
+            y += line_height
+        fps = 1000 / max(0.001, self.percentiles("interval", (50,))[0])
+        row(y, [f"median interval: {fps:.0f} fps"], (180, 180, 255))
+        y += line_height + 4
+
+        graph = pygame.Rect(6, y, OVERLAY_WIDTH - 12, GRAPH_HEIGHT)
+        pygame.draw.rect(overlay, (40, 40, 40, 220), graph)
+        scale = GRAPH_HEIGHT / (FRAME_MS * 2)
+        work = self.history("work")[-graph.width:]
+        for x, ms in enumerate(work):
+            bar = min(GRAPH_HEIGHT, int(ms * scale))
+            color = (120, 220, 120) if ms <= FRAME_MS else (240, 80, 80)
+            pygame.draw.line(overlay, color, (graph.left + x, graph.bottom - 1), (graph.left + x, graph.bottom - bar))
+        budget_y = graph.bottom - int(FRAME_MS * scale)
+        pygame.draw.line(overlay, (255, 215, 0), (graph.left, budget_y), (graph.right - 1, budget_y))
+        return overlay
+
+    def update(self):
+        """Rebuild the overlay when it is due; returns the screen area to redraw, or None"""
+        if not self.visible:
+            return None
+        now = pygame.time.get_ticks()
+        if self.overlay is not None and now - self.overlay_time < OVERLAY_REFRESH_MS:
+            return None
+        old_bounds = self.get_bounds()
+        self.overlay = self.build_overlay()
+        self.overlay_time = now
+        return old_bounds.union(self.get_bounds())
+
+    def draw(self, surface):
+        if self.visible and self.overlay is not None:
+            surface.blit(self.overlay, self.position)
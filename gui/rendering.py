@@ -0,0 +1,99 @@
+from collections import deque
+
+import pygame
+
+
+class DirtyRegion:
+    """Screen rectangles that must be recomposited this frame.
+
+    Overlapping rectangles are merged. When there are more than `max_rects`
+    of them, or they cover more than `full_ratio` of the screen, the frame
+    falls back to a full redraw, which is cheaper at that point.
+    """
+
+    def __init__(self, screen_rect, max_rects=12, full_ratio=0.5):
+        self.screen_rect = pygame.Rect(screen_rect)
+        self.max_rects = max_rects
+        self.full_ratio = full_ratio
+        self.rects = []
+        self.full = True
+
+    def mark(self, rect):
+        if rect is None or self.full:
+            return
+        rect = pygame.Rect(rect).clip(self.screen_rect)
+        if rect.width > 0 and rect.height > 0:
+            self.rects.append(rect)
+
+    def mark_all(self):
+        self.full = True
+        self.rects = []
+
+    def take(self):
+        """Return (full_redraw, rects) for this frame and reset for the next"""
+        full, rects = self.full, self.merge(self.rects)
+        self.full = False
+        self.rects = []
+
+        if not full:
+            area = sum(rect.width * rect.height for rect in rects)
+            screen_area = self.screen_rect.width * self.screen_rect.height
+            full = len(rects) > self.max_rects or area > screen_area * self.full_ratio
+        return full, ([] if full else rects)
+
+    @staticmethod
+    def merge(rects):
+        merged = []
+        for rect in rects:
+            rect = rect.copy()
+            index = rect.collidelist(merged)
+            while index != -1:
+                rect.union_ip(merged.pop(index))
+                index = rect.collidelist(merged)
+            merged.append(rect)
+        return merged
+
+
+class FrameScheduler:
+    """Paces the main loop: full frame rate while something moves, asleep otherwise.
+
+    wait(idle_ms) is called once per frame with the time until the next
+    scheduled change on screen (0 when something is animating). While busy it
+    ticks at `fps`; while idle it blocks in pygame.event.wait until that time
+    (at most `max_idle_ms`) or until input arrives, whichever is first. Any
+    input keeps the loop at full rate for `input_grace_ms`.
+    """
+
+    def __init__(self, fps=60, max_idle_ms=1000, input_grace_ms=250):
+        self.fps = fps
+        self.max_idle_ms = max_idle_ms
+        self.input_grace_ms = input_grace_ms
+        self.clock = pygame.time.Clock()
+        self.frame_stamps = deque()
+        self.last_input = -input_grace_ms
+
+    def note_input(self):
+        self.last_input = pygame.time.get_ticks()
+
+    def wait(self, idle_ms):
+        """Block until the next frame is due; returns (ms since the previous frame, waking event or None)"""
+        now = pygame.time.get_ticks()
+        event = None
+        if idle_ms > 1000 / self.fps and now - self.last_input >= self.input_grace_ms:
+            event = pygame.event.wait(int(min(idle_ms, self.max_idle_ms)))
+            if event.type == pygame.NOEVENT:
+                event = None
+            dt = self.clock.tick()
+        else:
+            dt = self.clock.tick(self.fps)
+
+        now = pygame.time.get_ticks()
+        self.frame_stamps.append(now)
+        while self.frame_stamps[0] <= now - 1000:
+            self.frame_stamps.popleft()
+        return dt, event
+
+    @property
+    def effective_fps(self):
+        """Frames completed during the last second"""
+        return len(self.frame_stamps)
@@ -0,0 +1,41 @@
+import pygame
+
+from gui.memory import memory, surface_bytes, SHARED
+
+
+class LayerCache:
+    """Pre-rendered static chrome, built once per key and reused every frame.
+
+    Keys must capture everything a layer depends on (size, pixel size,
+    colors, ...). Layers are plain surfaces, transparent where nothing was
+    drawn, so blitting one reproduces the draw calls it was built from.
+    """
+
+    def __init__(self):
+        self.layers = {}
+
+    def get(self, key, build, size):
+        layer = self.layers.get(key)
+        if layer is None:
+            layer = pygame.Surface(size, pygame.SRCALPHA)
+            build(layer)
+            self.layers[key] = layer
+        return layer
+
+    def clear(self):
+        self.layers.clear()
+
+    def memory_usage(self):
+        return {SHARED: sum(surface_bytes(layer) for layer in self.layers.values())}
+
+    def shrink(self, target_bytes):
+        """Drop every layer if over `target_bytes` (each is rebuilt on next use); returns bytes freed"""
+        used = self.memory_usage()[SHARED]
+        if used <= target_bytes:
+            return 0
+        self.clear()
+        return used
+
+
+chrome_cache = LayerCache()
+memory.register("chrome", chrome_cache.memory_usage, shrink=chrome_cache.shrink, priority=1)
@@ -0,0 +1,136 @@
+import os
+from collections import OrderedDict
+
+import pygame
+
+from gui.assets import assets, GAME
+from gui.memory import memory, surface_bytes, SHARED
+
+ITEM_IMAGE_DIR = os.path.join("assets", "images", "items")
+SPRITE_CACHE_BUDGET = 24 * 1024 * 1024
+
+BORDER_COLOR = (255, 215, 0, 255)
+BORDER_RADIUS = 8
+
+
+class SpriteCache:
+    """Finished item slot sprites keyed by (item id, animation frame, slot size).
+
+    A sprite is the item image scaled to the slot, clipped to rounded corners
+    and bordered, so drawing an item is a single blit. Source images are
+    loaded once, through the shared asset loader (which owns them), and
+    shared by every panel; until an image has streamed in, get_sprite()
+    returns a placeholder.
+    Finished sprites are kept in an LRU bounded by `budget_bytes`; panels call
+    invalidate() when their layout changes.
+    """
+
+    def __init__(self, budget_bytes=SPRITE_CACHE_BUDGET):
+        self.budget_bytes = budget_bytes
+        self.fallback_images = {}
+        self.sprites = OrderedDict()
+        self.bytes_used = 0
+        self.item_ids = {}
+        self.placeholders = {}
+        self.source_paths = {}
+
+    def item_id(self, image_filename):
+        item_id = self.item_ids.get(image_filename)
+        if item_id is None:
+            item_id = int(''.join(filter(str.isdigit, image_filename)) or 1)
+            self.item_ids[image_filename] = item_id
+        return item_id
+
+    def source_path(self, item_id, frame, image_filename=None):
+        """(cache key, file path) of an item frame; j*.png falls back to the item's own image"""
+        key = (item_id, frame, image_filename)
+        paths = self.source_paths.get(key)
+        if paths is None:
+            frame_filename = f"{'i' if frame == 0 else 'j'}{item_id}.png"
+            image_path = os.path.join(ITEM_IMAGE_DIR, frame_filename)
+            if not os.path.exists(image_path) and image_filename:
+                image_path = os.path.join(ITEM_IMAGE_DIR, image_filename)
+            paths = self.source_paths[key] = (frame_filename, image_path)
+        return paths
+
+    def get_source(self, item_id, frame, image_filename=None):
+        """Unscaled image for frame 0 (i*.png) or frame 1 (j*.png) of an item, or None while it loads"""
+        frame_filename, image_path = self.source_path(item_id, frame, image_filename)
+        image = self.fallback_images.get(frame_filename)
+        if image is None:
+            image = assets.image(image_path, GAME, convert=False)
+            # Both animation frames are needed soon; load them together.
+            assets.request(self.source_path(item_id, 1 - frame, image_filename)[1], "image", GAME, convert=False)
+            if image is None:
+                if not assets.has_failed(image_path):
+                    return None
+                image = pygame.Surface((32, 32), pygame.SRCALPHA)
+                color = (min(255, 100 + item_id * 5), min(255, 100 + item_id * 3), 200, 200)
+                pygame.draw.rect(image, color, (0, 0, 32, 32))
+                self.fallback_images[frame_filename] = image
+        return image
+
+    def get_placeholder(self, size):
+        placeholder = self.placeholders.get(size)
+        if placeholder is None:
+            placeholder = pygame.Surface(size, pygame.SRCALPHA)
+            pygame.draw.rect(placeholder, (255, 255, 255, 40), (0, 0, *size), border_radius=BORDER_RADIUS)
+            pygame.draw.rect(placeholder, BORDER_COLOR, (0, 0, *size), 2, border_radius=BORDER_RADIUS)
+            self.placeholders[size] = placeholder
+        return placeholder
+
+    def get_sprite(self, image_filename, frame, size):
+        item_id = self.item_id(image_filename)
+        key = (item_id, frame, size)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        baked = assets.baked(self.source_path(item_id, frame, image_filename)[1], size, "sprite")
+        if baked is not None:
+            return baked
+
+        source = self.get_source(item_id, frame, image_filename)
+        if source is None:
+            return self.get_placeholder(size)
+        sprite = self.build_sprite(source, size)
+        self.sprites[key] = sprite
+        self.bytes_used += surface_bytes(sprite)
+        self.shrink(self.budget_bytes, keep=1)
+        return sprite
+
+    def shrink(self, target_bytes, keep=0):
+        """Evict least recently used sprites down to `target_bytes` (keeping `keep`); returns bytes freed"""
+        before = self.bytes_used
+        while self.bytes_used > target_bytes and len(self.sprites) > keep:
+            _, evicted = self.sprites.popitem(last=False)
+            self.bytes_used -= surface_bytes(evicted)
+        return before - self.bytes_used
+
+    def memory_usage(self):
+        placeholders = sum(surface_bytes(placeholder) for placeholder in self.placeholders.values())
+        return {SHARED: self.bytes_used + placeholders}
+
+    def build_sprite(self, image, size):
+        width, height = size
+        sprite = pygame.transform.scale(image, size)
+        if pygame.display.get_surface() is not None:
+            sprite = sprite.convert_alpha()
+
+        mask = pygame.Surface(size, pygame.SRCALPHA)
+        pygame.draw.rect(mask, (255, 255, 255, 255), (0, 0, width, height), border_radius=BORDER_RADIUS)
+        sprite.blit(mask, (0, 0), special_flags=pygame.BLEND_RGBA_MULT)
+        pygame.draw.rect(sprite, BORDER_COLOR, (0, 0, width, height), 2, border_radius=BORDER_RADIUS)
+        return sprite
+
+    def invalidate(self, size=None):
+        """Drop finished sprites (of one slot size, or all); source images are kept"""
+        for key in [key for key in self.sprites if size is None or key[2] == size]:
+            self.bytes_used -= surface_bytes(self.sprites.pop(key))
+        if size is None:
+            self.placeholders.clear()
+
+
+sprite_cache = SpriteCache()
+memory.register("item sprites", sprite_cache.memory_usage, sprite_cache.budget_bytes, sprite_cache.shrink, priority=2)
@@ -1,13 +1,85 @@
+import os
+from collections import OrderedDict
+
 import pygame
 
+from gui.memory import memory, surface_bytes, SHARED
+
+PIXEL_FONT = "assets/fonts/pixel_font.ttf"
+PIXEL_FONT_FALLBACK = "Courier New"
+TEXT_CACHE_SIZE = 512
+
+_fonts = {}
+_text_cache = OrderedDict()
+
+
+def get_font(face, size, bold=False):
+    """Shared font for (face, size, bold); `face` is a system font name or a font file.
+
+    A missing font file falls back to a bold Courier New system font, and the
+    lookup (including the failed file check) happens once per key.
+    """
+    key = (face, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        if face.endswith((".ttf", ".otf")):
+            if os.path.exists(face):
+                font = pygame.font.Font(face, size)
+                font.set_bold(bold)
+            else:
+                font = pygame.font.SysFont(PIXEL_FONT_FALLBACK, size, bold=True)
+        else:
+            font = pygame.font.SysFont(face, size, bold=bold)
+        _fonts[key] = font
+    return font
+
+
+def render_text(text, face, size, color, bold=False):
+    """Rendered text surface from a bounded LRU cache keyed by (text, font, color).
+
+    Returned surfaces are shared; callers must not draw onto them.
+    """
+    key = (text, face, size, bold, color)
+    surface = _text_cache.get(key)
+    if surface is not None:
+        _text_cache.move_to_end(key)
+        return surface
+
+    surface = get_font(face, size, bold).render(text, True, color)
+    _text_cache[key] = surface
+    if len(_text_cache) > TEXT_CACHE_SIZE:
+        _text_cache.popitem(last=False)
+    return surface
+
+
+def clear_text_cache():
+    _text_cache.clear()
+
+
+def text_cache_usage():
+    return {SHARED: sum(surface_bytes(surface) for surface in _text_cache.values())}
+
+
+def shrink_text_cache(target_bytes):
+    """Drop least recently used text until at most `target_bytes` remain; returns bytes freed"""
+    used = before = text_cache_usage()[SHARED]
+    while used > target_bytes and _text_cache:
+        _, surface = _text_cache.popitem(last=False)
+        used -= surface_bytes(surface)
+    return before - used
+
+
+memory.register("text", text_cache_usage, shrink=shrink_text_cache, priority=1)
+
+
 def draw_text(surface, text, x, y, font, color, centered=False):
     text_surface = font.render(text, True, color)
     text_rect = text_surface.get_rect()
-    
+
     if centered:
         text_rect.center = (x, y)
     else:
         text_rect.topleft = (x, y)
-    
+
     surface.blit(text_surface, text_rect)
-    return text_rect
\ No newline at end of file
+    return text_rect
@@ -1,12 +1,20 @@
 import pygame
 import sys
 import os
+import argparse
+import time
 
 pygame.init()
 
 SCREEN_WIDTH = 1200
 SCREEN_HEIGHT = 800
 FPS = 60
+# Gameplay advances in fixed steps, independent of the render rate.
+SIM_STEP_MS = 1000 / 60
+# Longest stretch of time simulated in one frame; beyond it (e.g. a suspended window) time is dropped.
+MAX_CATCHUP_MS = 1000
+# Logical (width, height) to compose frames at, scaled once to the display; None renders at native size.
+RENDER_SIZE = None
 
 BG_COLOR = (45, 45, 65)
 PANEL_COLOR = (60, 60, 80)
@@ -19,40 +27,133 @@ PLAYER2_COLOR = (220, 60, 60)
 HIGHLIGHT_COLOR = (255, 215, 0)
 
 BAG_CAPACITY = 25
+ITEM_COUNT = 25
+ITEM_SORT_KEYS = (None, "ratio", "value", "weight")
+JOURNAL_DIR = "saves"
+PROFILE_DIR = "profiles"
+# Overall byte budget for cached surfaces and sounds; None only enforces each cache's own budget.
+MEMORY_BUDGET = None
+MEMORY_CHECK_MS = 1000
+DIRTY_RECT_RENDERING = True
+BIG_PICK_VALUE = 20
+BIG_PICK_PARTICLES = 150
+PENDING_ASSET_POLL_MS = 50
+NETPLAY_POLL_MS = 20
+EXTERNAL_AI_POLL_MS = 20
+# Spectator playback speeds as multiples of the AI move delay; None plays as fast as the frame budget allows.
+SPECTATE_SPEEDS = (1, 10, 100, None)
+SPECTATE_FRAME_BUDGET_MS = 8
+DIFFICULTIES = ("Easy", "Medium", "Hard")
+ARENA_GAMES = 16
+ARENA_FRAME_BUDGET_MS = 6
+REPLAY_PAGE_MOVES = 10
+IN_GAME_STATES = ("IN_GAME_SINGLE", "IN_GAME_MULTI", "IN_GAME_SPECTATE")
+# States that show a game board: live games plus the replay viewer.
+BOARD_STATES = IN_GAME_STATES + ("REPLAY",)
+INPUT_EVENTS = (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+                pygame.MOUSEWHEEL, pygame.KEYDOWN, pygame.KEYUP)
 
 from gui.background import BackgroundManager
 from gui.buttons import Button
-from gui.panels import BagPanel, ItemPanel, StatusPanel, AmountSelector
+from gui.panels import BagPanel, ItemPanel, StatusPanel, TimelinePanel, AmountSelector
 from backend.game_engine import GameEngine
 from gui.animations import AnimationManager
+from gui.text_rendering import render_text
+from gui.rendering import DirtyRegion, FrameScheduler
+from gui.profiler import FrameProfiler
+from gui.memory import memory
+from gui.assets import assets, URGENT, GAME
+from gui.bundle import AssetBundle
+from gui.arena import Arena
+from backend.journal import GameJournal
+from backend.external_ai import ExternalAI
+from backend.netplay import LockstepSession
+from backend.profiling import ProfileCapture
+from backend.replay import GameRecorder, Recording, ReplayCursor
 
 class GreedyBagRace:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    def __init__(self, engine_command=None, host_port=None, join_address=None, item_count=ITEM_COUNT,
+                 render_size=RENDER_SIZE, memory_budget=MEMORY_BUDGET, spectate=None,
+                 arena=None, record_dir=None, replay=None):
+        if render_size:
+            # SDL scales the finished frame to the display and maps mouse input back to it.
+            self.screen = pygame.display.set_mode(render_size, pygame.FULLSCREEN | pygame.SCALED)
+        else:
+            self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
         self.screen_width, self.screen_height = self.screen.get_size()
+        assets.bundle = AssetBundle.load((self.screen_width, self.screen_height))
         
-        self.clock = pygame.time.Clock()
+        self.scheduler = FrameScheduler(FPS)
+        self.profiler = FrameProfiler()
+        self.capture = ProfileCapture("game", directory=PROFILE_DIR)
+        self.capture.install_signal()
+        self.waking_event = None
+        self.shown_fps = None
         
-        self.game_state = "MENU"
+        self.game_state = "LOADING"
         self.difficulty = "Medium"
         self.game_mode = None
         self.ai_move_timer = 0
-        self.ai_move_delay = 60
+        self.ai_move_delay = 1000
+        self.frame_dt = 1000 / FPS
+        self.sim_accumulator = 0
+        self.spectate_seats = list(spectate or ("Medium", "Medium"))
+        self.spectate_speed = 1
+        self.spectate_games = 0
+        self.spectate_tally = [0, 0, 0]
+        self.autostart_spectate = spectate is not None
+        self.arena = None
+        self.autostart_arena = arena
+        self.replay = None
+        self.replay_playing = False
+        self.replay_timer = 0
+        self.scrubbing = False
+        self.autostart_replay = replay
         
         self.background_manager = BackgroundManager(self.screen_width, self.screen_height)
+        self.background_manager.prefetch(["MENU"], URGENT)
+        memory.budget_bytes = memory_budget
+        memory.register("backgrounds", self.background_manager.memory_usage,
+                        self.background_manager.budget_bytes, self.background_manager.shrink, priority=3)
+        memory.position = (self.screen_width - 370, 10)
+        self.memory_timer = 0
         self.animation_manager = AnimationManager()
+        self.dirty_region = DirtyRegion(self.screen.get_rect())
+        self.panel_bounds = {}
         self.amount_selector = AmountSelector(
             self.screen_width//2 - 250, 
             self.screen_height//2 - 150, 
             500, 300
         )
         
-        self.game_engine = GameEngine(bag_capacity=BAG_CAPACITY)
+        self.game_engine = GameEngine(bag_capacity=BAG_CAPACITY, item_count=item_count)
+        self.game_engine.add_move_listener(self.on_engine_move)
+        self.engine_changed = True
+        self.item_sort_key = None
+        self.item_fit_filter = False
+        self.journal = GameJournal(JOURNAL_DIR)
+        self.external_ai = ExternalAI(engine_command) if engine_command else None
+        self.game_engine.external_ai = self.external_ai
+        self.recorder = None
+        if record_dir:
+            self.recorder = GameRecorder(record_dir)
+            self.recorder.attach(self.game_engine)
+        
+        self.netplay = None
+        if host_port is not None:
+            self.netplay = LockstepSession.host(self.game_engine, host_port)
+        elif join_address:
+            host, port = join_address.rsplit(":", 1)
+            self.netplay = LockstepSession.join(self.game_engine, host, int(port),
+                                                on_snapshot=self.enter_network_game)
         
         self.init_audio()
         self.init_gui()
+        self.resume_saved_game()
         
-        print(f"Running in fullscreen: {self.screen_width}x{self.screen_height}")
+        window_width, window_height = pygame.display.get_window_size()
+        print(f"Running in fullscreen: {self.screen_width}x{self.screen_height}"
+              f" on a {window_width}x{window_height} display")
     
     def init_audio(self):
         self.bgm_tracks = {}
@@ -61,6 +162,9 @@ class GreedyBagRace:
             "DIFFICULTY_SELECT": "assets/sounds/main_menu.mp3",
             "IN_GAME_SINGLE": "assets/sounds/background.mp3", 
             "IN_GAME_MULTI": "assets/sounds/background.mp3",
+            "IN_GAME_SPECTATE": "assets/sounds/background.mp3",
+            "ARENA": "assets/sounds/background.mp3",
+            "REPLAY": "assets/sounds/background.mp3",
             "YOU_WIN": "assets/sounds/win.mp3",
             "AI_WIN": "assets/sounds/lost.mp3",
             "PLAYER1_WIN": "assets/sounds/win.mp3",
@@ -93,15 +197,14 @@ class GreedyBagRace:
             
             for key, path in sound_paths.items():
                 if os.path.exists(path):
-                    self.sounds[key] = pygame.mixer.Sound(path)
-                    print(f"Loaded sound effect: {key} from {path}")
+                    self.sounds[key] = path
+                    assets.request(path, "sound", URGENT if key == 'click' else GAME)
+                    print(f"Queued sound effect: {key} from {path}")
                 else:
                     print(f"Warning: Sound file not found: {path}")
                     
         except Exception as e:
             print(f"Audio initialization error: {e}")
-        
-        self.play_bgm("MENU")
     
     def play_bgm(self, state):
         if state in self.bgm_tracks:
@@ -126,6 +229,9 @@ class GreedyBagRace:
             self.screen_height - 200
         )
         self.status_panel = StatusPanel(50, 50, self.screen_width - 100, 80)
+        self.timeline_panel = TimelinePanel(200, self.screen_height - 40, self.screen_width - 400, 14)
+        for panel in (self.player1_panel, self.player2_panel):
+            memory.register(f"avatars ({panel.player_name})", panel.memory_usage, shrink=panel.shrink, priority=2)
         
         button_width = 300
         button_height = 70
@@ -143,6 +249,8 @@ class GreedyBagRace:
                   "🎮 Single Player", self.show_difficulty_select),
             Button(650, 650, button_width+350, button_height+70, 
                   "👥 Multiplayer", self.start_multiplayer),
+            Button(650, 850, button_width+350, button_height+70, 
+                  "🤖 AI vs AI", self.start_spectator),
             Button(70,900, 100, 100, 
                   "🔙 Back", self.show_main_menu)
         ]
@@ -157,19 +265,138 @@ class GreedyBagRace:
             Button(70,900, 100, 100, 
                   "🔙 Back", self.show_main_menu)
         ]
+        
+        self.game_over_back_button = Button(40,900, 150, 150, "🔙 Menu", self.show_main_menu)
+
+    def resume_saved_game(self):
+        """Rebuild an unfinished game from the journal after a crash; it is entered once loading finishes"""
+        self.resume_pending = self.journal.recover(self.game_engine)
+
+    def enter_resumed_game(self):
+        self.resume_pending = False
+        if self.game_engine.ai_players:
+            self.game_mode = "single"
+            self.difficulty = next(iter(self.game_engine.ai_players.values())).difficulty
+            self.change_state("IN_GAME_SINGLE")
+        else:
+            self.game_mode = "multi"
+            self.change_state("IN_GAME_MULTI")
+        print("Resumed unfinished game from journal")
 
     def run(self):
         while True:
-            self.handle_events()
-            self.update()
-            self.render()
-            self.clock.tick(FPS)
+            started = time.perf_counter()
+            self.profiler.begin_frame(self.frame_dt)
+            with self.profiler.section("events"):
+                self.handle_events()
+            with self.profiler.section("update"):
+                self.update()
+            with self.profiler.section("render"):
+                self.render()
+            work_ms = (time.perf_counter() - started) * 1000
+            self.profiler.end_frame(work_ms)
+            self.animation_manager.frame_finished(work_ms)
+            self.frame_dt, self.waking_event = self.scheduler.wait(self.next_wake_ms())
+            self.capture.step()
+            self.show_fps()
+    
+    def next_wake_ms(self):
+        """Milliseconds until the screen or game state next changes on its own; 0 while anything moves"""
+        if self.game_state == "LOADING" or self.animation_manager.has_animations():
+            return 0
+        
+        # Simulation timers, less the time already waiting in the accumulator.
+        sim_waits = []
+        waiting_for_bot = False
+        background_wait = self.background_manager.time_to_next_frame(self.game_state)
+        if background_wait is not None:
+            sim_waits.append(background_wait * 1000)
+        if self.game_state in BOARD_STATES:
+            if self.engine_changed:
+                return 0
+            for panel in (self.player1_panel, self.player2_panel, self.item_panel):
+                sim_waits.append(panel.time_to_next_frame())
+        if self.game_state == "REPLAY":
+            if self.replay_playing:
+                sim_waits.append(self.ai_move_delay - self.replay_timer)
+        elif self.game_state in IN_GAME_STATES:
+            waiting_for_peer = self.netplay and not self.netplay.is_local_turn()
+            if not self.game_engine.game_over and not waiting_for_peer and self.game_engine.is_ai_turn():
+                speed = self.spectate_speed if self.game_mode == "spectate" else 1
+                if speed is None:
+                    return 0
+                move_wait = (self.ai_move_delay - self.ai_move_timer) / speed
+                ai = self.game_engine.ai_players[self.game_engine.current_player_index]
+                if move_wait <= 0 and ai.difficulty == "External":
+                    waiting_for_bot = True
+                else:
+                    sim_waits.append(move_wait)
+        elif self.game_state == "ARENA":
+            if self.spectate_speed is None:
+                return 0
+            sim_waits.append(self.arena.time_to_next_move() / self.spectate_speed)
+        waits = [wait - self.sim_accumulator for wait in sim_waits]
+        
+        if assets.pending:
+            waits.append(PENDING_ASSET_POLL_MS)
+        if self.netplay:
+            waits.append(NETPLAY_POLL_MS)
+        if waiting_for_bot:
+            waits.append(EXTERNAL_AI_POLL_MS)
+        journal_wait = self.journal.next_deadline()
+        if journal_wait is not None:
+            waits.append(journal_wait * 1000)
+        
+        return max(0, min(waits)) if waits else self.scheduler.max_idle_ms
+    
+    def show_fps(self):
+        """Report the effective frame rate in the window title when it changes"""
+        fps = self.scheduler.effective_fps
+        if fps != self.shown_fps:
+            self.shown_fps = fps
+            pygame.display.set_caption(f"Greedy Bag Race - {fps} FPS")
     
     def handle_events(self):
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if self.waking_event is not None:
+            events.insert(0, self.waking_event)
+            self.waking_event = None
+        
+        for event in events:
             if event.type == pygame.QUIT:
                 self.quit_game()
             
+            if event.type in INPUT_EVENTS:
+                self.scheduler.note_input()
+            
+            if event.type in (pygame.VIDEOEXPOSE, pygame.VIDEORESIZE, pygame.WINDOWEXPOSED):
+                self.dirty_region.mark_all()
+            
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.dirty_region.mark(self.profiler.get_bounds())
+                self.profiler.toggle()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4 and self.profiler.frames:
+                print(f"Wrote frame profile to {self.profiler.dump_csv(PROFILE_DIR)}")
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F5:
+                self.capture.request()
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_F6:
+                self.dirty_region.mark(memory.get_bounds())
+                if memory.toggle():
+                    self.memory_timer = MEMORY_CHECK_MS
+            
+            if self.game_state in BOARD_STATES:
+                if event.type == pygame.MOUSEWHEEL:
+                    self.item_panel.scroll(-event.y)
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_s:
+                    self.cycle_item_sort()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_f:
+                    self.toggle_item_fit_filter()
+            
+            if self.game_state in ("IN_GAME_SPECTATE", "ARENA") and event.type == pygame.KEYDOWN:
+                self.handle_spectator_key(event.key)
+            elif self.game_state == "REPLAY":
+                self.handle_replay_event(event)
+            
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if self.game_state == "MENU":
                     self.handle_click(event, self.menu_buttons)
@@ -180,7 +407,7 @@ class GreedyBagRace:
                 elif self.game_state in ["IN_GAME_SINGLE", "IN_GAME_MULTI"]:
                     self.handle_game_click(event)
                 elif self.game_state in ["YOU_WIN", "AI_WIN", "PLAYER1_WIN", "PLAYER2_WIN"]:
-                    if hasattr(self, 'game_over_back_button') and self.game_over_back_button.is_hovered():
+                    if self.game_over_back_button.is_hovered():
                         self.game_over_back_button.click()
     
     def handle_click(self, event, buttons):
@@ -195,7 +422,61 @@ class GreedyBagRace:
                 self.play_sound('click')
                 button.click()
     
+    def handle_spectator_key(self, key):
+        """1-4 pick the playback speed, [ and ] cycle each seat's difficulty, A opens the arena, Esc returns to the menu"""
+        speed_keys = (pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_4)
+        if key in speed_keys:
+            self.spectate_speed = SPECTATE_SPEEDS[speed_keys.index(key)]
+            self.ai_move_timer = 0
+            self.engine_changed = True
+        elif key == pygame.K_ESCAPE:
+            self.show_main_menu()
+        elif self.game_state == "ARENA":
+            return
+        elif key == pygame.K_a:
+            self.stop_spectator()
+            self.start_arena()
+        elif key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+            seat = 0 if key == pygame.K_LEFTBRACKET else 1
+            index = DIFFICULTIES.index(self.spectate_seats[seat])
+            self.spectate_seats[seat] = DIFFICULTIES[(index + 1) % len(DIFFICULTIES)]
+            self.spectate_games = 0
+            self.spectate_tally = [0, 0, 0]
+            self.deal_spectator_game()
+    
+    def handle_replay_event(self, event):
+        """Left/Right step a move, PageUp/PageDown jump REPLAY_PAGE_MOVES, Home/End go to either end,
+        Space plays or pauses, Esc returns to the menu; clicking or dragging on the timeline seeks"""
+        if event.type == pygame.KEYDOWN:
+            steps = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1,
+                     pygame.K_PAGEUP: -REPLAY_PAGE_MOVES, pygame.K_PAGEDOWN: REPLAY_PAGE_MOVES}
+            if event.key in steps:
+                self.seek_replay(self.replay.position + steps[event.key])
+            elif event.key == pygame.K_HOME:
+                self.seek_replay(0)
+            elif event.key == pygame.K_END:
+                self.seek_replay(self.replay.length)
+            elif event.key == pygame.K_SPACE:
+                if not self.replay_playing and self.replay.position == self.replay.length:
+                    self.seek_replay(0)
+                self.replay_playing = not self.replay_playing
+                self.replay_timer = 0
+                self.engine_changed = True
+            elif event.key == pygame.K_ESCAPE:
+                self.show_main_menu()
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            if self.timeline_panel.get_bounds().collidepoint(event.pos):
+                self.scrubbing = True
+                self.seek_replay(self.timeline_panel.position_at(event.pos[0]))
+        elif event.type == pygame.MOUSEMOTION and self.scrubbing:
+            self.seek_replay(self.timeline_panel.position_at(event.pos[0]))
+        elif event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+            self.scrubbing = False
+    
     def handle_game_click(self, event):
+        if self.netplay and not self.netplay.is_local_turn():
+            return
+        
         game_state = self.game_engine.get_game_state()
         current_player = game_state["players"][game_state["current_player"]]
         
@@ -205,12 +486,11 @@ class GreedyBagRace:
         
         handled, fraction = self.amount_selector.handle_event(event)
         if handled and fraction is not None:
-            game_state = self.game_engine.get_game_state()
-            item_index = self.amount_selector.current_item_index
-            if item_index is not None and 0 <= item_index < len(game_state["available_items"]):
-                item = game_state["available_items"][item_index]
-                item_value = item['value'] * fraction
-                start_pos = self.item_panel.get_item_position(item_index)
+            handle = self.amount_selector.current_item_handle
+            item = self.game_engine.get_item(handle)
+            if item is not None:
+                item_value = item.value * fraction
+                start_pos = self.item_panel.get_item_position(handle)
                 
                 current_player_index = self.game_engine.current_player_index
                 if current_player_index == 0:
@@ -219,11 +499,11 @@ class GreedyBagRace:
                     end_pos = self.player2_panel.get_score_position()
 
                 if start_pos and end_pos:
-                    self.animation_manager.add_particle_effect(start_pos)
+                    self.add_pick_effect(start_pos, item_value)
                     self.animation_manager.add_score_animation(item_value, start_pos, end_pos)
 
                 self.play_sound('pick_item')
-                self.game_engine.human_pick_fraction(item_index, float(fraction))
+                self.game_engine.human_pick_fraction(handle, float(fraction))
             self.amount_selector.hide()
             return
         
@@ -232,32 +512,64 @@ class GreedyBagRace:
             return
         
         if not self.game_engine.is_ai_turn() and current_player["space_left"] > 0:
-            item_index = self.item_panel.get_clicked_item(event.pos)
-            if item_index is not None and not self.amount_selector.visible:
-                self.show_amount_selector(item_index)
+            handle = self.item_panel.get_clicked_item(event.pos)
+            if handle is not None and not self.amount_selector.visible:
+                self.show_amount_selector(handle)
     
-    def show_amount_selector(self, item_index):
-        game_state = self.game_engine.get_game_state()
-        if item_index >= len(game_state["available_items"]):
+    def show_amount_selector(self, handle):
+        item = self.game_engine.get_item(handle)
+        if item is None:
             return
         
-        item = game_state["available_items"][item_index]
-        item_weight = item["weight"]
-        
-        current_player = game_state["players"][game_state["current_player"]]
-        available_space = current_player["space_left"]
-        max_amount = min(int(item_weight), int(available_space))
+        current_player = self.game_engine.get_current_player()
+        available_space = current_player.bag_limit - current_player.current_weight
+        max_amount = min(int(item.weight), int(available_space))
         
         if max_amount > 0:
-            self.amount_selector.show(item_index, item_weight, max_amount)
+            self.amount_selector.show(handle, item.weight, max_amount)
     
     def handle_game_over_click(self, event):
         self.show_main_menu()
     
     def update(self):
         mouse_pos = pygame.mouse.get_pos()
-        self.animation_manager.update()
-        self.background_manager.update(self.game_state)
+        with self.profiler.section("update.assets"):
+            assets_arrived = assets.pump()
+        if assets_arrived:
+            # Streamed-in images replace placeholders wherever they are drawn.
+            if self.game_state in BOARD_STATES:
+                for panel in (self.player1_panel, self.player2_panel, self.item_panel):
+                    panel.dirty = True
+            elif self.game_state == "ARENA":
+                self.arena.invalidate()
+            else:
+                self.dirty_region.mark_all()
+        if self.game_state == "LOADING":
+            self.dirty_region.mark_all()
+            if assets.is_loaded(URGENT):
+                self.change_state("MENU")
+                autostart = self.autostart_replay or self.autostart_arena or self.autostart_spectate
+                if self.resume_pending and autostart:
+                    # None of the autostart modes write the journal, so the game is still there next time.
+                    self.resume_pending = False
+                    print("Not resuming the unfinished game: another mode was asked for on the command line")
+                elif self.resume_pending:
+                    self.enter_resumed_game()
+                if self.autostart_replay:
+                    self.start_replay(self.autostart_replay)
+                    self.autostart_replay = None
+                elif self.autostart_arena:
+                    self.start_arena(self.autostart_arena)
+                    self.autostart_arena = None
+                elif self.autostart_spectate:
+                    self.autostart_spectate = False
+                    self.start_spectator()
+        with self.profiler.section("update.io"):
+            self.journal.poll()
+            if self.netplay:
+                self.netplay.poll()
+        with self.profiler.section("update.memory"):
+            self.update_memory()
         
         if self.game_state == "MENU":
             for button in self.menu_buttons:
@@ -266,102 +578,343 @@ class GreedyBagRace:
             for button in self.difficulty_buttons:
                 button.update_hover(mouse_pos)
         
-        if self.game_state in ["IN_GAME_SINGLE", "IN_GAME_MULTI"]:
-            if not self.game_engine.game_over:
-                current = self.game_engine.get_current_player()
-
-                if current.current_weight >= current.bag_limit:
-                    self.game_engine.skip_turn()
-                elif self.game_engine.is_ai_turn():
-                    if self.ai_move_timer < self.ai_move_delay:
-                        self.ai_move_timer += 1
-                    else:
-                        self.ai_move_timer = 0
-                        pre_move_state = self.game_engine.get_game_state()
-                        self.game_engine.ai_make_move()
-                        post_move_state = self.game_engine.get_game_state()
-
-                        p2_score_before = pre_move_state['players'][1]['value']
-                        p2_score_after = post_move_state['players'][1]['value']
-                        score_diff = p2_score_after - p2_score_before
-
-                        pre_items = { (item['name'], item['original_weight']): item for item in pre_move_state['available_items'] }
-                        post_items = { (item['name'], item['original_weight']): item for item in post_move_state['available_items'] }
-                        
-                        picked_item_pos = None
-
-                        for i, item_before in enumerate(pre_move_state['available_items']):
-                            key = (item_before['name'], item_before['original_weight'])
-                            if key not in post_items:
-                                picked_item_pos = self.item_panel.get_item_position(i)
-                                break
-                            else:
-                                item_after = post_items[key]
-                                if item_after['weight'] < item_before['weight']:
-                                    picked_item_pos = self.item_panel.get_item_position(i)
-                                    break
-                        
-                        if picked_item_pos:
-                            self.play_sound('pick_item')
-                            self.animation_manager.add_particle_effect(picked_item_pos)
-                            if score_diff > 0:
-                                end_pos = self.player2_panel.get_score_position()
-                                self.animation_manager.add_score_animation(score_diff, picked_item_pos, end_pos)
-
-            self.update_panels()
-
-            if self.game_engine.game_over:
-                winner = self.game_engine.get_winner()
-                if self.game_mode == "single":
-                    if winner and "Player" in winner.name:
-                        self.change_state("YOU_WIN")
-                        self.play_sound('win')
-                    else:
-                        self.change_state("AI_WIN")
-                        self.play_sound('lose')
-                else:
-                    if winner and "Player 1" in winner.name:
-                        self.change_state("PLAYER1_WIN")
-                    else:
-                        self.change_state("PLAYER2_WIN")
+        # Run as many fixed steps as the elapsed time holds; the remainder carries over.
+        self.sim_accumulator = min(self.sim_accumulator + self.frame_dt, MAX_CATCHUP_MS)
+        while self.sim_accumulator >= SIM_STEP_MS:
+            self.simulate(SIM_STEP_MS)
+            self.sim_accumulator -= SIM_STEP_MS
+        if self.game_state == "IN_GAME_SPECTATE" and self.spectate_speed is None:
+            with self.profiler.section("update.ai"):
+                self.fast_forward(SPECTATE_FRAME_BUDGET_MS)
+        elif self.game_state == "ARENA":
+            with self.profiler.section("update.ai"):
+                self.arena.play(ARENA_FRAME_BUDGET_MS, every_tile=self.spectate_speed is None)
+            self.status_panel.update_turn(self.arena_status())
+        self.animation_manager.interpolate(self.sim_accumulator / SIM_STEP_MS)
+        
+        if self.game_state in BOARD_STATES:
+            with self.profiler.section("update.panels"):
+                self.update_panels()
+
+        self.collect_dirty_rects()
+
+    def simulate(self, step):
+        """Advance gameplay, animations and the background by one fixed step of `step` ms"""
+        with self.profiler.section("update.animation"):
+            self.animation_manager.update(step)
+        with self.profiler.section("update.background"):
+            if self.background_manager.update(self.game_state, step):
+                self.dirty_region.mark_all()
+        
+        if self.game_state == "ARENA" and self.spectate_speed is not None:
+            self.arena.advance(step * self.spectate_speed)
+        if self.game_state == "REPLAY":
+            self.update_replay(step)
+            for panel in (self.player1_panel, self.player2_panel, self.item_panel):
+                panel.tick(step)
+        if self.game_state not in IN_GAME_STATES:
+            return
+        with self.profiler.section("update.ai"):
+            if self.game_mode == "spectate":
+                self.update_spectator(step)
+            else:
+                self.update_turn(step)
+        for panel in (self.player1_panel, self.player2_panel, self.item_panel):
+            panel.tick(step)
+
+        if self.game_engine.game_over:
+            winner = self.game_engine.get_winner()
+            if self.game_mode == "spectate":
+                self.next_spectator_game()
+            elif self.game_mode == "single":
+                if winner and "Player" in winner.name:
+                    self.change_state("YOU_WIN")
                     self.play_sound('win')
+                    self.animation_manager.add_celebration(self.screen.get_rect())
+                else:
+                    self.change_state("AI_WIN")
+                    self.play_sound('lose')
+            else:
+                if winner and "Player 1" in winner.name:
+                    self.change_state("PLAYER1_WIN")
+                else:
+                    self.change_state("PLAYER2_WIN")
+                self.play_sound('win')
+                self.animation_manager.add_celebration(self.screen.get_rect())
+
+    def update_turn(self, step):
+        """Skip a full bag's turn and make the AI's move once its delay has passed"""
+        waiting_for_peer = self.netplay and not self.netplay.is_local_turn()
+        if not self.game_engine.game_over and not waiting_for_peer:
+            current = self.game_engine.get_current_player()
+
+            if current.current_weight >= current.bag_limit:
+                self.game_engine.skip_turn()
+            elif self.game_engine.is_ai_turn():
+                seat = self.game_engine.current_player_index
+                ai = self.game_engine.ai_players[seat]
+                external = ai.difficulty == "External"
+                if external and ai.request is None:
+                    # The bot thinks during the move delay; its answer is polled so drawing never waits on it.
+                    ai.submit(self.game_engine)
+                if self.ai_move_timer < self.ai_move_delay:
+                    self.ai_move_timer += step
+                else:
+                    move = ai.poll_move() if external else None
+                    if external and move is None:
+                        return
+                    self.ai_move_timer = 0
+                    score_before = current.total_value
+                    item, _ = self.game_engine.ai_make_move(move)
+                    score_diff = current.total_value - score_before
+
+                    picked_item_pos = None
+                    if item is not None:
+                        picked_item_pos = self.item_panel.get_item_position(item.handle)
+
+                    if picked_item_pos:
+                        self.play_sound('pick_item')
+                        self.add_pick_effect(picked_item_pos, score_diff)
+                        if score_diff > 0:
+                            panel = self.player1_panel if seat == 0 else self.player2_panel
+                            end_pos = panel.get_score_position()
+                            self.animation_manager.add_score_animation(score_diff, picked_item_pos, end_pos)
+
+    def update_replay(self, step):
+        """Play the next recorded move, with its effects, once the move delay has passed"""
+        if not self.replay_playing:
+            return
+        self.replay_timer += step
+        if self.replay_timer < self.ai_move_delay:
+            return
+        self.replay_timer = 0
+        if self.replay.position >= self.replay.length:
+            self.replay_playing = False
+            self.engine_changed = True
+            return
+        
+        move = self.replay.recording.moves[self.replay.position]
+        if move["op"] != "pick":
+            self.replay.step()
+            return
+        player = self.replay.engine.players[move["player"]]
+        score_before = player.total_value
+        picked_item_pos = self.item_panel.get_item_position(move["item"])
+        self.replay.step()
+        score_diff = player.total_value - score_before
+        if picked_item_pos:
+            self.play_sound('pick_item')
+            self.add_pick_effect(picked_item_pos, score_diff)
+            if score_diff > 0:
+                panel = self.player1_panel if move["player"] == 0 else self.player2_panel
+                self.animation_manager.add_score_animation(score_diff, picked_item_pos, panel.get_score_position())
+
+    def seek_replay(self, position):
+        self.replay.seek(position)
+        self.replay_timer = 0
+
+    def replay_status(self, game_state):
+        if self.replay.position == self.replay.length:
+            result = f"Winner: {game_state['winner']}" if game_state["winner"] else "Tie!"
+        else:
+            result = f"Current Turn: {game_state['players'][game_state['current_player']]['name']}"
+        playback = "playing" if self.replay_playing else "paused"
+        return f"Replay: move {self.replay.position}/{self.replay.length} | {playback} | {result}"
+
+    def update_spectator(self, step):
+        """Advance an AI-vs-AI game by `step` ms of playback at the chosen speed.
+
+        At 1x moves play out with their sounds and effects. Faster speeds play
+        the moves that fall due in this step without any, so only the latest
+        state is drawn; the fastest speed plays from update() instead.
+        """
+        if self.spectate_speed == 1:
+            self.update_turn(step)
+        elif self.spectate_speed is not None:
+            self.ai_move_timer += step * self.spectate_speed
+            while self.ai_move_timer >= self.ai_move_delay:
+                self.ai_move_timer -= self.ai_move_delay
+                self.spectate_move()
+
+    def fast_forward(self, budget_ms):
+        """Play spectator moves back to back for `budget_ms` of wall time"""
+        deadline = time.perf_counter() + budget_ms / 1000
+        while time.perf_counter() < deadline:
+            self.spectate_move()
+
+    def spectate_move(self):
+        """Play one AI move (or skip a full bag's turn) without effects, dealing the next game when it ends"""
+        self.game_engine.ai_make_move()
+        if self.game_engine.game_over:
+            self.next_spectator_game()
+
+    def next_spectator_game(self):
+        winner = self.game_engine.get_winner()
+        if winner is None:
+            self.spectate_tally[2] += 1
+        else:
+            self.spectate_tally[self.game_engine.players.index(winner)] += 1
+        self.spectate_games += 1
+        self.deal_spectator_game()
+
+    def deal_spectator_game(self):
+        first, second = self.spectate_seats
+        self.game_engine.initialize_game([f"AI 1 ({first})", f"AI 2 ({second})"],
+                                         ai_seats={0: first, 1: second})
+
+    def spectator_status(self):
+        first, second = self.spectate_seats
+        speed = f"{self.spectate_speed}x" if self.spectate_speed else "max"
+        first_wins, second_wins, ties = self.spectate_tally
+        return f"{first} vs {second} | {speed} | game {self.spectate_games + 1} | {first_wins}-{second_wins}-{ties}"
+
+    def arena_status(self):
+        first, second = self.arena.seats
+        speed = f"{self.spectate_speed}x" if self.spectate_speed else "max"
+        first_wins, second_wins, ties = self.arena.tally()
+        return (f"Arena: {len(self.arena.tiles)} games | {first} vs {second} | {speed}"
+                f" | {first_wins + second_wins + ties} played | {first_wins}-{second_wins}-{ties}")
+
+    def update_memory(self):
+        """Once per MEMORY_CHECK_MS, hold the caches to their budgets and refresh the memory overlay"""
+        self.memory_timer += self.frame_dt
+        if self.memory_timer < MEMORY_CHECK_MS:
+            return
+        self.memory_timer = 0
+        if memory.enforce():
+            # Dropped surfaces are rebuilt (or stream back in) when next drawn.
+            self.dirty_region.mark_all()
+        self.dirty_region.mark(memory.update())
+
+    def add_pick_effect(self, position, value):
+        count = BIG_PICK_PARTICLES if value >= BIG_PICK_VALUE else 25
+        self.animation_manager.add_particle_effect(position, particle_count=count)
+
+    def collect_dirty_rects(self):
+        """Mark the screen areas of changed panels and of animations for recompositing"""
+        panels = ()
+        if self.game_state in IN_GAME_STATES:
+            panels = (self.player1_panel, self.player2_panel, self.item_panel,
+                      self.status_panel, self.amount_selector)
+        elif self.game_state == "REPLAY":
+            panels = (self.player1_panel, self.player2_panel, self.item_panel,
+                      self.status_panel, self.timeline_panel)
+        elif self.game_state == "ARENA":
+            panels = (self.status_panel,)
+            with self.profiler.section("update.arena"):
+                for rect in self.arena.update():
+                    self.dirty_region.mark(rect)
+        for panel in panels:
+            if not panel.dirty:
+                continue
+            panel.dirty = False
+            old_bounds = self.panel_bounds.get(panel)
+            new_bounds = panel.get_bounds()
+            self.dirty_region.mark(old_bounds.union(new_bounds) if old_bounds else new_bounds)
+            self.panel_bounds[panel] = new_bounds
+        
+        for rect in self.animation_manager.get_dirty_rects():
+            self.dirty_region.mark(rect)
+        self.dirty_region.mark(self.profiler.update())
+
+    def on_engine_move(self, move):
+        self.engine_changed = True
+
+    def cycle_item_sort(self):
+        index = ITEM_SORT_KEYS.index(self.item_sort_key)
+        self.item_sort_key = ITEM_SORT_KEYS[(index + 1) % len(ITEM_SORT_KEYS)]
+        self.engine_changed = True
+
+    def toggle_item_fit_filter(self):
+        self.item_fit_filter = not self.item_fit_filter
+        self.engine_changed = True
 
     def update_panels(self):
-        game_state = self.game_engine.get_game_state()
+        # Panel data only changes with moves, so large item sets cost nothing while idle.
+        if not self.engine_changed:
+            return
+        self.engine_changed = False
+        
+        engine = self.replay.engine if self.game_state == "REPLAY" else self.game_engine
+        game_state = engine.get_game_state()
         self.player1_panel.update_player_data(
             game_state["players"][0]["bag"],
             game_state["players"][0]["weight"],
-            self.game_engine.bag_capacity,
+            engine.bag_capacity,
             game_state["players"][0]["value"]
         )
         self.player2_panel.update_player_data(
             game_state["players"][1]["bag"],
             game_state["players"][1]["weight"],
-            self.game_engine.bag_capacity,
+            engine.bag_capacity,
             game_state["players"][1]["value"]
         )
+        current_player = game_state["players"][game_state["current_player"]]
+        self.item_panel.set_view(self.item_sort_key, current_player["space_left"] if self.item_fit_filter else None)
         self.item_panel.update_items(game_state["available_items"])
-        self.status_panel.update_turn(f"Current Turn: {game_state['players'][game_state['current_player']]['name']}")
+        if self.game_mode == "spectate":
+            self.status_panel.update_turn(self.spectator_status())
+        elif self.game_mode == "replay":
+            self.status_panel.update_turn(self.replay_status(game_state))
+            self.timeline_panel.set_position(self.replay.position, self.replay.length)
+        else:
+            self.status_panel.update_turn(f"Current Turn: {game_state['players'][game_state['current_player']]['name']}")
     
     def render(self):
-        background = self.background_manager.get_background(self.game_state)
-        if background:
-            background.draw(self.screen)
-        else:
-            self.screen.fill(BG_COLOR)
+        """Recomposite the dirty parts of the screen, or all of it when needed"""
+        full_redraw, rects = self.dirty_region.take()
         
-        if self.game_state == "MENU":
+        if full_redraw or not DIRTY_RECT_RENDERING:
+            self.compose()
+            with self.profiler.section("render.flip"):
+                pygame.display.flip()
+        elif rects:
+            for rect in rects:
+                self.screen.set_clip(rect)
+                self.compose(rect)
+            self.screen.set_clip(None)
+            with self.profiler.section("render.flip"):
+                pygame.display.update(rects)
+    
+    def compose(self, area=None):
+        """Draw the frame for the current state; `area` limits the background blit"""
+        with self.profiler.section("render.background"):
+            background = self.background_manager.get_background(self.game_state)
+            if background:
+                background.draw(self.screen, area)
+            else:
+                self.screen.fill(BG_COLOR, area)
+        
+        if self.game_state == "LOADING":
+            self.render_loading()
+        elif self.game_state == "MENU":
             self.render_menu()
         elif self.game_state == "MODE_SELECT":
             self.render_mode_select()
         elif self.game_state == "DIFFICULTY_SELECT":
             self.render_difficulty_select()
-        elif self.game_state in ["IN_GAME_SINGLE", "IN_GAME_MULTI"]:
+        elif self.game_state in BOARD_STATES:
             self.render_game()
+        elif self.game_state == "ARENA":
+            self.render_arena()
         elif self.game_state in ["YOU_WIN", "AI_WIN", "PLAYER1_WIN", "PLAYER2_WIN"]:
             self.render_game_over()
         
-        pygame.display.flip()
+        self.profiler.draw(self.screen)
+        memory.draw(self.screen)
+    
+    def render_loading(self):
+        done, total = assets.progress(URGENT)
+        ratio = done / total if total else 1.0
+        
+        bar_rect = pygame.Rect(0, 0, self.screen_width // 3, 24)
+        bar_rect.center = (self.screen_width // 2, self.screen_height // 2)
+        pygame.draw.rect(self.screen, PANEL_COLOR, bar_rect)
+        pygame.draw.rect(self.screen, HIGHLIGHT_COLOR, (bar_rect.x, bar_rect.y, int(bar_rect.width * ratio), bar_rect.height))
+        pygame.draw.rect(self.screen, TEXT_COLOR, bar_rect, 2)
+        
+        text_surf = render_text(f"Loading... {done}/{total}", 'arial', self.screen_height // 40, TEXT_COLOR)
+        self.screen.blit(text_surf, text_surf.get_rect(midbottom=(bar_rect.centerx, bar_rect.top - 10)))
     
     def render_menu(self):
         for button in self.menu_buttons:
@@ -376,28 +929,30 @@ class GreedyBagRace:
             button.draw(self.screen)
     
     def render_game(self):
-        self.player1_panel.draw(self.screen)
-        self.player2_panel.draw(self.screen)
-        self.item_panel.draw(self.screen)
-        self.status_panel.draw(self.screen)
+        with self.profiler.section("render.player1"):
+            self.player1_panel.draw(self.screen)
+        with self.profiler.section("render.player2"):
+            self.player2_panel.draw(self.screen)
+        with self.profiler.section("render.items"):
+            self.item_panel.draw(self.screen)
+        with self.profiler.section("render.status"):
+            self.status_panel.draw(self.screen)
         
         if self.amount_selector.visible:
             self.amount_selector.draw(self.screen)
+        if self.game_state == "REPLAY":
+            self.timeline_panel.draw(self.screen)
 
-        self.animation_manager.draw(self.screen)
-        
-        small_font = pygame.font.SysFont('arial', self.screen_height // 40)
-        
-        if self.game_mode == "single":
-            mode_text = "Single Player" if self.game_state == "IN_GAME_SINGLE" else "Multiplayer"
-        
-        info_text = ""
-        info_surf = small_font.render(info_text, True, TEXT_COLOR)
-        info_rect = info_surf.get_rect(center=(self.screen_width//2, self.screen_height - 30))
-        self.screen.blit(info_surf, info_rect)
+        with self.profiler.section("render.animations"):
+            self.animation_manager.draw(self.screen)
+    
+    def render_arena(self):
+        self.status_panel.draw(self.screen)
+        with self.profiler.section("render.arena"):
+            self.arena.draw(self.screen)
     
     def render_game_over(self):
-        font = pygame.font.SysFont('arial', self.screen_height // 50)
+        font_size = self.screen_height // 50
         
         winner = self.game_engine.get_winner()
         winner_name = winner.name if winner else "Tie"
@@ -407,11 +962,11 @@ class GreedyBagRace:
         p2_value = game_state["players"][1]["value"]
         
         score_text = f"{p1_value:.1f} - {p2_value:.1f}"
-        score_surf = font.render(score_text, True, TEXT_COLOR)
+        score_surf = render_text(score_text, 'arial', font_size, TEXT_COLOR)
         score_rect = score_surf.get_rect(midbottom=(self.screen_width//2, self.screen_height - 50))
         
         winner_text = f"Winner: {winner_name}" if winner_name != "Tie" else "🏆 Tie! 🏆"
-        winner_surf = font.render(winner_text, True, HIGHLIGHT_COLOR)
+        winner_surf = render_text(winner_text, 'arial', font_size, HIGHLIGHT_COLOR)
         winner_rect = winner_surf.get_rect(midbottom=(self.screen_width//2, score_rect.top - 5))
         
         line_y = winner_rect.top - 5
@@ -422,18 +977,19 @@ class GreedyBagRace:
         self.screen.blit(winner_surf, winner_rect)
         self.screen.blit(score_surf, score_rect)
         
-        back_button = Button(40,900, 150, 150, "🔙 Menu", self.show_main_menu)
-        back_button.draw(self.screen)
-        
-        self.game_over_back_button = back_button
+        self.game_over_back_button.draw(self.screen)
+        self.animation_manager.draw(self.screen)
     
     def play_sound(self, sound_name):
         if sound_name in self.sounds:
-            self.sounds[sound_name].play()
+            sound = assets.sound(self.sounds[sound_name])
+            if sound:
+                sound.play()
     
     def change_state(self, new_state):
         old_state = self.game_state
         self.game_state = new_state
+        self.dirty_region.mark_all()
         
         if old_state != new_state:
             self.play_bgm(new_state)
@@ -442,17 +998,104 @@ class GreedyBagRace:
         self.change_state("DIFFICULTY_SELECT")
     
     def start_multiplayer(self):
+        if self.netplay and not self.netplay.is_host:
+            print("Waiting for the host to start the game")
+            return
         self.game_mode = "multi"
         self.game_engine.initialize_game(["Player 1", "Player 2"], is_multiplayer=True)
         self.change_state("IN_GAME_MULTI")
     
+    def enter_network_game(self):
+        """Called when the host sends a game snapshot"""
+        if self.game_engine.players:
+            self.game_mode = "multi"
+            self.change_state("IN_GAME_MULTI")
+    
     def set_difficulty(self, difficulty):
         self.difficulty = difficulty
         self.game_mode = "single"
-        self.game_engine.initialize_game(["Player", f"AI ({difficulty})"], is_multiplayer=False, ai_difficulty=difficulty)
+        if self.external_ai:
+            self.external_ai.new_game()
+            self.game_engine.initialize_game(["Player", self.external_ai.name], ai_seats={1: self.external_ai})
+        else:
+            self.game_engine.initialize_game(["Player", f"AI ({difficulty})"], is_multiplayer=False, ai_difficulty=difficulty)
         self.change_state("IN_GAME_SINGLE")
     
+    def start_spectator(self):
+        """Watch the built-in AIs play each other, game after game"""
+        if self.netplay:
+            print("AI vs AI is not available in network games")
+            return
+        self.game_mode = "spectate"
+        # Spectator games are not journaled or recorded, so they never replace a saved game.
+        self.journal.detach()
+        if self.recorder:
+            self.recorder.detach()
+        self.player1_panel.set_player_type("ai")
+        self.ai_move_timer = 0
+        self.spectate_games = 0
+        self.spectate_tally = [0, 0, 0]
+        self.deal_spectator_game()
+        self.change_state("IN_GAME_SPECTATE")
+    
+    def stop_spectator(self):
+        self.game_mode = None
+        self.player1_panel.set_player_type("human")
+        self.journal.attach(self.game_engine)
+        if self.recorder:
+            self.recorder.attach(self.game_engine)
+    
+    def start_arena(self, count=ARENA_GAMES):
+        """Watch `count` AI-vs-AI games at once, tiled below the status bar"""
+        if self.netplay:
+            print("The arena is not available in network games")
+            return
+        self.game_mode = "arena"
+        top = self.status_panel.rect.bottom + 10
+        self.arena = Arena((50, top, self.screen_width - 100, self.screen_height - top - 20), count,
+                           tuple(self.spectate_seats), BAG_CAPACITY, self.game_engine.item_count)
+        self.change_state("ARENA")
+    
+    def stop_arena(self):
+        self.game_mode = None
+        self.arena.close()
+        self.arena = None
+    
+    def start_replay(self, path):
+        """Open the recording at `path` (see backend.replay) in the replay viewer, at its first move"""
+        try:
+            self.replay = ReplayCursor(Recording.load(path))
+        except (OSError, ValueError) as e:
+            print(f"Cannot open replay {path}: {e}")
+            return
+        self.game_mode = "replay"
+        # The replay has its own engine, so the journal and recorder never see it.
+        self.replay.engine.add_move_listener(self.on_engine_move)
+        self.replay.seek(0)
+        self.replay_playing = False
+        self.replay_timer = 0
+        seats = self.replay.engine.ai_players
+        self.player1_panel.set_player_type("ai" if 0 in seats else "human")
+        self.player2_panel.set_player_type("ai" if 1 in seats else "human")
+        self.engine_changed = True
+        self.change_state("REPLAY")
+    
+    def stop_replay(self):
+        self.game_mode = None
+        self.replay = None
+        self.replay_playing = False
+        self.scrubbing = False
+        self.player1_panel.set_player_type("human")
+        self.player2_panel.set_player_type("ai")
+        self.engine_changed = True
+    
     def show_main_menu(self):
+        if self.game_mode == "spectate":
+            self.stop_spectator()
+        elif self.game_mode == "arena":
+            self.stop_arena()
+        elif self.game_mode == "replay":
+            self.stop_replay()
         self.change_state("MENU")
         
     def show_mode_select(self):
@@ -462,9 +1105,57 @@ class GreedyBagRace:
         self.change_state("DIFFICULTY_SELECT")
         
     def quit_game(self):
+        self.capture.stop()
+        self.journal.close()
+        if self.recorder:
+            self.recorder.detach()
+        self.background_manager.close()
+        if self.external_ai:
+            self.external_ai.close()
+        if self.netplay:
+            self.netplay.close()
+        assets.close()
         pygame.quit()
         sys.exit()
 
+def parse_size(text):
+    """(width, height) from a "WxH" command line value"""
+    try:
+        width, height = (int(n) for n in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WxH, got {text!r}")
+    return width, height
+
+def parse_pairing(text):
+    """[first, second] seat difficulties from a "Hard:Easy" command line value"""
+    seats = [name.capitalize() for name in text.split(":")]
+    if len(seats) != 2 or any(seat not in DIFFICULTIES for seat in seats):
+        raise argparse.ArgumentTypeError(f"expected two of {'/'.join(DIFFICULTIES)} as A:B, got {text!r}")
+    return seats
+
 if __name__ == "__main__":
-    game = GreedyBagRace()
+    parser = argparse.ArgumentParser(description="Greedy Bag Race")
+    parser.add_argument("--engine", help="command of an external AI to play the computer seat")
+    parser.add_argument("--host", type=int, metavar="PORT", help="host a network multiplayer game")
+    parser.add_argument("--join", metavar="HOST:PORT", help="join a network multiplayer game")
+    parser.add_argument("--items", type=int, default=ITEM_COUNT, help="number of items dealt per game")
+    parser.add_argument("--render-size", type=parse_size, default=RENDER_SIZE, metavar="WxH",
+                        help="compose frames at this resolution and scale them to the display")
+    parser.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="cap on cached surface and sound memory")
+    parser.add_argument("--spectate", type=parse_pairing, metavar="A:B",
+                        help="start watching two AIs of these difficulties play, e.g. Hard:Easy")
+    parser.add_argument("--record", metavar="DIR",
+                        help="save every game played to DIR, for python -m gui.export")
+    parser.add_argument("--arena", type=int, metavar="N",
+                        help="start watching N (4-64) AI-vs-AI games at once; --spectate sets the pairing")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="open a recorded game in the replay viewer to step and scrub through it")
+    args = parser.parse_args()
+    
+    memory_budget = args.memory_budget * 1024 * 1024 if args.memory_budget else MEMORY_BUDGET
+    game = GreedyBagRace(engine_command=args.engine, host_port=args.host, join_address=args.join,
+                         item_count=args.items, render_size=args.render_size, memory_budget=memory_budget,
+                         spectate=args.spectate, arena=args.arena,
+                         record_dir=args.record, replay=args.replay)
     game.run()